@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare launching with full Chimera discovery and environment patching
+against launching from an environment lockfile (``--env-file``).
+
+Usage: python bench_env_file.py [-n REPEATS]
+"""
+
+from __future__ import print_function
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from pychimera.core import _patch_environ, freeze_environ, load_environ
+
+
+def _restoring_environ(func, *args, **kwargs):
+    environ, executable = dict(os.environ), sys.executable
+    def run():
+        try:
+            func(*args, **kwargs)
+        finally:
+            os.environ.clear()
+            os.environ.update(environ)
+            sys.executable = executable
+    return run
+
+
+def report(label, times):
+    print('{:<32} min {:8.2f} ms   mean {:8.2f} ms'.format(
+          label, 1000 * min(times), 1000 * sum(times) / len(times)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=10, dest='repeats')
+    args = parser.parse_args()
+
+    lockfile = os.path.join(tempfile.mkdtemp(), 'env.json')
+    freeze_environ(lockfile)
+
+    print('In-process environment setup')
+    report('discovery + patches', timeit.repeat(_restoring_environ(_patch_environ),
+                                                number=1, repeat=args.repeats))
+    report('lockfile', timeit.repeat(_restoring_environ(load_environ, lockfile),
+                                     number=1, repeat=args.repeats))
+
+    print('End-to-end `pychimera -c pass`')
+    for label, extra in (('discovery + patches', []), ('lockfile', ['--env-file', lockfile])):
+        cmd = ['pychimera'] + extra + ['-c', 'pass']
+        report(label, timeit.repeat(lambda: subprocess.check_call(cmd),
+                                    number=1, repeat=args.repeats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare fork_map, sharing a structure loaded once, with a pool whose
+workers load their own copy. Reports throughput and the total proportional
+set size (PSS) of the workers, which splits shared pages among processes.
+
+Usage: pychimera bench_fork_map.py STRUCTURE [-n TASKS] [-p PROCESSES]
+"""
+
+from __future__ import division, print_function
+import argparse
+import os
+import time
+
+import chimera
+import pychimera
+from pychimera.pool import ChimeraPool
+
+MOLECULE = []
+
+
+def load(path):
+    MOLECULE[:] = chimera.openModels.open(path)[:1]
+
+
+def analysis(i):
+    """
+    Count the atoms within 5 A of atom i, and report the worker memory.
+    """
+    atoms = MOLECULE[0].atoms
+    center = atoms[i % len(atoms)].xformCoord()
+    close = sum(1 for a in atoms if a.xformCoord().sqdistance(center) < 25.0)
+    return close, os.getpid(), _pss()
+
+
+def _pss():
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1]) * 1024
+    except IOError:
+        pass
+    from pychimera.profiling import _rss
+    return _rss()
+
+
+def report(name, results, elapsed):
+    memory = {}
+    for _, pid, pss in results:
+        memory[pid] = max(memory.get(pid, 0), pss)
+    print('{:<22} {:8.1f} tasks/s  workers PSS {:8.1f} MiB'.format(
+          name, len(results) / elapsed, sum(memory.values()) / 2 ** 20))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('structure')
+    parser.add_argument('-n', type=int, default=2000, dest='tasks')
+    parser.add_argument('-p', type=int, default=None, dest='processes')
+    args = parser.parse_args()
+
+    t0 = time.time()
+    load(args.structure)
+    results = list(pychimera.fork_map(analysis, range(args.tasks), processes=args.processes))
+    report('fork_map (shared)', results, time.time() - t0)
+    chimera.openModels.close(MOLECULE)
+    del MOLECULE[:]
+
+    t0 = time.time()
+    with ChimeraPool(max_workers=args.processes, initializer=load,
+                     initargs=(args.structure,)) as pool:
+        results = list(pool.map(analysis, range(args.tasks)))
+    report('pool (per-worker load)', results, time.time() - t0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare reading a multi-model file with chimera.openModels.open and with
+iter_frames: time per frame and resident memory. Each mode runs in its own
+process, so the memory of one doesn't count for the other.
+
+Usage: python bench_frames.py STRUCTURE
+"""
+
+from __future__ import division, print_function
+import argparse
+import subprocess
+import sys
+
+SCRIPT = """
+import time
+import chimera
+from pychimera.frames import iter_frames
+from pychimera.profiling import _rss
+t0 = time.time()
+if {streaming}:
+    frames = 0
+    for molecule in iter_frames({path!r}):
+        molecule.atoms[0].coord()
+        frames += 1
+else:
+    frames = len(chimera.openModels.open({path!r}))
+print('{{:<16}} {{:8.3f}} ms/frame {{:8.1f}} MiB RSS'.format(
+      {label!r}, (time.time() - t0) * 1000 / frames, _rss() / 2 ** 20))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('structure')
+    args = parser.parse_args()
+    for label, streaming in (('openModels.open', False), ('iter_frames', True)):
+        code = SCRIPT.format(streaming=streaming, path=args.structure, label=label)
+        subprocess.check_call(['pychimera', '--init-profile', 'minimal', '-c', code],
+                              stdout=sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import-time and fast-path regression benchmark.
+
+Usage: python bench_import.py [-n REPEATS]
+"""
+
+from __future__ import print_function
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+
+COMMANDS = (('python -c pass', [sys.executable, '-c', 'pass']),
+            ('import pychimera', [sys.executable, '-c', 'import pychimera']),
+            ('pychimera --version', ['pychimera', '--version']),
+            ('pychimera --path', ['pychimera', '--path']),
+            ('pychimera -h', ['pychimera', '-h']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=20, dest='repeats')
+    args = parser.parse_args()
+    with open(os.devnull, 'w') as devnull:
+        for label, cmd in COMMANDS:
+            times = timeit.repeat(lambda: subprocess.check_call(cmd, stdout=devnull,
+                                                                stderr=devnull),
+                                  number=1, repeat=args.repeats)
+            print('{:<24} min {:8.2f} ms   mean {:8.2f} ms'.format(
+                  label, 1000 * min(times), 1000 * sum(times) / len(times)))
+
+
+if __name__ == '__main__':
+    main()
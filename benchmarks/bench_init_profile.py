@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare Chimera initialization time across init profiles.
+
+Usage: python bench_init_profile.py [-n REPEATS]
+"""
+
+from __future__ import division, print_function
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+
+from pychimera.core import INIT_PROFILES
+
+
+def phase_durations(profile):
+    report = os.path.join(tempfile.mkdtemp(), 'startup.json')
+    subprocess.check_call(['pychimera', '--init-profile', profile,
+                           '--profile-startup', report, '-c', 'pass'])
+    with open(report) as f:
+        events = json.load(f)['traceEvents']
+    total = (events[-1]['ts'] + events[-1]['dur'] - events[0]['ts']) / 1e3
+    init = sum(e['dur'] for e in events if e['name'] == 'enable_chimera') / 1e3
+    return total, init
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=10, dest='repeats')
+    args = parser.parse_args()
+    for profile in sorted(INIT_PROFILES):
+        results = [phase_durations(profile) for _ in range(args.repeats)]
+        totals, inits = zip(*results)
+        print('{:<10} enable_chimera min {:8.1f} ms mean {:8.1f} ms | '
+              'launch min {:8.1f} ms mean {:8.1f} ms'.format(
+              profile, min(inits), sum(inits) / len(inits),
+              min(totals), sum(totals) / len(totals)))
+
+
+if __name__ == '__main__':
+    main()
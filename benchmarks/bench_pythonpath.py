@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare an import-heavy child interpreter using the raw and the pruned
+PYTHONPATH. If ``strace`` is available, the number of filesystem probes
+(stat/open calls) is reported too.
+
+Usage: python bench_pythonpath.py [-n REPEATS]
+"""
+
+from __future__ import print_function
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import timeit
+
+from pychimera import platforms
+from pychimera.core import guess_chimera_path
+
+IMPORTS = ('import json, decimal, email.mime.text, xml.dom.minidom, logging.handlers, '
+           'unittest, pydoc, distutils.core, multiprocessing, sqlite3, ctypes')
+PROBES = re.compile(r'^\s*[\d.]+\s+[\d.]+\s+\d+\s+(\d+)\s+(?:\d+\s+)?(\w*stat\w*|open\w*)$', re.M)
+
+
+def pythonpath(prune):
+    module = sys.modules[platforms._patch_paths.__module__]
+    build_search_path = module.build_search_path
+    module.build_search_path = lambda *a, **kw: build_search_path(*a, prune=prune, **kw)
+    environ = dict(os.environ)
+    try:
+        base = guess_chimera_path()[0]
+        removed = platforms.patch_environ_for_platform(base, os.path.join(base, 'lib'))
+        return os.environ['PYTHONPATH'], removed
+    finally:
+        module.build_search_path = build_search_path
+        os.environ.clear()
+        os.environ.update(environ)
+
+
+def count_probes(env):
+    with tempfile.NamedTemporaryFile() as log:
+        subprocess.check_call(['strace', '-f', '-c', '-o', log.name,
+                               sys.executable, '-c', IMPORTS], env=env)
+        return sum(int(calls) for calls, _ in PROBES.findall(open(log.name).read()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=10, dest='repeats')
+    args = parser.parse_args()
+    has_strace = not subprocess.call('command -v strace', shell=True,
+                                     stdout=open(os.devnull, 'w'))
+    for label, prune in (('raw', False), ('pruned', True)):
+        path, removed = pythonpath(prune)
+        env = dict(os.environ, PYTHONPATH=path)
+        times = timeit.repeat(lambda: subprocess.check_call([sys.executable, '-c', IMPORTS],
+                                                            env=env),
+                              number=1, repeat=args.repeats)
+        print('{:<7} {:3d} entries ({} removed)  min {:7.2f} ms  mean {:7.2f} ms{}'.format(
+              label, len(path.split(os.pathsep)), removed, 1000 * min(times),
+              1000 * sum(times) / len(times),
+              '  {} fs probes'.format(count_probes(env)) if has_strace else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare calls per second through a pychimera serve socket, one by one and
+pipelined, with a pychimera -c subprocess per call. Runs on Python 3 too.
+
+Usage: python bench_rpc.py [-n CALLS] [-s SUBPROCESS_CALLS]
+"""
+
+from __future__ import division, print_function
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from pychimera.client import ChimeraClient
+
+COMMAND = 'import chimera; chimera.openModels.list()'
+
+
+def rate(label, calls, func):
+    t0 = time.time()
+    func()
+    print('{:<12} {:10.1f} calls/s'.format(label, calls / (time.time() - t0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=5000, dest='calls')
+    parser.add_argument('-s', type=int, default=5, dest='subprocess_calls')
+    args = parser.parse_args()
+
+    rate('subprocess', args.subprocess_calls,
+         lambda: [subprocess.check_call(['pychimera', '-c', COMMAND])
+                  for _ in range(args.subprocess_calls)])
+
+    socket = os.path.join(tempfile.mkdtemp(), 'rpc.sock')
+    server = subprocess.Popen(['pychimera', 'serve', '--socket', socket])
+    try:
+        while not os.path.exists(socket):
+            time.sleep(0.05)
+        with ChimeraClient(socket) as client:
+            rate('rpc', args.calls, lambda: [client.list_models() for _ in range(args.calls)])
+            rate('pipelined', args.calls,
+                 lambda: client.call_many([('list_models', {})] * args.calls))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
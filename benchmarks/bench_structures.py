@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare opening structures by parsing them with chimera.openModels.open
+and rebuilding them from the binary structure cache.
+
+Usage: pychimera bench_structures.py STRUCTURE [STRUCTURE ...] [-n REPEATS]
+"""
+
+from __future__ import division, print_function
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import chimera
+import numpy as np
+from pychimera.structures import open_structure
+
+
+def timed(opener, paths, repeats):
+    t0 = time.time()
+    for _ in range(repeats):
+        for path in paths:
+            chimera.openModels.close(opener(path))
+    return (time.time() - t0) / (repeats * len(paths))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('structures', nargs='+')
+    parser.add_argument('-n', type=int, default=5, dest='repeats')
+    args = parser.parse_args()
+    cache = tempfile.mkdtemp()
+    try:
+        cold = timed(lambda p: open_structure(p, cache=cache), args.structures, 1)
+        parsed = timed(chimera.openModels.open, args.structures, args.repeats)
+        cached = timed(lambda p: open_structure(p, cache=cache), args.structures, args.repeats)
+        markers = 0
+        for name in os.listdir(cache):
+            with np.load(os.path.join(cache, name)) as data:
+                markers += int(data['models']) < 0
+    finally:
+        shutil.rmtree(cache)
+    print('text parsing       {:8.1f} ms/file'.format(parsed * 1000))
+    print('first open + store {:8.1f} ms/file'.format(cold * 1000))
+    print('cached             {:8.1f} ms/file  ({:.1f}x)'.format(cached * 1000, parsed / cached))
+    print('{} of {} files parse faster than they are rebuilt'.format(markers,
+                                                                     len(args.structures)))
+
+
+if __name__ == '__main__':
+    main()
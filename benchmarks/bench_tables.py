@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare a per-atom loop over chimera.Atom attributes with atom_table, for
+the same analysis: the CA atoms within 10 A of the centroid, by chain.
+
+Usage: pychimera bench_tables.py STRUCTURE [-n REPEATS]
+"""
+
+from __future__ import division, print_function
+import argparse
+import time
+
+import chimera
+from pychimera.tables import atom_table
+
+
+def with_loop(molecule):
+    atoms = [a for a in molecule.atoms if a.name == 'CA']
+    coords = [a.coord() for a in atoms]
+    n = len(coords)
+    center = chimera.Point(sum(c.x for c in coords) / n, sum(c.y for c in coords) / n,
+                           sum(c.z for c in coords) / n)
+    found = {}
+    for atom, coord in zip(atoms, coords):
+        if coord.sqdistance(center) < 100.0:
+            chain = atom.residue.id.chainId
+            found[chain] = found.get(chain, 0) + 1
+    return found
+
+
+def with_table(molecule):
+    import numpy as np
+    table = atom_table(molecule)
+    ca = table.names == 'CA'
+    coords = table.coords[ca]
+    close = ((coords - coords.mean(axis=0)) ** 2).sum(axis=1) < 100.0
+    counts = np.bincount(table.chains[ca][close], minlength=len(table.chain_ids))
+    return dict((c, int(n)) for (c, n) in zip(table.chain_ids, counts) if n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('structure')
+    parser.add_argument('-n', type=int, default=5, dest='repeats')
+    args = parser.parse_args()
+    molecule = chimera.openModels.open(args.structure)[0]
+    print(molecule.numAtoms, 'atoms')
+    for name, analysis in (('per-atom loop', with_loop), ('atom_table', with_table)):
+        t0 = time.time()
+        for _ in range(args.repeats):
+            result = analysis(molecule)
+        print('{:<14} {:8.3f} s/run  {}'.format(name, (time.time() - t0) / args.repeats,
+                                               sorted(result.items())))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare pool throughput on BLAS-heavy tasks with unlimited BLAS threads
+(one per core in every worker) and with the per-worker thread policy.
+
+Usage: pychimera bench_threads.py [-n TASKS] [-p PROCESSES] [-s SIZE]
+"""
+
+from __future__ import division, print_function
+import argparse
+import os
+import time
+
+from pychimera.pool import ChimeraPool
+from pychimera.threads import THREAD_VARIABLES
+
+
+def task(size):
+    import numpy
+    a = numpy.random.rand(size, size)
+    for _ in range(4):
+        a = numpy.dot(a, a)
+        a /= numpy.abs(a).max()
+    return float(a.sum())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=200, dest='tasks')
+    parser.add_argument('-p', type=int, default=None, dest='processes')
+    parser.add_argument('-s', type=int, default=400, dest='size')
+    args = parser.parse_args()
+    for name in THREAD_VARIABLES:
+        os.environ.pop(name, None)
+
+    for label, options in (('unlimited', {'threads': None}),
+                           ('auto', {'threads': 'auto'}),
+                           ('auto, pinned', {'threads': 'auto', 'pin': True})):
+        with ChimeraPool(max_workers=args.processes, init_profile='minimal',
+                         **options) as pool:
+            pool.submit(task, 8).result()  # wait for the workers
+            t0 = time.time()
+            list(pool.map(task, [args.size] * args.tasks))
+            elapsed = time.time() - t0
+        print('{:<14} {:8.1f} tasks/s'.format(label, args.tasks / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compare per-job latency of regular launches and zygote launches.
+
+Usage: python bench_zygote.py [-n REPEATS]
+"""
+
+from __future__ import division, print_function
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+import timeit
+
+JOB = ['pychimera', '-c', 'import chimera']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=10, dest='repeats')
+    args = parser.parse_args()
+    socket = os.path.join(tempfile.mkdtemp(), 'zygote.sock')
+    server = subprocess.Popen(['pychimera', '--zygote', socket])
+    try:
+        while not os.path.exists(socket):
+            time.sleep(0.05)
+        with open(os.devnull, 'r+') as devnull:
+            for name, env in (('regular', dict(os.environ)),
+                              ('zygote', dict(os.environ, PYCHIMERA_ZYGOTE=socket))):
+                times = timeit.repeat(lambda: subprocess.check_call(JOB, env=env, stdin=devnull),
+                                      number=1, repeat=args.repeats)
+                print('{:<10} min {:8.1f} ms mean {:8.1f} ms'.format(
+                      name, 1e3 * min(times), 1e3 * sum(times) / len(times)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
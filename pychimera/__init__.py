@@ -1,8 +1,76 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from .core import main, patch_environ, enable_chimera, load_chimera, __version__
-from .jupyter_utils import chimera_view, enable_chimera_inline
+# Frozen by versioneer in built and installed packages; development
+# checkouts ask git
+from ._version import get_versions
+__version__ = get_versions()['version']
+del get_versions
+
+
+# Everything else is imported on demand to keep `import pychimera` fast, and
+# pychimera.client importable on any Python 3
+
+def main():
+    """
+    Run the pychimera CLI. See :func:`pychimera.core.main`.
+    """
+    from .core import main
+    return main()
+
+
+def patch_environ(nogui=True, env_file=None, verbose=False, threads=None):
+    """
+    Patch the environment so Chimera can start up. This restarts Python!
+    See :func:`pychimera.core.patch_environ`.
+    """
+    from .core import patch_environ
+    return patch_environ(nogui=nogui, env_file=env_file, verbose=verbose, threads=threads)
+
+
+def enable_chimera(verbose=False, nogui=True, profile='default', extension_cache=False,
+                   import_cache=False, bytecode_cache=None):
+    """
+    Initialize Chimera, once. See :func:`pychimera.core.enable_chimera`.
+    """
+    from .core import enable_chimera
+    return enable_chimera(verbose=verbose, nogui=nogui, profile=profile,
+                          extension_cache=extension_cache, import_cache=import_cache,
+                          bytecode_cache=bytecode_cache)
+
+load_chimera = enable_chimera
+
+
+def enable_chimera_inline():
+    """
+    Enable IPython magic commands to run some Chimera actions.
+    See :func:`pychimera.jupyter_utils.enable_chimera_inline`.
+    """
+    from .jupyter_utils import enable_chimera_inline
+    return enable_chimera_inline()
+
+
+def chimera_view(*molecules):
+    """
+    Depicts the requested molecules with NGLViewer in a Python notebook.
+    See :func:`pychimera.jupyter_utils.chimera_view`.
+    """
+    from .jupyter_utils import chimera_view
+    return chimera_view(*molecules)
+
+
+def fork_map(func, items, processes=None, ordered=True, chunksize=1,
+             max_tasks_per_worker=None, max_rss_mb=None, timeout=None, stack_log=None,
+             threads='auto', pin=False):
+    """
+    Apply `func` to `items` in forked workers sharing this process' data.
+    See :func:`pychimera.pool.fork_map`.
+    """
+    from .pool import fork_map
+    return fork_map(func, items, processes=processes, ordered=ordered, chunksize=chunksize,
+                    max_tasks_per_worker=max_tasks_per_worker, max_rss_mb=max_rss_mb,
+                    timeout=timeout, stack_log=stack_log, threads=threads, pin=pin)
+
 
 __author__ = "Jaime Rodríguez-Guerra"
 
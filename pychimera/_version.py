@@ -13,7 +13,6 @@
 import errno
 import os
 import re
-import subprocess
 import sys
 
 
@@ -70,6 +69,7 @@ def register_vcs_handler(vcs, method):  # decorator
 def run_command(commands, args, cwd=None, verbose=False, hide_stderr=False,
                 env=None):
     """Call the given command(s)."""
+    import subprocess  # only development checkouts need it
     assert isinstance(commands, list)
     p = None
     for c in commands:
@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Batch script runner
+
+Run many scripts in a single interpreter, after a single ``enable_chimera``.
+Each script runs as ``__main__`` with its own ``sys.argv`` and its
+directory first in ``sys.path``, like ``python script.py`` would. After
+each one, the Chimera session is reset: open models are closed, the trigger
+handlers the script added are removed and the modules it imported from its
+own directory are forgotten, so the next script starts from a clean state.
+Handlers added by Chimera modules the script happens to import first are
+kept, since those modules stay loaded. ``KeyboardInterrupt`` stops the batch.
+"""
+
+from __future__ import print_function, division
+from contextlib import contextmanager
+import os
+import shlex
+import sys
+import time
+import traceback
+
+from .extensions import _patched
+
+
+def read_batch_file(path):
+    """
+    Parse a batch file: one script per line, followed by its arguments
+    (quoted like in a shell). Empty lines and lines starting with ``#`` are
+    skipped. Relative script paths are resolved from the batch file directory.
+
+    Returns
+    -------
+    jobs : list of (str, list of str)
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    jobs = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            words = shlex.split(line)
+            jobs.append((os.path.join(base, os.path.expanduser(words[0])), words[1:]))
+    return jobs
+
+
+def run_batch(jobs, verbose=False):
+    """
+    Run each script in `jobs`, resetting the Chimera session in between,
+    and report its exit status and wall time to stderr.
+
+    Parameters
+    ----------
+    jobs : list of (str, list of str)
+        Script paths and their arguments.
+    verbose : bool, optional, default=False
+        Report the scripts as they start.
+
+    Returns
+    -------
+    results : list of dict
+        ``script``, ``args``, ``status`` (the exit code) and ``seconds`` of
+        each script that ran.
+    """
+    results = []
+    start = time.time()
+    for script, args in jobs:
+        if verbose:
+            print('Running', script, *args, file=sys.stderr)
+        t0 = time.time()
+        status = run_script(script, args)
+        elapsed = time.time() - t0
+        results.append({'script': script, 'args': args, 'status': status, 'seconds': elapsed})
+        _report(script, args, status, elapsed)
+    failed = sum(1 for r in results if r['status'])
+    print('{} scripts run in {:.3f} s, {} failed'.format(len(results), time.time() - start,
+          failed), file=sys.stderr)
+    return results
+
+
+def run_script(script, args=()):
+    """
+    Run `script` as ``__main__`` with `args`, then reset the Chimera session.
+
+    Returns
+    -------
+    status : int
+        Exit code, as the interpreter would report it.
+    """
+    import runpy
+    directory = os.path.dirname(os.path.abspath(script))
+    saved = sys.argv, list(sys.path), os.getcwd(), set(sys.modules)
+    sys.argv = [script] + list(args)
+    sys.path.insert(0, directory)
+    try:
+        with _recorded_triggers(directory) as handlers:
+            try:
+                runpy.run_path(script, run_name='__main__')
+                status = 0
+            except SystemExit as e:
+                status = _exit_status(e.code)
+            except KeyboardInterrupt:  # stop the whole batch
+                raise
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+    finally:
+        sys.argv, sys.path[:], cwd, modules = saved
+        os.chdir(cwd)
+        _forget_modules(directory, modules)
+    reset_session(handlers)
+    return status
+
+
+def reset_session(handlers=()):
+    """
+    Close all models and remove the given trigger `handlers`.
+
+    Parameters
+    ----------
+    handlers : list of (str, handler)
+        Trigger names and handlers added to ``chimera.triggers``.
+    """
+    import chimera
+    for name, handler in handlers:
+        try:
+            chimera.triggers.deleteHandler(name, handler)
+        except (KeyError, ValueError):  # already removed by the script
+            pass
+    if hasattr(chimera, 'closeSession'):
+        chimera.closeSession()
+    else:
+        chimera.openModels.close(chimera.openModels.list())
+
+
+#---------------------------------------------------------------
+# Helpers
+#---------------------------------------------------------------
+
+@contextmanager
+def _recorded_triggers(directory):
+    """
+    Record the handlers added to ``chimera.triggers`` while active, if
+    their function was defined in `directory` (or below).
+    """
+    import chimera
+    handlers = []
+    triggers = chimera.triggers
+    add_handler = triggers.addHandler
+
+    def recording_add_handler(name, func, *args, **kwargs):
+        handler = add_handler(name, func, *args, **kwargs)
+        if _defined_in(func, directory):
+            handlers.append((name, handler))
+        return handler
+
+    with _patched(triggers, 'addHandler', recording_add_handler):
+        yield handlers
+
+
+def _defined_in(func, directory):
+    code = getattr(getattr(func, '__func__', func), '__code__', None)
+    return code is not None and _is_below(code.co_filename, directory)
+
+
+def _is_below(filename, directory):
+    return os.path.abspath(filename).startswith(os.path.join(directory, ''))
+
+
+def _forget_modules(directory, before):
+    """
+    Remove the modules imported from `directory` (or below) that were not
+    loaded `before`, so the next script imports its own version.
+    """
+    for name in set(sys.modules) - before:
+        filename = getattr(sys.modules[name], '__file__', None)
+        if filename and _is_below(filename, directory):
+            del sys.modules[name]
+
+
+def _report(script, args, status, seconds):
+    print('{:>8} {:9.3f} s  {}'.format('ok' if not status else 'exit {}'.format(status),
+          seconds, ' '.join([script] + list(args))), file=sys.stderr)
+
+
+def _exit_status(code):
+    """
+    Exit code for a ``SystemExit`` argument, printing it if it is a message.
+    """
+    if code is None or isinstance(code, int):
+        return code or 0
+    print(code, file=sys.stderr)
+    return 1
@@ -0,0 +1,265 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+User-writable bytecode cache
+
+Shared Chimera installations are often read-only for the users running
+jobs, so stale or missing ``.pyc`` files next to the sources are
+recompiled by every process. ``pychimera --precompile`` compiles the whole
+Chimera Python tree into a per-user cache directory (or a per-site one, set
+with ``PYCHIMERA_BYTECODE_DIR``), mirroring the source paths. When that
+cache is present, :class:`BytecodeFinder` (or
+:class:`pychimera.importcache.CachedPathFinder`, if the import cache is
+enabled too) loads source modules from it whenever the ``.pyc`` next to the
+source is not usable, and stores any newly compiled code there.
+"""
+
+from __future__ import print_function
+import errno
+import hashlib
+import imp
+import marshal
+import os
+import struct
+import sys
+
+from .cache import cache_dir, dump_json
+
+_MAGIC = imp.get_magic()
+
+
+def bytecode_dir():
+    """
+    Root of the bytecode cache for the running interpreter.
+    """
+    tag = 'python{}.{}'.format(*sys.version_info[:2])
+    if not os.environ.get('PYCHIMERA_BYTECODE_DIR'):
+        return cache_dir('bytecode', tag)
+    path = os.path.join(os.path.expanduser(os.environ['PYCHIMERA_BYTECODE_DIR']), tag)
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST and not os.path.isdir(path):
+            raise
+    return path
+
+
+def cached_bytecode_path(source):
+    """
+    Location of the cached bytecode for `source`, mirroring its absolute path.
+    """
+    drive, path = os.path.splitdrive(os.path.abspath(source))
+    parts = [drive.strip(':\\/')] if drive else []
+    return os.path.join(bytecode_dir(), *(parts + path.lstrip(os.sep).split(os.sep))) + 'c'
+
+
+def is_precompiled(root):
+    """
+    Whether ``pychimera --precompile`` has been run for the Chimera at `root`.
+    """
+    return os.path.isfile(_marker_path(root))
+
+
+def precompile(root, verbose=False):
+    """
+    Compile every Python source in the Chimera installation at `root`
+    into the bytecode cache, skipping the ones whose ``.pyc`` next to the
+    source or in the cache is already up to date.
+
+    Returns
+    -------
+    compiled, skipped, failed : int
+    """
+    compiled = skipped = failed = 0
+    for tree in _python_trees(root):
+        for dirpath, dirnames, filenames in os.walk(tree):
+            for filename in filenames:
+                if not filename.endswith('.py'):
+                    continue
+                source = os.path.join(dirpath, filename)
+                try:
+                    mtime = _source_mtime(source)
+                    if (_read_bytecode(source + 'c', mtime) is not None or
+                            _read_bytecode(cached_bytecode_path(source), mtime) is not None):
+                        skipped += 1
+                        continue
+                    _write_bytecode(source, _compile(source), mtime)
+                except (SyntaxError, TypeError, ValueError, IOError, OSError) as e:
+                    failed += 1
+                    if verbose:
+                        print('Could not compile {}: {}'.format(source, e), file=sys.stderr)
+                else:
+                    compiled += 1
+    dump_json(_marker_path(root), {'root': root, 'trees': _python_trees(root)})
+    return compiled, skipped, failed
+
+
+def load_source_module(fullname, pathname):
+    """
+    Import the source module at `pathname` using the bytecode cache when
+    the ``.pyc`` next to it is not usable.
+    """
+    module = imp.new_module(fullname)
+    module.__file__ = pathname
+    sys.modules[fullname] = module
+    try:
+        exec(_load_code(pathname), module.__dict__)
+    except BaseException:
+        del sys.modules[fullname]
+        raise
+    return sys.modules[fullname]
+
+
+def load_package(fullname, pathname):
+    """
+    Import the package directory at `pathname`, loading its ``__init__.py``
+    through the bytecode cache.
+    """
+    init = os.path.join(pathname, '__init__.py')
+    if not os.path.isfile(init):  # compiled-only or extension package
+        return imp.load_module(fullname, None, pathname, ('', '', imp.PKG_DIRECTORY))
+    module = imp.new_module(fullname)
+    module.__file__ = init
+    module.__path__ = [pathname]
+    module.__package__ = fullname
+    sys.modules[fullname] = module
+    try:
+        exec(_load_code(init), module.__dict__)
+    except BaseException:
+        del sys.modules[fullname]
+        raise
+    return sys.modules[fullname]
+
+
+def install_bytecode_finder():
+    """
+    Install a :class:`BytecodeFinder` at the front of ``sys.meta_path``, once.
+    """
+    for finder in sys.meta_path:
+        if isinstance(finder, BytecodeFinder):
+            return finder
+    finder = BytecodeFinder()
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+class BytecodeFinder(object):
+
+    """
+    PEP 302 finder that resolves imports like the standard machinery, probing
+    each ``sys.path`` directory, and loads source modules and packages
+    through the bytecode cache. Zip files, eggs and any other
+    ``sys.path_hooks`` importer are left to the standard machinery.
+    """
+
+    def __init__(self):
+        self._found = {}
+
+    def find_module(self, fullname, path=None):
+        name = fullname.rpartition('.')[2]
+        if path is None:
+            if imp.is_builtin(name) or imp.is_frozen(name):
+                return None
+            path = sys.path
+        for directory in path:
+            importer = sys.path_importer_cache.get(directory)
+            if importer is not None and not isinstance(importer, imp.NullImporter):
+                return None
+            if not os.path.isdir(directory or os.curdir):
+                if os.path.exists(directory):  # a zip or egg, not seen yet
+                    return None
+                continue
+            try:
+                f, pathname, description = imp.find_module(name, [directory])
+            except ImportError:
+                continue
+            if f is not None:
+                f.close()
+            if description[2] not in (imp.PY_SOURCE, imp.PKG_DIRECTORY):
+                return None
+            self._found[fullname] = pathname, description[2]
+            return self
+
+    def load_module(self, fullname):
+        if fullname in sys.modules:
+            return sys.modules[fullname]
+        pathname, kind = self._found.pop(fullname)
+        if kind == imp.PKG_DIRECTORY:
+            return load_package(fullname, pathname)
+        return load_source_module(fullname, pathname)
+
+
+#---------------------------------------------------------------
+# Helpers
+#---------------------------------------------------------------
+
+def _load_code(source):
+    mtime = _source_mtime(source)
+    for bytecode in (source + 'c', cached_bytecode_path(source)):
+        code = _read_bytecode(bytecode, mtime)
+        if code is not None:
+            return code
+    code = _compile(source)
+    try:
+        _write_bytecode(source, code, mtime)
+    except (IOError, OSError):
+        pass
+    return code
+
+
+def _read_bytecode(path, source_mtime):
+    """
+    Code object stored in `path`, if it matches this interpreter and the
+    source modification time. None otherwise.
+    """
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(8)
+            if len(header) < 8 or header[:4] != _MAGIC:
+                return None
+            if struct.unpack('<I', header[4:8])[0] != source_mtime:
+                return None
+            return marshal.load(f)
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def _write_bytecode(source, code, source_mtime):
+    path = cached_bytecode_path(source)
+    try:
+        os.makedirs(os.path.dirname(path))
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    tmp = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp, 'wb') as f:
+        f.write(_MAGIC + struct.pack('<I', source_mtime))
+        marshal.dump(code, f)
+    if os.name == 'nt' and os.path.exists(path):
+        os.remove(path)
+    os.rename(tmp, path)
+
+
+def _compile(source):
+    with open(source, 'rU') as f:
+        text = f.read()
+    if not text.endswith('\n'):
+        text += '\n'
+    return compile(text, source, 'exec', dont_inherit=True)
+
+
+def _source_mtime(source):
+    return int(os.stat(source).st_mtime) & 0xFFFFFFFF
+
+
+def _python_trees(root):
+    trees = [os.path.join(root, 'share'),
+             os.path.join(root, 'lib', 'python2.7'),
+             os.path.join(root, 'bin', 'lib')]
+    return [t for t in trees if os.path.isdir(t)]
+
+
+def _marker_path(root):
+    digest = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(bytecode_dir(), digest + '.json')
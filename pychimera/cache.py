@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+On-disk caches shared by PyChimera launches
+"""
+
+import errno
+import json
+import os
+
+from .platforms import PYCHIMERA_CACHE
+
+
+def cache_dir(*subdirs):
+    """
+    Return (and create, if needed) a directory inside the PyChimera cache.
+
+    The cache root defaults to the platform location but can be overridden
+    with the ``PYCHIMERA_CACHE_DIR`` environment variable.
+
+    Parameters
+    ----------
+    subdirs : tuple of str
+        Path components appended to the cache root.
+
+    Returns
+    -------
+    path : str
+    """
+    root = os.environ.get('PYCHIMERA_CACHE_DIR') or PYCHIMERA_CACHE
+    path = os.path.join(os.path.expanduser(root), *subdirs)
+    try:
+        os.makedirs(path)
+    except OSError as e:
+        if e.errno != errno.EEXIST:
+            raise
+    return path
+
+
+def load_json(path, default=None):
+    """
+    Read a JSON file, returning `default` if it is missing or corrupt.
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return default
+
+
+def dump_json(path, data):
+    """
+    Atomically write `data` as JSON to `path`, so concurrent launches
+    never see a half-written file.
+    """
+    import tempfile
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.tmp-', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        if os.name == 'nt' and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def stat_mtime(path):
+    """
+    Modification time of `path`, or None if it cannot be stat'ed.
+    """
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
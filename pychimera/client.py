@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Client for ``pychimera serve``
+
+Only needs the standard library and runs on Python 2.7 and 3, so Python 3
+pipelines can drive Chimera without patching their own interpreter::
+
+    from pychimera.client import ChimeraClient
+
+    with ChimeraClient('/tmp/chimera.sock') as chimera:
+        model = chimera.open('1abc.pdb')[0]
+        chimera.run_command('addh ' + model['spec'])
+        atoms = chimera.query_atoms(model['spec'], fields=['name', 'coord'])
+
+Each client holds a connection, and so a Chimera session, of its own.
+"""
+
+from __future__ import print_function
+from collections import deque
+import itertools
+import json
+import socket
+
+# Requests sent ahead of the responses read, so neither side blocks on a full socket
+_WINDOW = 64
+
+
+class RemoteError(Exception):
+
+    """
+    A request failed in the server. ``code`` is the JSON-RPC error code and
+    ``remote_traceback`` the server traceback, if any.
+    """
+
+    def __init__(self, message, code=None, remote_traceback=None):
+        super(RemoteError, self).__init__(message)
+        self.code = code
+        self.remote_traceback = remote_traceback
+
+
+class ChimeraClient(object):
+
+    """
+    Connection to a ``pychimera serve`` socket.
+
+    Parameters
+    ----------
+    path : str
+        Socket of the server.
+    timeout : float, optional
+        Seconds to wait for each response.
+    """
+
+    def __init__(self, path, timeout=None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(timeout)
+        self._socket.connect(path)
+        self._stream = self._socket.makefile('rwb')
+        self._ids = itertools.count()
+
+    def call(self, method, **params):
+        """
+        Run `method` in the server with `params` and return its result.
+        """
+        return self.call_many([(method, params)])[0]
+
+    def call_many(self, calls):
+        """
+        Send `calls` without waiting for each response (pipelined), and
+        return their results.
+
+        Parameters
+        ----------
+        calls : iterable of (str, dict)
+            Method names and their parameters.
+
+        Returns
+        -------
+        results : list
+            In the order of `calls`. If any call failed, its
+            :class:`RemoteError` is raised after reading all the responses.
+        """
+        ids, waiting, responses = [], deque(), {}
+        for method, params in calls:
+            if len(waiting) >= _WINDOW:
+                self._stream.flush()
+                waiting.popleft()
+                response = self._receive()
+                responses[response['id']] = response
+            request_id = next(self._ids)
+            ids.append(request_id)
+            waiting.append(request_id)
+            self._send({'jsonrpc': '2.0', 'id': request_id, 'method': method,
+                        'params': params or {}})
+        self._stream.flush()
+        for _ in waiting:
+            response = self._receive()
+            responses[response['id']] = response
+        results = []
+        for request_id in ids:
+            response = responses.get(request_id)
+            if response is None:
+                raise RemoteError('No response for request {}'.format(request_id))
+            if 'error' in response:
+                error = response['error']
+                raise RemoteError(error.get('message'), error.get('code'), error.get('data'))
+            results.append(response.get('result'))
+        return results
+
+    def close(self):
+        self._stream.close()
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    #---------------------------------------------------------------
+    # Methods of the server
+    #---------------------------------------------------------------
+
+    def run_command(self, command):
+        """
+        Run a Chimera command, as typed in its command line.
+        """
+        return self.call('run_command', command=command)
+
+    def open(self, path, format=None):
+        """
+        Open `path` in the server and return the opened models as dicts
+        (``spec``, ``name``, ``type``, ``atoms``).
+        """
+        return self.call('open', path=path, format=format)
+
+    def save(self, path, models=None, format=None):
+        """
+        Save `models` (specs like ``'#0'``; all by default) to `path`,
+        which must be reachable by the server.
+        """
+        return self.call('save', path=path, models=models, format=format)
+
+    def close_models(self, models=None):
+        """
+        Close `models` (specs; all by default) and return how many.
+        """
+        return self.call('close', models=models)
+
+    def list_models(self):
+        return self.call('list_models')
+
+    def query_atoms(self, spec='#', fields=None):
+        """
+        Attributes of the atoms matching `spec`, as a dict of columns. See
+        :func:`pychimera.rpc.query_atoms` for the available `fields`.
+        """
+        params = {'spec': spec}
+        if fields is not None:
+            params['fields'] = list(fields)
+        return self.call('query_atoms', **params)
+
+    def export_coordinates(self, model, elements=False, residues=False, shared=None):
+        """
+        Copy the coordinates of `model` (a spec) to shared memory in the
+        server host, and return their buffers as NumPy arrays mapped
+        without copying. See :mod:`pychimera.sharedmem`.
+
+        Parameters
+        ----------
+        model : str
+        elements, residues : bool, optional
+            Export the element number and residue index of each atom too.
+        shared : dict, optional
+            ``arrays.shared`` of a previous export of the same model, to
+            update those arrays in place instead.
+
+        Returns
+        -------
+        arrays : dict of numpy.memmap
+            ``coords`` and, optionally, ``elements`` and ``residues``. Their
+            paths are in the ``shared`` key; remove them with
+            :func:`pychimera.sharedmem.release` when done.
+        """
+        from .sharedmem import attach
+        shared = self.call('export_coordinates', model=model, elements=elements,
+                           residues=residues, shared=shared)
+        arrays = attach(shared)
+        arrays['shared'] = shared
+        return arrays
+
+    #---------------------------------------------------------------
+    # Protocol
+    #---------------------------------------------------------------
+
+    def _send(self, message):
+        self._stream.write(json.dumps(message).encode('utf-8') + b'\n')
+
+    def _receive(self):
+        line = self._stream.readline()
+        if not line:
+            raise RemoteError('Connection closed by the server')
+        response = json.loads(line.decode('utf-8'))
+        if isinstance(response, list) or response.get('id') is None:
+            error = response.get('error', {}) if isinstance(response, dict) else {}
+            raise RemoteError(error.get('message', 'Unexpected response'), error.get('code'))
+        return response
@@ -10,23 +10,14 @@ Use UCSF Chimera Python API in a standard Python 2.7 interpreter.
 """
 
 from __future__ import division, print_function
-from distutils.spawn import find_executable
-from operator import itemgetter
-from glob import glob
-import argparse
+from contextlib import contextmanager
 import os
 import platform
 import re
-import runpy
-import subprocess
 import sys
 
+from . import __version__, profiling
 from .platforms import *
-from .jupyter_utils import launch_ipython, launch_notebook, in_ipython
-
-from ._version import get_versions
-__version__ = get_versions()['version']
-del get_versions
 
 
 #---------------------------------------------------------------
@@ -34,7 +25,23 @@ del get_versions
 #---------------------------------------------------------------
 
 
-def enable_chimera(verbose=False, nogui=True):
+# Whether Chimera has been initialized in this process. Child processes inherit
+# the environment, so an env var can't tell (unless they are forked).
+_enabled = False
+
+# Extra chimeraInit.init keyword arguments for each init profile. Only the
+# ones accepted by the installed Chimera version are passed.
+INIT_PROFILES = {
+    'default': {},
+    'minimal': {'preferences': False, 'notools': True, 'fileHistory': False},
+}
+# Profiles that skip the null `--script` run Chimera does after initializing
+_NO_SCRIPT_PROFILES = ('minimal',)
+
+
+@profiling.phase('enable_chimera')
+def enable_chimera(verbose=False, nogui=True, profile='default', extension_cache=False,
+                   import_cache=False, bytecode_cache=None):
     """
     Bypass script loading and initialize Chimera correctly, once
     the env has been properly patched.
@@ -45,11 +52,47 @@ def enable_chimera(verbose=False, nogui=True):
         If True, let Chimera speak freely. It can be _very_ verbose.
     nogui : bool, optional, default=True
         Don't start the GUI.
+    profile : {'default', 'minimal'}, optional, default='default'
+        Initialization profile. ``minimal`` skips the work a headless batch
+        job does not need (Tk/Tix patches, preferences, tools, file history
+        and the null script run). Only available with ``nogui=True``.
+    extension_cache : bool, optional, default=False
+        Record the extensions Chimera registers on startup and replay them
+        on later starts instead of importing every ``ChimeraExtension.py``.
+        See :mod:`pychimera.extensions`.
+    import_cache : bool, optional, default=False
+        Resolve imports from cached directory listings instead of probing
+        every ``sys.path`` entry. See :mod:`pychimera.importcache`.
+    bytecode_cache : bool, optional
+        Load modules from the user-writable bytecode cache when the ``.pyc``
+        files next to the sources are missing or stale. By default, it is
+        used if ``pychimera --precompile`` has been run for this Chimera.
+        See :mod:`pychimera.bytecode`.
     """
-    if os.getenv('CHIMERA_ENABLED'):
+    if profile not in INIT_PROFILES:
+        raise ValueError('Unknown init profile {}. Choose one of: {}'.format(
+                         profile, ', '.join(sorted(INIT_PROFILES))))
+    if profile != 'default' and not nogui:
+        raise ValueError('Init profile {} is only available with nogui=True'.format(profile))
+    global _enabled
+    if _enabled:
         return
-    import chimera
-    _pre_gui_patches()
+    from .bytecode import install_bytecode_finder, is_precompiled
+    from .extensions import extension_manifest
+    from .importcache import install_import_cache
+    if os.environ.get('PYCHIMERA_IMPORT_PROFILE'):
+        from . import importprofile
+        importprofile.start()
+    if bytecode_cache is None:
+        bytecode_cache = 'CHIMERA' in os.environ and is_precompiled(os.environ['CHIMERA'])
+    if import_cache:
+        install_import_cache(bytecode=bytecode_cache)
+    elif bytecode_cache:
+        install_bytecode_finder()
+    with profiling.phase('import chimera'):
+        import chimera
+    if profile == 'default':
+        _pre_gui_patches()
     if not nogui:
         chimera.registerPostGraphicsFunc(_post_gui_patches)
     try:
@@ -58,16 +101,56 @@ def enable_chimera(verbose=False, nogui=True):
             chimera.replyobj.status('initializing pychimera')
     except ImportError as e:
         sys.exit(str(e) + "\nERROR: Chimera could not be loaded!")
-    chimeraInit.init(['', '--script', NULL] + (sys.argv[1:] if not nogui else []),
-                     debug=verbose, silent=not verbose, nostatus=not verbose,
-                     nogui=nogui, eventloop=not nogui, exitonquit=not nogui,
-                     title=chimera.title+' (PyChimera)')
-    os.environ['CHIMERA_ENABLED'] = '1'
+    kwargs = dict(debug=verbose, silent=not verbose, nostatus=not verbose,
+                  nogui=nogui, eventloop=not nogui, exitonquit=not nogui,
+                  title=chimera.title+' (PyChimera)')
+    kwargs.update(_init_profile_kwargs(chimeraInit.init, profile))
+    if extension_cache:
+        manifest = extension_manifest(os.environ.get('CHIMERA', chimera.__path__[0]))
+    else:
+        manifest = _no_manifest()
+    with profiling.phase('chimeraInit.init'), manifest:
+        argv = [''] if profile in _NO_SCRIPT_PROFILES else ['', '--script', NULL]
+        chimeraInit.init(argv + (sys.argv[1:] if not nogui else []), **kwargs)
+    _enabled = True
+    os.environ['CHIMERA_ENABLED'] = '1'  # kept for backwards compatibility
 
 
 load_chimera = enable_chimera
 
 
+@contextmanager
+def _no_manifest():
+    yield
+
+
+def _init_profile_kwargs(init, profile):
+    """
+    Keyword arguments of `profile` the installed ``chimeraInit.init`` accepts,
+    warning if it accepts none of them.
+    """
+    kwargs = _supported_init_kwargs(init, INIT_PROFILES[profile])
+    if INIT_PROFILES[profile] and not kwargs:
+        print('WARNING: This Chimera version supports none of the options of the {} init '
+              'profile; only the PyChimera parts apply'.format(profile), file=sys.stderr)
+    return kwargs
+
+
+def _supported_init_kwargs(init, kwargs):
+    """
+    Keep only the keyword arguments the installed ``chimeraInit.init`` accepts.
+    """
+    import inspect
+    getargspec = getattr(inspect, 'getfullargspec', None) or inspect.getargspec
+    try:
+        spec = getargspec(init)
+    except TypeError:
+        return {}
+    if getattr(spec, 'varkw', None) or getattr(spec, 'keywords', None):
+        return dict(kwargs)
+    return dict((k, v) for (k, v) in kwargs.items() if k in spec.args)
+
+
 def _tix_default_root_fix():
     import Tix
     import Tkinter as tk
@@ -94,8 +177,8 @@ def _post_gui_patches():
 # Prevent complaints from standard interpreters when launched from Continuum builds
 platform._sys_version_parser = re.compile(
     r'([\w.+]+)\s*'
-    '(?:\|[^|]*\|)?\s*\(#?([^,]+),\s*([\w ]+),\s*'
-    '([\w :]+)\)\s*\[([^\]]+)\]?')
+    r'(?:\|[^|]*\|)?\s*\(#?([^,]+),\s*([\w ]+),\s*'
+    r'([\w :]+)\)\s*\[([^\]]+)\]?')
 
 def patch_sys_version():
     """ Remove Continuum copyright statement to avoid parsing errors in IDLE """
@@ -104,7 +187,7 @@ def patch_sys_version():
         sys.version = ' '.join([sys_version[0].strip(), sys_version[-1].strip()])
 
 
-def patch_environ(nogui=True):
+def patch_environ(nogui=True, env_file=None, verbose=False, threads=None):
     """
     Patch current environment variables so Chimera can start up and we can import its modules.
 
@@ -117,20 +200,44 @@ def patch_environ(nogui=True):
     nogui : bool, optional, default=False
         If the GUI is not going to be launched, try to locate a headless
         Chimera build to enable inline Chimera visualization.
+    env_file : str, optional
+        Path to an environment lockfile written by :func:`freeze_environ`. If
+        given (or set in the ``PYCHIMERA_ENV_FILE`` env var), Chimera discovery
+        and platform patches are skipped and the stored environment is used.
+    verbose : bool, optional, default=False
+        Report what has been patched.
+    threads : int, optional
+        Threads for the BLAS and OpenMP runtimes (``OMP_NUM_THREADS`` and
+        friends). By default, the environment is left alone.
     """
+    if threads is not None:
+        from .threads import limit_threads, thread_count
+        limit_threads(thread_count(int(threads)))
     if 'CHIMERA' in os.environ:
         return
 
-    paths = guess_chimera_path(search_all=nogui)
-    CHIMERA_BASE = paths[0]
-    if nogui:  # try finding a headless version
-        try:
-            CHIMERA_BASE = next(p for p in paths if 'headless' in p)
-        except StopIteration:
-            pass
+    env_file = env_file or os.environ.get('PYCHIMERA_ENV_FILE')
+    with profiling.phase('patch_environ'):
+        if env_file:
+            load_environ(env_file, nogui=nogui)
+        else:
+            _patch_environ(nogui=nogui, verbose=verbose)
 
-    if not os.path.isdir(CHIMERA_BASE):
-        sys.exit("Could not find UCSF Chimera.\n{}".format(_INSTRUCTIONS))
+    # Check interactive and IPython
+    from .jupyter_utils import in_ipython
+    if in_ipython() and hasattr(sys, 'ps1') and not sys.argv[0].endswith('ipython'):
+        sys.argv.insert(1, 'ipython')
+
+    profiling.before_restart()
+    os.execve(sys.executable, [sys.executable] + sys.argv, os.environ)
+
+
+def _patch_environ(nogui=True, verbose=False):
+    """
+    Apply all the Chimera-related changes to ``os.environ`` (and
+    ``sys.executable``, in some platforms) without restarting.
+    """
+    CHIMERA_BASE = _chimera_base(nogui=nogui)
     os.environ['CHIMERA'] = CHIMERA_BASE
     CHIMERA_LIB = os.path.join(CHIMERA_BASE, 'lib')
 
@@ -155,36 +262,146 @@ def patch_environ(nogui=True):
         os.environ['CHIMERA_PYTHONNOUSERSITE'] = os.environ['PYTHONNOUSERSITE']
     os.environ['PYTHONNOUSERSITE'] = '1'
 
-    # Check interactive and IPython
-    if in_ipython() and hasattr(sys, 'ps1') and not sys.argv[0].endswith('ipython'):
-        sys.argv.insert(1, 'ipython')
-
     # Platform-specific patches
-    patch_environ_for_platform(CHIMERA_BASE, CHIMERA_LIB, nogui=nogui)
-    os.execve(sys.executable, [sys.executable] + sys.argv, os.environ)
+    removed = patch_environ_for_platform(CHIMERA_BASE, CHIMERA_LIB, nogui=nogui)
+    if verbose:
+        print('Using UCSF Chimera at {}. Removed {} duplicated or missing PYTHONPATH '
+              'entries.'.format(CHIMERA_BASE, removed), file=sys.stderr)
+
+
+def _chimera_base(nogui=True):
+    """
+    Chimera installation to use, preferring headless builds in nogui mode.
+    """
+    with profiling.phase('guess_chimera_path'):
+        paths = guess_chimera_path(search_all=nogui)
+    CHIMERA_BASE = paths[0]
+    if nogui:  # try finding a headless version
+        try:
+            CHIMERA_BASE = next(p for p in paths if 'headless' in p)
+        except StopIteration:
+            pass
+
+    if not os.path.isdir(CHIMERA_BASE):
+        sys.exit("Could not find UCSF Chimera.\n{}".format(_INSTRUCTIONS))
+    return CHIMERA_BASE
+
+
+#---------------------------------------------------------------
+# Environment lockfiles
+#---------------------------------------------------------------
+
+ENV_FILE_FORMAT = 1
+
+
+def patched_environ(nogui=True):
+    """
+    Compute the environment :func:`patch_environ` would create, leaving
+    the current one untouched.
+
+    Returns
+    -------
+    changes : dict
+        ``executable`` is the interpreter to restart with, ``set`` maps the
+        added or modified variables to their values and ``unset`` lists the
+        removed ones.
+    """
+    original_environ, original_executable = dict(os.environ), sys.executable
+    try:
+        _patch_environ(nogui=nogui)
+        return {'executable': sys.executable,
+                'set': dict((k, v) for (k, v) in os.environ.items()
+                            if original_environ.get(k) != v),
+                'unset': sorted(k for k in original_environ if k not in os.environ)}
+    finally:
+        os.environ.clear()
+        os.environ.update(original_environ)
+        sys.executable = original_executable
+
+
+def freeze_environ(path, nogui=True):
+    """
+    Write the fully patched environment to a lockfile, so later launches
+    can skip Chimera discovery and platform patches altogether.
+
+    Parameters
+    ----------
+    path : str
+        Lockfile location.
+    nogui : bool, optional, default=True
+        Freeze the environment for headless (True) or GUI (False) launches.
+    """
+    from .cache import dump_json
+    changes = patched_environ(nogui=nogui)
+    changes.update(format=ENV_FILE_FORMAT, nogui=nogui, pychimera=__version__)
+    dump_json(path, changes)
 
 
-def guess_chimera_path(search_all=False):
+def load_environ(path, nogui=None):
+    """
+    Apply the environment stored in a lockfile written by :func:`freeze_environ`.
+
+    Parameters
+    ----------
+    path : str
+        Lockfile location.
+    nogui : bool, optional
+        If given, check the lockfile was frozen for the same mode.
+    """
+    from .cache import load_json
+    lock = load_json(path)
+    if not lock or lock.get('format') != ENV_FILE_FORMAT:
+        sys.exit("ERROR: {} is not a valid PyChimera environment file.".format(path))
+    if nogui is not None and lock['nogui'] != nogui:
+        sys.exit("ERROR: {} was frozen for {} mode. Run `pychimera --freeze-env` "
+                 "again.".format(path, 'nogui' if lock['nogui'] else 'GUI'))
+    if not os.path.isdir(lock['set'].get('CHIMERA', '')):
+        sys.exit("ERROR: Chimera installation in {} is gone. Run `pychimera --freeze-env` "
+                 "again.".format(path))
+    for key in lock['unset']:
+        os.environ.pop(key, None)
+    for key, value in lock['set'].items():
+        os.environ[str(key)] = value.encode('utf-8') if not isinstance(value, str) else value
+    sys.executable = str(lock['executable'])
+
+
+def guess_chimera_path(search_all=False, rescan=False):
     """
     Try to guess Chimera installation path.
 
+    Results are cached in an on-disk registry (see :mod:`pychimera.registry`),
+    so the system is only searched again when any of the involved directories
+    change.
+
     Parameters
     ----------
     search_all : bool, optional, default=False
         If no CHIMERADIR env var is set, collect all posible
         locations of Chimera installations.
+    rescan : bool, optional, default=False
+        Ignore the registry and search the system again, rebuilding it.
 
     Returns
     -------
     paths: list of str
         Alphabetically sorted list of possible Chimera locations
     """
-    paths = _search_chimera(CHIMERA_BINARY, CHIMERA_LOCATIONS, CHIMERA_PREFIX,
-                            search_all=search_all)
+    try:
+        return os.path.expanduser(os.environ['CHIMERADIR']),
+    except KeyError:
+        pass
+
+    from .registry import load_registry, scan_installations, registered_paths
+    headless = '{0[0]}{1}{0[1]}'.format(os.path.splitext(CHIMERA_BINARY), '-headless')
+    binaries = (CHIMERA_BINARY, headless)
+    registry = None
+    if not rescan:
+        registry = load_registry(binaries, CHIMERA_LOCATIONS, CHIMERA_PREFIX)
+    if registry is None:
+        registry = scan_installations(binaries, CHIMERA_LOCATIONS, CHIMERA_PREFIX)
+    paths = registered_paths(registry, CHIMERA_BINARY, search_all=search_all)
     if not paths and search_all:  # try headless?
-        headless = '{0[0]}{1}{0[1]}'.format(os.path.split(CHIMERA_BINARY), '-headless')
-        paths = _search_chimera(headless, CHIMERA_LOCATIONS, CHIMERA_PREFIX,
-                                search_all=search_all)
+        paths = registered_paths(registry, headless, search_all=search_all)
     if not paths:
         sys.exit("Could not find UCSF Chimera.\n{}".format(_INSTRUCTIONS))
     return paths
@@ -195,6 +412,9 @@ def _search_chimera(binary, directories, prefix, search_all=False):
     Try running ``chimera --root`` if Chimera happens to be in PATH, otherwise
     traverse usual installation locations to find the Chimera root path.
 
+    This always searches the system; use :func:`guess_chimera_path` to
+    benefit from the installations registry.
+
     Parameters
     ----------
     binary : str
@@ -220,33 +440,75 @@ def _search_chimera(binary, directories, prefix, search_all=False):
     except KeyError:
         pass
 
+    from .registry import binary_root, locate_installations
     paths = []
-    binary_path = find_executable(binary)
-    if binary_path is not None:
-        real_path = os.path.realpath(binary_path)  # follow symlinks
-        chimera_dir = os.path.sep + os.path.join(*real_path.split(os.path.sep)[1:-2])
+    chimera_dir = binary_root(binary)
+    if chimera_dir is not None:
         paths.append(chimera_dir)
     else:
         search_all = True
 
     if search_all:
-        for basedir in directories:
-            found_paths = filter(os.path.isdir, glob(os.path.join(basedir, prefix)))
-            if found_paths:
-                found_paths.sort()
-                found_paths.reverse()
-                paths.extend(found_paths)
+        paths.extend(locate_installations(directories, prefix))
     seen = set()
     paths = [p for p in paths if p not in seen and not seen.add(p)]
     return paths
 
 
+def write_launcher(path, nogui=True):
+    """
+    Write a shell launcher (a batch file in Windows) that exports the patched
+    environment and runs ``pychimera`` directly. Since ``CHIMERA`` is already set
+    when the interpreter starts, :func:`patch_environ` has nothing to do and
+    no restart is needed: each launch pays for a single interpreter start.
+
+    Parameters
+    ----------
+    path : str
+        Launcher location. It will be made executable.
+    nogui : bool, optional, default=True
+        Create the launcher for headless (True) or GUI (False) launches.
+    """
+    try:
+        from shlex import quote as _shell_quote
+    except ImportError:  # Python 2
+        from pipes import quote as _shell_quote
+    changes = patched_environ(nogui=nogui)
+    command = [changes['executable']] + _pychimera_entry_point() + ([] if nogui else ['--gui'])
+    if os.name == 'nt':
+        escape = lambda v: v.replace('%', '%%')
+        lines = ['@echo off']
+        lines.extend('set {}='.format(k) for k in changes['unset'])
+        lines.extend('set "{}={}"'.format(k, escape(v)) for (k, v) in sorted(changes['set'].items()))
+        lines.append(' '.join('"{}"'.format(escape(c)) for c in command) + ' %*')
+    else:
+        lines = ['#!/bin/sh', '# Generated by pychimera v{}'.format(__version__)]
+        lines.extend('unset {}'.format(k) for k in changes['unset'])
+        lines.extend('export {}={}'.format(k, _shell_quote(v))
+                     for (k, v) in sorted(changes['set'].items()))
+        lines.append('exec {} "$@"'.format(' '.join(_shell_quote(c) for c in command)))
+    with open(path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    os.chmod(path, 0o755)
+
+
+def _pychimera_entry_point():
+    """
+    Arguments that run pychimera the same way the current process was run, so
+    ``sys.path[0]`` matches the one of the standard restart.
+    """
+    if os.path.basename(sys.argv[0]) == 'pychimera' and os.path.isfile(sys.argv[0]):
+        return [os.path.abspath(sys.argv[0])]
+    return ['-m', 'pychimera']
+
+
 #---------------------------------------------------------------
 # CLI stuff
 #---------------------------------------------------------------
 
 
 def parse_cli_options(argv=None):
+    import argparse
     parser = argparse.ArgumentParser(description='pychimera - UCSF Chimera for standard Python',
                                      add_help=False)
     parser.add_argument('-i', action='store_true', dest='interactive', default=False,
@@ -257,8 +519,49 @@ def parse_cli_options(argv=None):
                         version='%(prog)s v{}'.format(__version__))
     parser.add_argument('--gui', action='store_false', dest='nogui', default=True,
                         help='Launch Chimera graphical interface')
+    parser.add_argument('--extension-cache', action='store_true', dest='extension_cache',
+                        default=False, help='Replay a cached manifest of the Chimera '
+                                            'extensions on startup')
+    parser.add_argument('--import-cache', action='store_true', dest='import_cache',
+                        default=False, help='Resolve imports from cached directory '
+                                            'listings')
+    parser.add_argument('--init-profile', choices=sorted(INIT_PROFILES), default='default',
+                        dest='init_profile',
+                        help='Chimera initialization profile. Use minimal for headless '
+                             'batch jobs')
     parser.add_argument('--path', action='store_true', dest='path', default=False,
                         help='Return first found Chimera path')
+    parser.add_argument('--freeze-env', metavar='FILE', dest='freeze_env',
+                        help='Write the patched environment to FILE and exit')
+    parser.add_argument('--env-file', metavar='FILE', dest='env_file',
+                        help='Launch with the environment frozen in FILE, skipping '
+                             'Chimera discovery')
+    parser.add_argument('--write-launcher', metavar='FILE', dest='write_launcher',
+                        help='Write a launcher script with the patched environment to '
+                             'FILE, so each launch starts a single interpreter')
+    parser.add_argument('--profile-startup', metavar='FILE', dest='profile_startup',
+                        help='Time each startup phase and write a Chrome trace to FILE')
+    parser.add_argument('--import-profile', metavar='FILE', dest='import_profile',
+                        help='Time each module import during initialization and the '
+                             'script run, writing a sorted report to FILE and folded '
+                             'stacks for flamegraphs to FILE.folded')
+    parser.add_argument('--precompile', action='store_true', dest='precompile', default=False,
+                        help='Compile the Chimera Python tree into the user-writable '
+                             'bytecode cache and exit')
+    parser.add_argument('--batch', action='store_true', dest='batch', default=False,
+                        help='Run all the given scripts in a single session, resetting '
+                             'it between scripts')
+    parser.add_argument('--batch-file', metavar='FILE', dest='batch_file',
+                        help='Run the scripts listed in FILE (one per line, followed by '
+                             'their arguments) in a single session')
+    parser.add_argument('--zygote', metavar='SOCKET', dest='zygote',
+                        help='Initialize Chimera once and serve the launches that set '
+                             'PYCHIMERA_ZYGOTE=SOCKET, forking a child for each one')
+    parser.add_argument('--threads', metavar='N', dest='threads', type=_threads_option,
+                        help='Threads for the BLAS and OpenMP runtimes')
+    parser.add_argument('--rescan', action='store_true', dest='rescan', default=False,
+                        help='Search the system for Chimera installations again, '
+                             'rebuilding the cached registry, and list them')
 
     parser.add_argument('-m', dest='module', nargs='?',
                         help='Instead of a script, run a Python. Extra args must be '
@@ -266,7 +569,9 @@ def parse_cli_options(argv=None):
     parser.add_argument('-c', dest='string', nargs='?',
                         help='Instead of a script, run program passed in as a string')
     parser.add_argument('command', nargs='?',
-                        help="A keyword {ipython, notebook} or a Python script")
+                        help="A keyword {ipython, notebook, queue, serve} or a Python "
+                             "script. Run 'pychimera queue -h' or 'pychimera serve -h' "
+                             "for their options")
     parser.add_argument('extra_args', metavar="[args]", nargs=argparse.REMAINDER,
                         help="Additional command-line arguments to be passed to the script.")
 
@@ -276,6 +581,7 @@ def parse_cli_options(argv=None):
     return parser.parse_known_args(argv)
 
 
+@profiling.phase('run_cli_options')
 def run_cli_options(args):
     """
     Quick implementation of Python interpreter's -m, -c and file execution.
@@ -286,6 +592,7 @@ def run_cli_options(args):
     """
     if _interactive_mode(args.interactive):
         os.environ['PYTHONINSPECT'] = '1'
+    from .jupyter_utils import in_ipython
     if in_ipython():
         return
     exclusive_choices = [[None, args.command], ['-c', args.string], ['-m', args.module]]
@@ -304,20 +611,35 @@ def run_cli_options(args):
             if choice == 'ipython':
                 launch_ipython(argv=sys.argv[1:])
             elif choice == 'notebook':
+                from .jupyter_utils import launch_notebook
                 launch_notebook()
             else:
-                globals().update(runpy.run_path(choice, run_name="__main__"))
+                import runpy
+                with profiling.phase('runpy.run_path'):
+                    globals().update(runpy.run_path(choice, run_name="__main__"))
         elif flag == '-m':
             if '--' in sys.argv[1:2] :  # -m syntax needs '--' for extra args
                 sys.argv.pop(1)
-            globals().update(runpy.run_module(choice, run_name="__main__"))
+            import runpy
+            with profiling.phase('runpy.run_module'):
+                globals().update(runpy.run_module(choice, run_name="__main__"))
         elif flag == '-c':
-            exec choice in globals(), locals()  # workaround
+            with profiling.phase('exec -c'):
+                exec(choice, globals(), locals())  # workaround
         else:
             continue
         break
 
 
+def _threads_option(value):
+    from .threads import thread_count
+    try:
+        return thread_count(int(value))
+    except ValueError:
+        import argparse
+        raise argparse.ArgumentTypeError('expected a positive integer')
+
+
 def _interactive_mode(interactive_flag=False):
     """
     Check if we need to relaunch Python in interactive mode:
@@ -334,18 +656,96 @@ def main():
     5. Run any additional CLI arguments (-m, -c, -f), if needed
     """
     patch_sys_version()
-    args, more_args = parse_cli_options()
+    with profiling.phase('parse_cli_options'):
+        args, more_args = parse_cli_options()
+    if args.profile_startup:
+        profiling.enable(args.profile_startup)
+    if args.import_profile:
+        os.environ['PYCHIMERA_IMPORT_PROFILE'] = os.path.abspath(args.import_profile)
+    if args.init_profile != 'default' and not args.nogui:
+        sys.exit('ERROR: --init-profile {} cannot be used with --gui'.format(args.init_profile))
+    if args.rescan:
+        print(*guess_chimera_path(search_all=True, rescan=True), sep='\n')
+        return
     if args.path:
         print(guess_chimera_path()[0])
         return
-    patch_environ(nogui=args.nogui)
+    if args.freeze_env:
+        freeze_environ(args.freeze_env, nogui=args.nogui)
+        return
+    if args.precompile:
+        from .bytecode import bytecode_dir, precompile
+        root = os.environ.get('CHIMERA') or _chimera_base(nogui=args.nogui)
+        compiled, skipped, failed = precompile(root, verbose=args.verbose)
+        print('Compiled {} modules into {} ({} up to date, {} failed)'.format(
+              compiled, bytecode_dir(), skipped, failed))
+        return
+    if args.write_launcher:
+        write_launcher(args.write_launcher, nogui=args.nogui)
+        return
+    if args.zygote and not args.nogui:
+        sys.exit('ERROR: --zygote cannot be used with --gui')
+    if (args.batch or args.batch_file) and not args.nogui:
+        sys.exit('ERROR: --batch cannot be used with --gui')
+    if args.command == 'serve':
+        from .rpc import parse_serve_options
+        serve_args = parse_serve_options(args.extra_args)
+    if args.command == 'queue':
+        from .spool import parse_queue_options, run_queue
+        queue_args = parse_queue_options(args.extra_args)
+        if queue_args.action != 'work':  # no need for Chimera
+            sys.exit(run_queue(queue_args, verbose=args.verbose))
+    if os.environ.get('PYCHIMERA_ZYGOTE') and not args.zygote and _zygote_job(args):
+        from .zygote import run_in_zygote
+        code = run_in_zygote(os.environ['PYCHIMERA_ZYGOTE'], sys.argv, verbose=args.verbose)
+        if code is not None:
+            sys.exit(code)
+        del os.environ['PYCHIMERA_ZYGOTE']  # regular launch; don't try again after restart
+    if args.command == 'queue' and args.threads is None:
+        # One worker per core, so one thread each unless set already. Before
+        # Chimera loads numpy, which only reads them then
+        from .threads import limit_threads
+        limit_threads(1, override=False)
+    patch_environ(nogui=args.nogui, env_file=args.env_file, verbose=args.verbose,
+                  threads=args.threads)
     if not args.nogui:
         sys.argv.remove('--gui')
     if args.command != 'notebook':
-        enable_chimera(verbose=args.verbose, nogui=args.nogui)
-    if args.nogui:
+        enable_chimera(verbose=args.verbose, nogui=args.nogui, profile=args.init_profile,
+                       extension_cache=args.extension_cache, import_cache=args.import_cache)
+    if args.zygote:
+        from .zygote import serve
+        serve(args.zygote, verbose=args.verbose)
+    elif args.batch or args.batch_file:
+        from .batch import run_batch, read_batch_file
+        jobs = read_batch_file(args.batch_file) if args.batch_file else []
+        if args.batch:
+            jobs.extend((script, []) for script in [args.command] + args.extra_args if script)
+        results = run_batch(jobs, verbose=args.verbose)
+        sys.exit(1 if any(r['status'] for r in results) else 0)
+    elif args.command == 'queue':
+        sys.exit(run_queue(queue_args, verbose=args.verbose))
+    elif args.command == 'serve':
+        from .rpc import serve
+        serve(serve_args.socket, workers=serve_args.workers, verbose=args.verbose,
+              threads=args.threads or 'auto')
+    elif args.nogui:
         run_cli_options(args)
 
 
+def _zygote_job(args):
+    """
+    Whether a zygote can run this launch: non-interactive scripts, -m and -c.
+    Startup options are fixed when the zygote starts, so launches that set
+    them run normally.
+    """
+    return (args.nogui and not _interactive_mode(args.interactive) and
+            not (args.batch or args.batch_file) and
+            args.command not in ('ipython', 'notebook', 'queue', 'serve') and
+            not (args.profile_startup or args.import_profile) and
+            not (args.env_file or args.threads or args.extension_cache or
+                 args.import_cache or args.init_profile != 'default'))
+
+
 if "__main__" == __name__:
     sys.exit(main())
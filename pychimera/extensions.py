@@ -0,0 +1,377 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Cached manifest of Chimera extensions
+
+During ``chimeraInit.init``, Chimera imports every ``ChimeraExtension.py``
+it finds to register its extensions. On the first (cold) start we record
+what each of those files registered. On later (warm) starts, files that
+only declare and register extension objects (EMOs) are not imported:
+lazy stand-ins built from the manifest are registered instead, and the
+real file is only loaded if something needs more than the cached
+name, description, categories or icon of the extension, or any attribute
+of the module itself.
+
+Files with any other top-level side effect (registering commands or file
+formats, importing other packages...) are always imported as usual.
+"""
+
+from __future__ import print_function
+from contextlib import contextmanager
+import ast
+import hashlib
+import imp
+import os
+import sys
+import types
+
+from .cache import cache_dir, load_json, dump_json, stat_mtime
+
+MANIFEST_FORMAT = 1
+_CACHED_METHODS = ('name', 'description', 'categories', 'icon')
+_PURE_IMPORTS = ('chimera', 'chimera.extension', 'os', 'os.path', 'sys')
+try:
+    _STRING_TYPES = (basestring,)
+except NameError:  # Python 3
+    _STRING_TYPES = (str,)
+
+
+def manifest_path(root):
+    digest = hashlib.sha1(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir('extensions'), digest + '.json')
+
+
+def load_manifest(root):
+    """
+    Load the extension manifest of the Chimera installation at `root`, if
+    it is still valid.
+
+    Returns
+    -------
+    manifest : dict or None
+    """
+    manifest = load_json(manifest_path(root))
+    if not manifest or manifest.get('format') != MANIFEST_FORMAT:
+        return None
+    for path, mtime in manifest['stamps'].items():
+        if stat_mtime(path) != mtime:
+            return None
+    return manifest
+
+
+def save_manifest(root, extensions):
+    """
+    Store the extension manifest of the Chimera installation at `root`.
+
+    Parameters
+    ----------
+    extensions : dict
+        Maps each ``ChimeraExtension.py`` path to the list of EMOs it registered.
+    """
+    stamped = set([os.path.join(root, 'share')])
+    for path in extensions:
+        stamped.update([path, os.path.dirname(os.path.dirname(path))])
+    manifest = {'format': MANIFEST_FORMAT,
+                'root': root,
+                'stamps': dict((p, stat_mtime(p)) for p in stamped),
+                'extensions': dict((path, {'pure': is_pure(path), 'emos': emos})
+                                   for (path, emos) in extensions.items())}
+    try:
+        dump_json(manifest_path(root), manifest)
+    except (IOError, OSError) as e:
+        print('WARNING: Could not write Chimera extensions manifest: {}'.format(e),
+              file=sys.stderr)
+
+
+@contextmanager
+def extension_manifest(root):
+    """
+    Context manager wrapping ``chimeraInit.init``. It records the extension
+    manifest on cold starts and replays it on warm starts.
+    """
+    try:
+        import chimera.extension
+        manager = chimera.extension.manager
+        manager.registerExtension
+    except (ImportError, AttributeError):
+        yield
+        return
+    manifest = load_manifest(root)
+    if manifest is None:
+        recorded = {}
+        with _patched(manager, 'registerExtension', _recorder(manager, recorded)):
+            yield
+        save_manifest(root, recorded)
+    else:
+        pure = dict((_source(path), entry['emos'])
+                    for (path, entry) in manifest['extensions'].items() if entry['pure'])
+        with _stubbed_imports(manager, pure):
+            yield
+
+
+def is_pure(path):
+    """
+    Check that the top level of a ``ChimeraExtension.py`` file only imports
+    basic modules, defines classes and functions, and registers extensions.
+    """
+    try:
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+    except (IOError, OSError, SyntaxError, TypeError):
+        return False
+    for node in tree.body:
+        if isinstance(node, (ast.ClassDef, ast.FunctionDef)):
+            continue
+        if isinstance(node, ast.Import):
+            if all(alias.name in _PURE_IMPORTS for alias in node.names):
+                continue
+        elif isinstance(node, ast.ImportFrom):
+            if node.module in _PURE_IMPORTS:
+                continue
+        elif isinstance(node, ast.Expr):
+            if isinstance(node.value, ast.Str):  # docstring
+                continue
+            if (isinstance(node.value, ast.Call) and
+                    _dotted_name(node.value.func).endswith('registerExtension')):
+                continue
+        elif isinstance(node, ast.Assign):
+            calls = [_dotted_name(n.func) for n in ast.walk(node.value)
+                     if isinstance(n, ast.Call)]
+            if all(c.startswith('os.path.') for c in calls):
+                continue
+        return False
+    return True
+
+
+#---------------------------------------------------------------
+# Recording and replaying
+#---------------------------------------------------------------
+
+def _recorder(manager, recorded):
+    register = manager.registerExtension
+    def record_and_register(emo, *args, **kwargs):
+        path = _loading_extension()
+        if path is not None:
+            recorded.setdefault(path, []).append(_describe(emo))
+        return register(emo, *args, **kwargs)
+    return record_and_register
+
+
+def _loading_extension():
+    """
+    Path of the ``ChimeraExtension.py`` file whose top level is running,
+    if any, found by walking up the stack. Extensions are recorded under
+    the file that registers them, wherever their class is defined.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        code = frame.f_code
+        if (code.co_name == '<module>' and
+                os.path.basename(code.co_filename).startswith('ChimeraExtension.py')):
+            return _source(code.co_filename)
+        frame = frame.f_back
+    return None
+
+
+def _describe(emo):
+    cached = {}
+    for method in _CACHED_METHODS:
+        try:
+            value = getattr(emo, method)()
+        except Exception:
+            continue
+        if isinstance(value, tuple):
+            value = list(value)
+        if value is None or isinstance(value, _STRING_TYPES + (list,)):
+            cached[method] = value
+    return {'class': emo.__class__.__name__, 'cached': cached}
+
+
+@contextmanager
+def _stubbed_imports(manager, pure):
+    """
+    While active, loading any of the `pure` extension files registers
+    lazy stand-ins instead of executing them.
+    """
+    register = manager.registerExtension
+    base = getattr(sys.modules.get('chimera.extension'), 'EMO', object)
+    proxy_class = type('LazyEMO', (_LazyExtension, base), {})
+
+    def stub(name, path):
+        module = _LazyModule(name, manager, path)
+        for index, entry in enumerate(pure[path]):
+            register(proxy_class(manager, path, entry, index))
+        return module
+
+    load_source, load_module = imp.load_source, imp.load_module
+    def stub_load_source(name, pathname, *args):
+        if _source(pathname) in pure:
+            sys.modules[name] = module = stub(name, _source(pathname))
+            return module
+        return load_source(name, pathname, *args)
+
+    def stub_load_module(name, f, pathname, description):
+        if pathname and _source(pathname) in pure:
+            if f is not None:
+                f.close()
+            sys.modules[name] = module = stub(name, _source(pathname))
+            return module
+        return load_module(name, f, pathname, description)
+
+    finder = _StubFinder(pure, stub)
+    sys.meta_path.insert(0, finder)
+    try:
+        with _patched(imp, 'load_source', stub_load_source), \
+             _patched(imp, 'load_module', stub_load_module):
+            yield
+    finally:
+        sys.meta_path.remove(finder)
+
+
+class _StubFinder(object):
+
+    """
+    PEP 302 finder returning stubs for pure ``ChimeraExtension`` modules.
+    """
+
+    def __init__(self, pure, stub):
+        self.pure = pure
+        self.stub = stub
+        self._found = {}
+
+    def find_module(self, fullname, path=None):
+        if fullname.rpartition('.')[2] != 'ChimeraExtension':
+            return None
+        for directory in (path or sys.path):
+            candidate = os.path.abspath(os.path.join(directory, 'ChimeraExtension.py'))
+            if candidate in self.pure:
+                self._found[fullname] = candidate
+                return self
+
+    def load_module(self, fullname):
+        if fullname in sys.modules:
+            return sys.modules[fullname]
+        sys.modules[fullname] = module = self.stub(fullname, self._found.pop(fullname))
+        return module
+
+
+class _LazyExtension(object):
+
+    """
+    Stand-in for an extension object. Cached methods are answered from the
+    manifest; anything else loads the real ``ChimeraExtension.py`` and is
+    forwarded to the extension object it registers.
+    """
+
+    def __init__(self, manager, path, entry, index=0):
+        d = object.__getattribute__(self, '__dict__')
+        d.update(_manager=manager, _path=path, _entry=entry, _index=index, _real=None)
+
+    def __getattribute__(self, attr):
+        d = object.__getattribute__(self, '__dict__')
+        if attr in d:
+            return d[attr]
+        if attr in d['_entry']['cached']:
+            value = d['_entry']['cached'][attr]
+            return lambda *args, **kwargs: value
+        if attr in ('__class__', '__dict__', '__repr__'):
+            return object.__getattribute__(self, attr)
+        if d['_real'] is None:
+            d['_real'] = _load_extension(d['_manager'], d['_path'], d['_entry']['class'],
+                                         d['_index'])
+        return getattr(d['_real'], attr)
+
+    def __repr__(self):
+        d = object.__getattribute__(self, '__dict__')
+        return '<lazy {} from {}>'.format(d['_entry']['class'], d['_path'])
+
+
+class _LazyModule(types.ModuleType):
+
+    """
+    Stand-in for a pure ``ChimeraExtension`` module. The real file is
+    executed the first time one of its attributes is needed.
+    """
+
+    def __init__(self, name, manager, path):
+        super(_LazyModule, self).__init__(name)
+        self.__file__ = path
+        self._pychimera_manager = manager
+
+    def __getattr__(self, attr):
+        if attr.startswith('__') or attr == '_pychimera_manager':
+            raise AttributeError(attr)
+        module, _ = _execute_extension(self._pychimera_manager, self.__file__)
+        for key, value in vars(module).items():
+            if not key.startswith('__'):
+                setattr(self, key, value)
+        return getattr(module, attr)
+
+
+# Real modules and extension objects of the stubbed files loaded so far
+_EXECUTED = {}
+
+
+def _execute_extension(manager, path):
+    """
+    Execute a ``ChimeraExtension.py`` file once, without registering its
+    extensions again, and return the module and the extension objects it
+    tried to register.
+    """
+    if path not in _EXECUTED:
+        captured = []
+        with _patched(manager, 'registerExtension',
+                      lambda emo, *a, **kw: captured.append(emo)):
+            name = '_pychimera_extension_' + hashlib.sha1(path.encode('utf-8')).hexdigest()[:12]
+            module = imp.load_source(name, path)
+        _EXECUTED[path] = module, captured
+    return _EXECUTED[path]
+
+
+def _load_extension(manager, path, class_name, index=0):
+    """
+    Return the extension object of class `class_name` that a
+    ``ChimeraExtension.py`` file registered in position `index`,
+    executing the file if needed.
+    """
+    captured = _execute_extension(manager, path)[1]
+    if index < len(captured) and captured[index].__class__.__name__ == class_name:
+        return captured[index]
+    for emo in captured:
+        if emo.__class__.__name__ == class_name:
+            return emo
+    raise RuntimeError('{} did not register an extension of class {}'.format(path, class_name))
+
+
+#---------------------------------------------------------------
+# Helpers
+#---------------------------------------------------------------
+
+@contextmanager
+def _patched(obj, attr, value):
+    shadowed = attr in getattr(obj, '__dict__', {})
+    original = getattr(obj, attr)
+    setattr(obj, attr, value)
+    try:
+        yield
+    finally:
+        if shadowed or not hasattr(type(obj), attr):
+            setattr(obj, attr, original)
+        else:
+            delattr(obj, attr)
+
+
+def _source(path):
+    path = os.path.abspath(path)
+    if path.endswith(('.pyc', '.pyo')):
+        path = path[:-1]
+    return path
+
+
+def _dotted_name(node):
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return _dotted_name(node.value) + '.' + node.attr
+    return ''
@@ -0,0 +1,254 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Streaming frames
+
+Opening a multi-model file with ``chimera.openModels.open`` builds a
+molecule per model, so files with thousands of NMR models or docking poses
+don't fit in memory. :func:`iter_frames` opens the first frame only, and then
+reads the file one frame at a time, setting the coordinates of that same
+molecule before yielding it::
+
+    for i, molecule in enumerate(iter_frames('poses.mol2')):
+        score(molecule)  # same molecule, coordinates of frame i
+
+Memory stays flat whatever the number of frames. Multi-model PDB, multi-
+molecule Mol2 and DCD trajectories (on top of a molecule opened from the
+topology) are supported; :func:`play_frames` takes coordinates from any
+other source.
+"""
+
+from __future__ import print_function
+import os
+import struct
+import tempfile
+
+FORMATS = {'.pdb': 'PDB', '.ent': 'PDB', '.mol2': 'Mol2', '.dcd': 'DCD'}
+
+
+def iter_frames(path, molecule=None, format=None, atoms=None):
+    """
+    Read the frames of `path` one by one into the coordinates of a single
+    molecule, and yield it after each one.
+
+    Parameters
+    ----------
+    path : str
+    molecule : chimera.Molecule, optional
+        Molecule whose coordinates are set. By default, the first frame of
+        `path` is opened (and added to ``chimera.openModels``). Required
+        for DCD files.
+    format : str, optional
+        ``'PDB'``, ``'Mol2'`` or ``'DCD'``. Guessed from the extension by default.
+    atoms : list of chimera.Atom, optional
+        The atoms of `molecule` in the order of the file. By default, PDB
+        and Mol2 records are matched to atoms by serial number, and DCD
+        frames are assumed to follow the serial numbers of `molecule`.
+
+    Yields
+    ------
+    molecule : chimera.Molecule
+        The same object each time.
+
+    Raises
+    ------
+    ValueError
+        If a frame has a different number of atoms than the first one.
+    """
+    format = format or FORMATS.get(os.path.splitext(path)[1].lower())
+    readers = {'PDB': _pdb_frames, 'Mol2': _mol2_frames, 'DCD': _dcd_frames}
+    if format not in readers:
+        raise ValueError('Unsupported format for {}: {}'.format(path, format))
+    if format == 'DCD' and molecule is None:
+        raise ValueError('DCD files only have coordinates: pass the molecule of the topology')
+
+    with open(path, 'rb') as f:
+        frames = readers[format](f)
+        if molecule is None:
+            molecule = _open_first_frame(path, format)
+        for molecule in play_frames(molecule, frames, atoms=atoms):
+            yield molecule
+
+
+def play_frames(molecule, frames, atoms=None):
+    """
+    Set the coordinates of `molecule` to each of `frames`, in turn, and
+    yield it after each one.
+
+    Parameters
+    ----------
+    molecule : chimera.Molecule
+    frames : iterable
+        (n, 3) arrays of coordinates, like those of MDTraj or MDAnalysis
+        readers, or ``(serials, coords)`` pairs, where `serials` are the
+        serial numbers of each row (or None).
+    atoms : list of chimera.Atom, optional
+        The atoms of the rows. See :func:`iter_frames`.
+    """
+    import numpy as np
+    from .tables import set_atom_coordinates
+    rows = None
+    for frame in frames:
+        serials, coords = frame if isinstance(frame, tuple) else (None, frame)
+        coords = np.asarray(coords, dtype='float32').reshape(-1, 3)
+        if rows is None:
+            n_rows = len(coords)
+            if atoms is None:
+                atoms, rows = _match_atoms(molecule, serials, n_rows)
+            elif len(atoms) != n_rows:
+                raise ValueError('{} atoms given for frames of {}'.format(len(atoms), n_rows))
+        elif len(coords) != n_rows:
+            raise ValueError('Frame with {} atoms, instead of {}'.format(len(coords), n_rows))
+        set_atom_coordinates(atoms, coords if rows is None else coords[rows])
+        yield molecule
+
+
+def _match_atoms(molecule, serials, n_rows):
+    """
+    Atoms of `molecule` for the rows of a frame, and the rows they take
+    (None for all of them, in order).
+    """
+    if serials is None:
+        atoms = sorted(molecule.atoms, key=lambda a: a.serialNumber)
+        if len(atoms) != n_rows:
+            raise ValueError('The molecule has {} atoms, but the frames {}'.format(
+                             len(atoms), n_rows))
+        return atoms, None
+    by_serial = dict((a.serialNumber, a) for a in molecule.atoms)
+    rows = [i for (i, serial) in enumerate(serials) if serial in by_serial]
+    atoms = [by_serial[serials[i]] for i in rows]
+    # Records of alternate locations are not atoms of their own
+    if len(set(atoms)) != len(by_serial):
+        raise ValueError('Cannot match the atoms of the frames by serial number; '
+                         'pass them in file order with `atoms`')
+    return atoms, (None if len(rows) == n_rows else rows)
+
+
+def _open_first_frame(path, format):
+    """
+    Open the first frame of `path` alone, from a temporary file.
+    """
+    import chimera
+    fd, tmp = tempfile.mkstemp(suffix=os.path.splitext(path)[1] or '.' + format.lower())
+    try:
+        with open(path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            for line in _first_frame_lines(src, format):
+                dst.write(line)
+        models = chimera.openModels.open(tmp, type=format)
+    finally:
+        os.remove(tmp)
+    for model in models:
+        model.name = os.path.basename(path)
+    return models[0]
+
+
+def _first_frame_lines(f, format):
+    if format == 'PDB':
+        for line in f:
+            yield line
+            if line.startswith((b'ENDMDL', b'END')):
+                break
+        # Bonds are listed once, after the last model
+        for line in f:
+            if line.startswith(b'CONECT'):
+                yield line
+    else:
+        molecules = 0
+        for line in f:
+            if line.startswith(b'@<TRIPOS>MOLECULE'):
+                molecules += 1
+                if molecules > 1:
+                    return
+            yield line
+
+
+#---------------------------------------------------------------
+# Readers: generators of (serials, coords) per frame
+#---------------------------------------------------------------
+
+def _pdb_frames(f):
+    serials, coords = [], []
+    for line in f:
+        if line.startswith((b'ATOM', b'HETATM')):
+            serials.append(_serial(line[6:11]))
+            coords.append((float(line[30:38]), float(line[38:46]), float(line[46:54])))
+        elif line.startswith((b'ENDMDL', b'END')) and coords:
+            yield serials, coords
+            serials, coords = [], []
+    if coords:
+        yield serials, coords
+
+
+def _serial(field):
+    try:
+        return int(field)
+    except ValueError:  # hybrid-36 or ***** serials of huge files
+        return None
+
+
+def _mol2_frames(f):
+    serials, coords, in_atoms = [], [], False
+    for line in f:
+        if line.startswith(b'@<TRIPOS>'):
+            in_atoms = line.startswith(b'@<TRIPOS>ATOM')
+            if line.startswith(b'@<TRIPOS>MOLECULE') and coords:
+                yield serials, coords
+                serials, coords = [], []
+        elif in_atoms:
+            fields = line.split()
+            if len(fields) >= 5:
+                serials.append(int(fields[0]))
+                coords.append((float(fields[2]), float(fields[3]), float(fields[4])))
+    if coords:
+        yield serials, coords
+
+
+def _dcd_frames(f):
+    """
+    CHARMM/NAMD DCD trajectories, either endianness.
+    """
+    import numpy as np
+    first = f.read(4)
+    for endian in '<>':
+        if len(first) == 4 and struct.unpack(endian + 'i', first)[0] == 84:
+            break
+    else:
+        raise ValueError('Not a DCD file')
+    header = f.read(88)[:84]
+    if header[:4] != b'CORD':
+        raise ValueError('Not a DCD file')
+    control = struct.unpack(endian + '9if10i', header[4:])
+    fixed, charmm = control[8], control[19]
+    has_cell, has_4d = charmm and control[10], charmm and control[11]
+    if fixed:
+        raise ValueError('DCD files with fixed atoms are not supported')
+    _dcd_record(f, endian)  # title
+    natoms = struct.unpack(endian + 'i', _dcd_record(f, endian))[0]
+    dtype = np.dtype(endian + 'f4')
+    while True:
+        try:
+            if has_cell:
+                _dcd_record(f, endian)
+            xyz = [np.frombuffer(_dcd_record(f, endian, natoms * 4), dtype) for _ in 'xyz']
+            if has_4d:
+                _dcd_record(f, endian)
+        except EOFError:
+            return
+        yield None, np.column_stack(xyz)
+
+
+def _dcd_record(f, endian, expected=None):
+    """
+    Payload of the next Fortran record of `f`.
+    """
+    head = f.read(4)
+    if len(head) < 4:
+        raise EOFError
+    size = struct.unpack(endian + 'i', head)[0]
+    if expected is not None and size != expected:
+        raise ValueError('Corrupt DCD record of {} bytes, instead of {}'.format(size, expected))
+    data = f.read(size + 4)
+    if len(data) < size + 4:
+        raise EOFError
+    return data[:size]
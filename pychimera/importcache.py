@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Persistent import resolution cache
+
+The patched ``sys.path`` mixes Chimera's ``share/``, ``bin/`` and
+``lib/python2.7`` with the user's site-packages, so every import probes
+many directories before finding its module. :class:`CachedPathFinder` is a
+``sys.meta_path`` finder that keeps the listing of importable names of each
+directory on disk, validated with the directory modification time. Warm
+starts resolve imports without probing: a single ``stat`` per directory
+confirms its listing is still valid.
+
+Only plain directories are handled. Whenever a module could come from a
+zip file, an egg or any other ``sys.path_hooks`` importer, the standard
+import machinery takes over.
+"""
+
+from __future__ import print_function
+import atexit
+import hashlib
+import imp
+import os
+import sys
+
+from . import bytecode as _bytecode
+from .cache import cache_dir, load_json, dump_json, stat_mtime
+
+CACHE_FORMAT = 1
+_SUFFIXES = imp.get_suffixes()
+_INIT_FILES = ['__init__' + suffix for (suffix, _, _) in _SUFFIXES]
+
+
+def cache_path():
+    key = '{}-{}'.format(sys.executable, sys.version)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir('imports'), digest + '.json')
+
+
+def install_import_cache(bytecode=False):
+    """
+    Install the cached finder at the front of ``sys.meta_path``, once.
+
+    Parameters
+    ----------
+    bytecode : bool, optional, default=False
+        Load source modules through the user-writable bytecode cache.
+        See :mod:`pychimera.bytecode`.
+
+    Returns
+    -------
+    finder : CachedPathFinder
+    """
+    for finder in sys.meta_path:
+        if isinstance(finder, CachedPathFinder):
+            finder.bytecode = finder.bytecode or bytecode
+            return finder
+    finder = CachedPathFinder(cache_path(), bytecode=bytecode)
+    sys.meta_path.insert(0, finder)
+    atexit.register(finder.save)
+    return finder
+
+
+class CachedPathFinder(object):
+
+    """
+    PEP 302 finder resolving modules from cached directory listings.
+
+    Parameters
+    ----------
+    path : str
+        JSON file where directory listings are persisted.
+    bytecode : bool, optional, default=False
+        Load source modules and packages through the bytecode cache.
+    """
+
+    def __init__(self, path, bytecode=False):
+        self.path = path
+        self.bytecode = bytecode
+        cached = load_json(path, {})
+        if cached.get('format') != CACHE_FORMAT:
+            cached = {}
+        self._stored = cached.get('dirs', {})
+        self._listings = {}
+        self._found = {}
+        self._dirty = False
+
+    def find_module(self, fullname, path=None):
+        name = fullname.rpartition('.')[2]
+        if path is None:
+            if imp.is_builtin(name) or imp.is_frozen(name):
+                return None
+            path = sys.path
+        for directory in path:
+            listing = self._listing(directory)
+            if listing is None:  # not a plain directory, we can't tell
+                return None
+            if name in listing:
+                self._found[fullname] = directory, listing[name]
+                return self
+
+    def load_module(self, fullname):
+        if fullname in sys.modules:
+            return sys.modules[fullname]
+        directory, (filename, description) = self._found.pop(fullname)
+        pathname = os.path.join(directory, filename)
+        if description[2] == imp.PKG_DIRECTORY:
+            if self.bytecode:
+                return _bytecode.load_package(fullname, pathname)
+            return imp.load_module(fullname, None, pathname, tuple(description))
+        if self.bytecode and description[2] == imp.PY_SOURCE and os.path.isfile(pathname):
+            return _bytecode.load_source_module(fullname, pathname)
+        try:
+            f = open(pathname, description[1])
+        except IOError:  # stale listing; let imp search this directory
+            self.invalidate(directory)
+            f, pathname, description = imp.find_module(fullname.rpartition('.')[2],
+                                                        [directory])
+        try:
+            return imp.load_module(fullname, f, pathname, tuple(description))
+        finally:
+            if f is not None:
+                f.close()
+
+    def invalidate(self, directory):
+        self._listings.pop(_listing_key(directory), None)
+        self._stored.pop(directory, None)
+        self._dirty = True
+
+    def save(self):
+        """
+        Persist the directory listings, if anything changed.
+        """
+        if not self._dirty:
+            return
+        try:
+            dump_json(self.path, {'format': CACHE_FORMAT, 'dirs': self._stored})
+        except (IOError, OSError) as e:
+            print('WARNING: Could not write import cache: {}'.format(e), file=sys.stderr)
+        else:
+            self._dirty = False
+
+    def _listing(self, directory):
+        """
+        Importable names in `directory`, mapped to their file name and
+        ``imp`` description. None if it is not a plain directory.
+        """
+        key = _listing_key(directory)
+        try:
+            return self._listings[key]
+        except KeyError:
+            pass
+        listing = None
+        importer = sys.path_importer_cache.get(directory)
+        if importer is None or isinstance(importer, imp.NullImporter):
+            mtime = stat_mtime(directory or os.curdir)
+            stored = self._stored.get(directory)
+            if mtime is None:
+                listing = {}
+            elif stored is not None and stored['mtime'] == mtime:
+                listing = stored['names']
+            elif os.path.isdir(directory or os.curdir):
+                listing = _list_importable(directory or os.curdir)
+                if os.path.isabs(directory):  # relative ones depend on the cwd
+                    self._stored[directory] = {'mtime': mtime, 'names': listing}
+                    self._dirty = True
+        self._listings[key] = listing
+        return listing
+
+
+def _listing_key(directory):
+    """
+    Key of the in-memory listing of a ``sys.path`` entry. Relative entries,
+    like ``''``, depend on the current directory, which may change.
+    """
+    if os.path.isabs(directory):
+        return directory
+    return os.path.join(os.getcwd(), directory)
+
+
+def _list_importable(directory):
+    """
+    Map the names importable from `directory` to the file name and ``imp``
+    description the standard machinery would choose: packages first, then
+    module suffixes in ``imp.get_suffixes()`` order.
+    """
+    try:
+        entries = os.listdir(directory)
+    except OSError:
+        return {}
+    listing = {}
+    for suffix, mode, kind in _SUFFIXES:
+        for entry in entries:
+            if entry.endswith(suffix):
+                listing.setdefault(entry[:-len(suffix)], (entry, (suffix, mode, kind)))
+    for entry in entries:
+        if '.' in entry:
+            continue
+        subdir = os.path.join(directory, entry)
+        if os.path.isdir(subdir) and any(os.path.isfile(os.path.join(subdir, init))
+                                         for init in _INIT_FILES):
+            listing[entry] = (entry, ('', '', imp.PKG_DIRECTORY))
+    return listing
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import-time profiling
+
+While active, every ``import`` statement (and every ``imp.load_source`` or
+``imp.load_module`` call, which Chimera uses to load its extensions) goes
+through a wrapper that measures the wall time and RSS growth of the modules
+it loads, attributing nested imports to their own entries. On exit,
+two files are written:
+
+- A report listing each loaded module, sorted by self time, with its
+  cumulative time, RSS growth and origin (Chimera extension, ``share/``
+  package, Chimera-bundled library, standard library or user code), plus
+  the totals of each origin.
+- Folded stacks (``FILE.folded``), one line per import chain with its self
+  time in microseconds, ready for ``flamegraph.pl`` or speedscope.
+
+Enable it with ``pychimera --import-profile FILE`` or the
+``PYCHIMERA_IMPORT_PROFILE`` env var.
+"""
+
+from __future__ import print_function, division
+import atexit
+import imp
+import os
+import sys
+import time
+
+try:
+    import __builtin__ as builtins
+    from thread import get_ident
+except ImportError:  # Python 3
+    import builtins
+    from threading import get_ident
+
+from .profiling import _rss
+
+_ENV_OUTPUT = 'PYCHIMERA_IMPORT_PROFILE'
+_STATE = {}
+
+
+def start(path=None):
+    """
+    Start recording imports, writing the report to `path` on exit.
+    Calling it again while active has no effect.
+
+    Parameters
+    ----------
+    path : str, optional
+        Defaults to the path in ``PYCHIMERA_IMPORT_PROFILE``.
+    """
+    if _STATE:
+        return
+    path = os.path.abspath(path or os.environ[_ENV_OUTPUT])
+    _STATE.update(path=path, thread=get_ident(), stack=[], entries=[], seen=set(sys.modules),
+                  synced=len(sys.modules), files={},
+                  originals=[(builtins, '__import__', builtins.__import__),
+                             (imp, 'load_source', imp.load_source),
+                             (imp, 'load_module', imp.load_module)])
+    for obj, attr, original in _STATE['originals']:
+        setattr(obj, attr, _profiled(original))
+    atexit.register(write_report)
+
+
+def stop():
+    """
+    Stop recording imports. Entries recorded so far are kept.
+    """
+    for obj, attr, original in _STATE.pop('originals', ()):
+        setattr(obj, attr, original)
+
+
+def write_report(path=None):
+    """
+    Write the sorted report to `path` and the folded stacks to ``path.folded``.
+    """
+    if not _STATE:
+        return
+    stop()
+    path = path or _STATE['path']
+    entries = [e for e in _STATE['entries'] if e['modules']]
+
+    totals = {}
+    for entry in entries:
+        total = totals.setdefault(entry['origin'].split(':')[0], [0, 0, 0])
+        total[0] += 1
+        total[1] += entry['self']
+        total[2] += entry['rss_self'] or 0
+
+    with open(path, 'w') as f:
+        f.write('# Import profile of: {}\n'.format(' '.join(sys.argv)))
+        f.write('# {} imports, {:.1f} ms in total\n\n'.format(
+                len(entries), 1e3 * sum(e['self'] for e in entries)))
+        f.write('{:>10} {:>10} {:>10}  {:<40} {}\n'.format(
+                'self ms', 'cumul ms', 'rss KiB', 'module', 'origin'))
+        for entry in sorted(entries, key=lambda e: e['self'], reverse=True):
+            f.write('{:>10.2f} {:>10.2f} {:>10}  {:<40} {}\n'.format(
+                    1e3 * entry['self'], 1e3 * entry['cumulative'],
+                    _kib(entry['rss_self']), entry['label'], entry['origin']))
+        f.write('\n{:>10} {:>10} {:>10}  {}\n'.format('self ms', 'modules', 'rss KiB', 'origin'))
+        for origin, (count, wall, rss) in sorted(totals.items(), key=lambda t: -t[1][1]):
+            f.write('{:>10.2f} {:>10} {:>10}  {}\n'.format(1e3 * wall, count, _kib(rss), origin))
+
+    folded = {}
+    for entry in entries:
+        stack = ';'.join(_stack(entry))
+        folded[stack] = folded.get(stack, 0) + int(round(1e6 * entry['self']))
+    with open(path + '.folded', 'w') as f:
+        for stack, value in sorted(folded.items()):
+            f.write('{} {}\n'.format(stack, value))
+
+
+#---------------------------------------------------------------
+# Recording
+#---------------------------------------------------------------
+
+def _profiled(load):
+    """
+    Wrap `load`, an import function taking the module name first.
+    """
+    def profiled_load(name, *args, **kwargs):
+        state = _STATE
+        if get_ident() != state['thread']:
+            return load(name, *args, **kwargs)
+        stack = state['stack']
+        if stack and len(sys.modules) != state['synced']:  # modules being run by the parent
+            stack[-1]['modules'].extend(_claim(state))
+        frame = {'name': name, 'parent': stack[-1] if stack else None, 'children': 0.0,
+                 'rss_children': 0, 'modules': [], 'count': len(sys.modules)}
+        stack.append(frame)
+        rss_start, start = _rss(), time.time()
+        try:
+            return load(name, *args, **kwargs)
+        finally:
+            elapsed, rss = time.time() - start, _rss()
+            stack.pop()
+            if len(sys.modules) != frame['count'] or frame['modules']:
+                rss_delta = rss - rss_start if None not in (rss, rss_start) else None
+                _close(state, frame, elapsed, rss_delta)
+    return profiled_load
+
+
+def _close(state, frame, elapsed, rss_delta):
+    """
+    Attribute to `frame` the modules it loaded that no nested import claimed.
+    """
+    frame['modules'].extend(_claim(state))
+    new = frame['modules'] = sorted(frame['modules'])
+    frame['label'] = _label(frame['name'], new)
+    frame['origin'] = _origin(new, state['files'], os.environ.get('CHIMERA'))
+    frame['cumulative'] = elapsed
+    frame['self'] = max(elapsed - frame['children'], 0.0)
+    frame['rss_self'] = rss_delta - frame['rss_children'] if rss_delta is not None else None
+    parent = frame['parent']
+    if parent is not None:
+        parent['children'] += elapsed
+        parent['rss_children'] += rss_delta or 0
+    state['entries'].append(frame)
+
+
+def _claim(state):
+    """
+    Modules loaded since the last call, recording their files. Modules may
+    be removed from ``sys.modules`` before the report is written.
+    """
+    seen, files = state['seen'], state['files']
+    new = []
+    for name, module in list(sys.modules.items()):
+        if name in seen:
+            continue
+        seen.add(name)
+        if module is not None:  # not a relative import marker
+            new.append(name)
+            files[name] = getattr(module, '__file__', None)
+    state['synced'] = len(sys.modules)
+    return new
+
+
+def _label(name, modules):
+    """
+    Name of the module an import statement loaded: the requested one if it
+    was loaded, else the shortest new module name.
+    """
+    if not modules:
+        return name
+    for module in modules:
+        if module == name or module.endswith('.' + name):
+            return module
+    return min(modules, key=len)
+
+
+def _stack(entry):
+    stack = []
+    while entry is not None:
+        label = entry.get('label') or entry['name']
+        if not stack or stack[-1] != label:  # e.g. imp.load_module within an import
+            stack.append(label)
+        entry = entry['parent']
+    return reversed(stack)
+
+
+#---------------------------------------------------------------
+# Classification
+#---------------------------------------------------------------
+
+def _origin(modules, files, chimera=None):
+    """
+    Where the first loaded module with a file comes from.
+    """
+    for name in modules:
+        filename = files.get(name)
+        if filename:
+            return _classify(os.path.abspath(filename), chimera)
+    return 'builtin'
+
+
+def _classify(filename, chimera=None):
+    if os.path.basename(filename).startswith('ChimeraExtension.'):
+        return 'extension:' + os.path.basename(os.path.dirname(filename))
+    if chimera:
+        chimera = os.path.abspath(chimera) + os.sep
+        if filename.startswith(chimera):
+            relative = filename[len(chimera):].split(os.sep)
+            if relative[0] == 'share' and len(relative) > 2:
+                return 'share:' + relative[1]
+            if 'site-packages' in relative:
+                index = relative.index('site-packages')
+                return 'chimera-bundled:' + relative[index + 1].split('.')[0]
+            return 'chimera:' + relative[0]
+    stdlib = os.path.dirname(os.__file__) + os.sep
+    if filename.startswith(stdlib) and 'site-packages' not in filename[len(stdlib):]:
+        return 'stdlib'
+    return 'user:' + _top_level(filename)
+
+
+def _top_level(filename):
+    """
+    Outermost package directory containing `filename` (or the module name).
+    """
+    directory, name = os.path.split(filename)
+    name = name.split('.')[0]
+    while any(os.path.isfile(os.path.join(directory, '__init__' + ext))
+              for ext in ('.py', '.pyc')):
+        directory, name = os.path.split(directory)
+    return name
+
+
+def _kib(rss):
+    return '-' if rss is None else rss // 1024
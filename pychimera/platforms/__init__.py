@@ -18,9 +18,13 @@ else:
 
 
 def patch_environ_for_platform(*args, **kwargs):
+    """
+    Returns the number of duplicated or missing PYTHONPATH entries removed.
+    """
     _patch_envvars(*args, **kwargs)
-    _patch_paths(*args, **kwargs)
+    removed = _patch_paths(*args, **kwargs)
     _patch_libraries(*args, **kwargs)
+    return removed
 
 
 __all__ = ('_INSTRUCTIONS',
@@ -28,6 +32,7 @@ __all__ = ('_INSTRUCTIONS',
            'CHIMERA_PREFIX',
            'CHIMERA_LOCATIONS',
            'NULL',
+           'PYCHIMERA_CACHE',
            'patch_environ_for_platform',
            'patch_gui_icon',
            'launch_ipython')
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+
+
+def build_search_path(entries, separator=os.pathsep, prune=True):
+    """
+    Join search path entries (for PYTHONPATH and friends), keeping only the
+    first occurrence of each one and dropping those that do not exist, so
+    the interpreter does not stat them again and again on every import.
+    Empty entries (current directory) are kept.
+
+    Parameters
+    ----------
+    entries : list of str
+        Entries in order of precedence.
+    separator : str, optional, default=os.pathsep
+    prune : bool, optional, default=True
+        If False, join the entries as they are.
+
+    Returns
+    -------
+    path : str
+    removed : int
+        Number of duplicated or missing entries left out.
+    """
+    if not prune:
+        return separator.join(entries), 0
+    kept, seen = [], set()
+    for entry in entries:
+        key = os.path.normcase(os.path.abspath(entry)) if entry else entry
+        if key in seen or (entry and not os.path.exists(entry)):
+            continue
+        seen.add(key)
+        kept.append(entry)
+    return separator.join(kept), len(entries) - len(kept)
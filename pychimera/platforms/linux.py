@@ -3,6 +3,7 @@
 
 import os
 import sys
+from .common import build_search_path
 
 
 CHIMERA_BINARY = 'chimera'
@@ -10,6 +11,7 @@ CHIMERA_PREFIX = 'UCSF-Chimera*'
 CHIMERA_LOCATIONS = ('/opt',
                      os.path.expanduser('~/.local'))
 NULL = os.devnull
+PYCHIMERA_CACHE = os.path.join(os.environ.get('XDG_CACHE_HOME', '~/.cache'), 'pychimera')
 
 def _patch_envvars(basedir, libdir, nogui=True):
     os.environ['TERM'] = "xterm-256color"
@@ -17,7 +19,7 @@ def _patch_envvars(basedir, libdir, nogui=True):
 
 
 def _patch_paths(basedir, libdir, nogui=True):
-    os.environ['PYTHONPATH'] = ':'.join(
+    os.environ['PYTHONPATH'], removed = build_search_path(
 	    [os.path.join(basedir, 'share'),
 	     os.path.join(basedir, 'bin')]  +
 	    (sys.path if nogui else []) +
@@ -30,7 +32,9 @@ def _patch_paths(basedir, libdir, nogui=True):
 	     os.path.join(libdir, 'python2.7', 'lib-old'),
 	     os.path.join(libdir, 'python2.7', 'lib-dynload'),
 	     os.path.join(libdir, 'python2.7', 'site-packages')] +
-         (sys.path if sys.executable == '/usr/bin/python' and not nogui else []))
+         (sys.path if sys.executable == '/usr/bin/python' and not nogui else []),
+        separator=':')
+    return removed
 
 
 def _patch_libraries(basedir, libdir, nogui=True):
@@ -81,6 +85,7 @@ __all__ = ('CHIMERA_BINARY',
            'CHIMERA_PREFIX',
            'CHIMERA_LOCATIONS',
            'NULL',
+           'PYCHIMERA_CACHE',
            '_patch_envvars',
            '_patch_paths',
            '_patch_libraries',
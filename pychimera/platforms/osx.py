@@ -3,6 +3,7 @@
 
 import os
 import sys
+from .common import build_search_path
 from .linux import (_patch_envvars as _patch_envvars_linux,
                     launch_ipython)
 
@@ -13,6 +14,7 @@ CHIMERA_LOCATIONS = ('/Applications',
                      os.path.expanduser('~/.local'),
                      os.path.expanduser('~/Desktop'))
 NULL = os.devnull
+PYCHIMERA_CACHE = '~/Library/Caches/pychimera'
 
 def _patch_envvars(basedir, libdir, nogui=True):
     _patch_envvars_linux(basedir, libdir, nogui)
@@ -21,7 +23,7 @@ def _patch_envvars(basedir, libdir, nogui=True):
 
 
 def _patch_paths(basedir, libdir, nogui=True):
-    os.environ['PYTHONPATH'] = ':'.join(
+    os.environ['PYTHONPATH'], removed = build_search_path(
         [os.path.join(basedir, 'share'),
          os.path.join(basedir, 'bin'),
          os.path.join(libdir),
@@ -34,8 +36,9 @@ def _patch_paths(basedir, libdir, nogui=True):
          os.path.join(libdir, 'python2.7', 'lib-old'),
          os.path.join(libdir, 'python2.7', 'lib-dynload'),
          os.path.join(libdir, 'python2.7', 'site-packages')]
-         + sys.path
-         )
+         + sys.path,
+        separator=':')
+    return removed
 
 
 def _patch_libraries(basedir, libdir, nogui=True):
@@ -63,6 +66,7 @@ __all__ = ('CHIMERA_BINARY',
            'CHIMERA_PREFIX',
            'CHIMERA_LOCATIONS',
            'NULL',
+           'PYCHIMERA_CACHE',
            '_patch_envvars',
            '_patch_paths',
            '_patch_libraries',
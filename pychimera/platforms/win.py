@@ -5,11 +5,13 @@ import os
 import sys
 from tempfile import mkstemp as _mkstemp
 from distutils.spawn import find_executable as _find_executable
+from .common import build_search_path
 
 CHIMERA_BINARY = 'chimera.exe'
 CHIMERA_PREFIX = 'Chimera*'
 CHIMERA_LOCATIONS = map(os.getenv, ('PROGRAMFILES', 'PROGRAMFILES(X86)', 'PROGRAMW6432'))
 _fh, NULL = _mkstemp(suffix='.py')
+PYCHIMERA_CACHE = os.path.join(os.environ.get('LOCALAPPDATA', '~'), 'pychimera')
 
 
 def _patch_envvars(*args, **kwargs):
@@ -25,7 +27,7 @@ def _patch_paths(basedir, libdir, nogui=True):
                                    os.path.join(basedir, 'bin', 'DLLs'),
                                    os.path.join(basedir, 'bin', 'lib'),
                                    os.environ['PATH']])
-    os.environ['PYTHONPATH'] = ';'.join(
+    os.environ['PYTHONPATH'], removed = build_search_path(
         [os.path.join(basedir, 'share'),
          os.path.join(basedir, 'bin')]
         + (sys.path if nogui else []) +
@@ -38,7 +40,9 @@ def _patch_paths(basedir, libdir, nogui=True):
          os.path.join(basedir, 'bin', 'lib', 'plat-win'),
          os.path.join(basedir, 'bin', 'lib', 'site-packages'),
          os.path.join(basedir, 'bin', 'lib', 'site-packages', 'PIL'),
-         basedir])
+         basedir],
+        separator=';')
+    return removed
 
 
 def launch_ipython(argv=None):
@@ -63,6 +67,7 @@ __all__ = ('CHIMERA_BINARY',
            'CHIMERA_PREFIX',
            'CHIMERA_LOCATIONS',
            'NULL',
+           'PYCHIMERA_CACHE',
            '_patch_envvars',
            '_patch_paths',
            '_patch_libraries',
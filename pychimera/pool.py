@@ -0,0 +1,826 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Pool of pre-initialized Chimera workers
+
+:class:`ChimeraPool` is a :class:`concurrent.futures.Executor` whose worker
+processes initialize Chimera once and then run many tasks, which can use
+``chimera`` directly::
+
+    import pychimera
+    pychimera.patch_environ()
+    from pychimera.pool import ChimeraPool
+
+    def count_atoms(path):
+        import chimera
+        return sum(m.numAtoms for m in chimera.openModels.open(path))
+
+    with ChimeraPool(max_workers=8) as pool:
+        counts = list(pool.map(count_atoms, paths))
+
+The environment must be patched already (``patch_environ`` or a ``pychimera``
+launch) so the workers can load the Chimera libraries. Each worker runs one
+task at a time; a parent thread hands pending tasks to idle workers.
+
+Tasks that work on the same input can be scheduled with an affinity key,
+usually the path of that input. They are sent to a worker that already
+opened it with :func:`worker_open`, instead of being opened again::
+
+    from pychimera.pool import ChimeraPool, worker_open
+
+    def count_atoms(path):
+        return sum(m.numAtoms for m in worker_open(path))
+
+    with ChimeraPool(max_workers=8) as pool:
+        futures = [pool.schedule(count_atoms, (path,), affinity=path) for path in paths]
+
+:func:`fork_map` runs on the same workers, forked from a process that has
+already loaded its data, so they share it instead of loading it again.
+
+On Python 2, the ``futures`` backport is needed (``pip install futures``).
+"""
+
+from __future__ import print_function
+from collections import OrderedDict, deque
+import atexit
+import itertools
+import multiprocessing
+import os
+import select
+import signal
+import sys
+import threading
+import time
+import traceback
+import weakref
+try:
+    import cPickle as pickle
+except ImportError:  # Python 3
+    import pickle
+
+try:
+    from concurrent.futures import Executor, Future, as_completed
+except ImportError:
+    raise ImportError('ChimeraPool needs concurrent.futures. On Python 2, install '
+                      'the futures backport with `pip install futures`.')
+
+from .profiling import _rss
+from .threads import available_cpus, limit_threads, pin_cpus, thread_count, worker_cpus
+
+_POLL_INTERVAL = 0.1
+# Seconds a timed out worker gets to dump its stack before being killed
+_DUMP_GRACE = 1.0
+_POOLS = weakref.WeakSet()
+# Functions and items of running fork_map calls, inherited by forked workers
+_FORKED = {}
+_FORK_TOKENS = itertools.count()
+# Models opened by worker_open in this worker, least recently used first
+_MODEL_CACHE = OrderedDict()
+_MODEL_CACHE_SIZE = [4]
+
+
+class WorkerLost(RuntimeError):
+    """
+    A worker process died while running a task.
+    """
+
+
+class TaskTimeout(RuntimeError):
+    """
+    A task ran for longer than its timeout. Its worker was killed.
+    """
+
+
+class BrokenPool(RuntimeError):
+    """
+    The workers could not initialize Chimera.
+    """
+
+
+class ChimeraPool(Executor):
+
+    """
+    Executor running tasks in worker processes with Chimera initialized.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        Number of worker processes. Defaults to the number of CPUs.
+    init_profile : {'default', 'minimal'}, optional, default='default'
+        Chimera initialization profile for the workers. See
+        :func:`pychimera.core.enable_chimera`.
+    initializer : callable, optional
+        Called with `initargs` in each worker, after initializing Chimera.
+    initargs : tuple, optional
+    max_tasks_per_worker : int, optional
+        Retire workers after running this many tasks. Their replacement is
+        started while they run their last task.
+    max_rss_mb : float, optional
+        Retire workers whose resident memory exceeds this many MiB after a task.
+    models_per_worker : int, optional, default=4
+        Inputs each worker keeps open with :func:`worker_open`. The least
+        recently used one is closed to open a new one.
+    task_timeout : float, optional
+        Seconds a task can run before it fails with :class:`TaskTimeout`.
+        The stack of its worker is dumped to `stack_log`, and the worker
+        is killed and replaced. Can be set per task with :meth:`schedule`.
+    stack_log : str, optional
+        File where the stacks of timed out workers are appended. Defaults
+        to stderr.
+    threads : int, 'auto' or None, optional, default='auto'
+        Threads each worker gives to the BLAS and OpenMP runtimes. ``'auto'``
+        divides the available CPUs among the workers, unless the thread env
+        vars (``OMP_NUM_THREADS``...) are set already. None leaves them alone.
+    pin : bool, optional, default=False
+        Pin each worker to its own block of `threads` CPUs.
+
+    Attributes
+    ----------
+    stats : dict
+        Counters of ``tasks_completed``, ``workers_started``, ``workers_lost``,
+        workers retired because of the task limit (``recycled_tasks``) or the
+        memory limit (``recycled_rss``), tasks with an affinity key sent to
+        a worker that had it open (``affinity_hits``) or not
+        (``affinity_misses``), and ``tasks_timed_out``.
+    """
+
+    def __init__(self, max_workers=None, init_profile='default', initializer=None,
+                 initargs=(), max_tasks_per_worker=None, max_rss_mb=None,
+                 models_per_worker=4, task_timeout=None, stack_log=None, threads='auto',
+                 pin=False):
+        if 'CHIMERA' not in os.environ:
+            raise RuntimeError('The environment is not patched for Chimera. Call '
+                               'pychimera.patch_environ() first or launch with pychimera.')
+        if max_workers is not None and max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+        if max_tasks_per_worker is not None and max_tasks_per_worker <= 0:
+            raise ValueError('max_tasks_per_worker must be greater than 0')
+        if models_per_worker <= 0:
+            raise ValueError('models_per_worker must be greater than 0')
+        if task_timeout is not None and task_timeout <= 0:
+            raise ValueError('task_timeout must be greater than 0')
+        self._max_workers = max_workers or multiprocessing.cpu_count()
+        self._threads = thread_count(threads, self._max_workers)
+        self._cpus = available_cpus() if pin and self._threads else None
+        self._worker_options = {'init_profile': init_profile, 'initializer': initializer,
+                                'initargs': tuple(initargs),
+                                'models_per_worker': models_per_worker,
+                                'stack_log': stack_log, 'threads': self._threads,
+                                'override_threads': threads != 'auto'}
+        self._wakeup_reader, self._wakeup_writer = multiprocessing.Pipe(duplex=False)
+        self._wakeup_lock = threading.Lock()
+        self._pending = {}  # affinity key -> deque of tasks, in submission order
+        self._futures = {}
+        self._workers = {}
+        self._retiring = []
+        self._max_tasks = max_tasks_per_worker
+        self._max_rss = max_rss_mb * 2 ** 20 if max_rss_mb else None
+        self._models_per_worker = models_per_worker
+        self._task_timeout = task_timeout
+        self._stack_log = stack_log
+        self.stats = dict.fromkeys(['tasks_completed', 'workers_started', 'workers_lost',
+                                    'recycled_tasks', 'recycled_rss', 'affinity_hits',
+                                    'affinity_misses', 'tasks_timed_out'], 0)
+        self._task_ids = itertools.count()
+        self._worker_ids = itertools.count()
+        self._lock = threading.Lock()
+        self._shutdown = False
+        self._broken = None
+        for _ in range(self._max_workers):
+            self._start_worker()
+        self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                            name='ChimeraPool dispatcher')
+        self._dispatcher.daemon = True
+        self._dispatcher.start()
+        _POOLS.add(self)
+
+    def submit(self, fn, *args, **kwargs):
+        return self.schedule(fn, args, kwargs)
+    submit.__doc__ = Executor.submit.__doc__
+
+    def schedule(self, fn, args=(), kwargs=None, affinity=None, timeout=None):
+        """
+        Schedule ``fn(*args, **kwargs)`` like :meth:`submit`, with an
+        affinity key.
+
+        Tasks with a key go to an idle worker that ran a task with the same
+        key recently, and so has its input open if the task used
+        :func:`worker_open`. Idle workers with none of those take the
+        tasks whose key no other worker holds, or, if there are none, steal
+        the oldest pending task.
+
+        Parameters
+        ----------
+        fn : callable
+        args : tuple, optional
+        kwargs : dict, optional
+        affinity : hashable, optional
+            Usually the path passed to :func:`worker_open` by the task.
+        timeout : float, optional
+            Seconds the task can run. Defaults to `task_timeout`.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+        """
+        with self._lock:
+            if self._broken:
+                raise BrokenPool(self._broken)
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+            future = Future()
+            task = _Task(next(self._task_ids), fn, tuple(args), kwargs or {}, affinity,
+                         timeout or self._task_timeout)
+            self._futures[task.id] = future
+            self._pending.setdefault(affinity, deque()).append(task)
+        self._wakeup()
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+        Stop accepting tasks and free the workers when the pending ones are done.
+
+        Parameters
+        ----------
+        wait : bool, optional, default=True
+            Wait until all pending tasks are done and the workers exited.
+        cancel_futures : bool, optional, default=False
+            Cancel the tasks that have not started yet. Running ones finish.
+        """
+        with self._lock:
+            self._shutdown = True
+        if cancel_futures:
+            self.cancel_pending()
+        self._wakeup()
+        if wait:
+            self._dispatcher.join()
+
+    def cancel_pending(self):
+        """
+        Cancel the tasks that have not started yet, and free their arguments.
+
+        Returns
+        -------
+        cancelled : int
+            Number of futures cancelled.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        cancelled = 0
+        for queue in pending.values():
+            for task in queue:
+                future = self._futures.pop(task.id, None)
+                if future is not None and future.cancel():
+                    future.set_running_or_notify_cancel()
+                    cancelled += 1
+        self._wakeup()
+        return cancelled
+
+    #---------------------------------------------------------------
+    # Dispatcher thread
+    #---------------------------------------------------------------
+
+    def _dispatch_loop(self):
+        try:
+            checked = time.time()
+            while True:
+                self._assign_tasks()
+                if self._shutdown and not self._pending and not self._busy_workers():
+                    break
+                self._receive()
+                if time.time() - checked >= _POLL_INTERVAL:
+                    self._check_workers()
+                    checked = time.time()
+        except BaseException:
+            self._break('The dispatcher thread failed:\n' + traceback.format_exc())
+            raise
+        finally:
+            self._stop_workers()
+
+    def _assign_tasks(self):
+        idle = [w for w in self._workers.values() if w.ready and w.task is None]
+        while idle:
+            worker = idle[-1]
+            with self._lock:
+                task = self._next_task(worker)
+            if task is None:
+                return
+            future = self._futures[task.id]
+            if not future.set_running_or_notify_cancel():
+                del self._futures[task.id]
+                continue
+            try:
+                payload = pickle.dumps((task.id, task.fn, task.args, task.kwargs),
+                                       pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                del self._futures[task.id]
+                future.set_exception(e)
+                continue
+            idle.pop()
+            if task.affinity is not None:
+                self._hold(worker, task.affinity)
+            worker.task = task.id
+            worker.task_name = getattr(task.fn, '__name__', repr(task.fn))
+            worker.started = time.time()
+            worker.deadline = worker.started + task.timeout if task.timeout else None
+            worker.assigned += 1
+            worker.inbox.put(payload)
+            if self._max_tasks and worker.assigned >= self._max_tasks:
+                self._replace(worker)  # pre-warm it while the last task runs
+
+    def _next_task(self, worker):
+        """
+        Pop the task `worker` should run next: the oldest one whose affinity
+        key it holds, else the oldest one with no key or a key no other
+        worker holds, else the oldest one.
+        """
+        if not self._pending:
+            return None
+        oldest = lambda key: self._pending[key][0].id
+        own = [key for key in worker.held if key in self._pending]
+        if own:
+            key = min(own, key=oldest)
+        else:
+            held = set()
+            for other in self._workers.values():
+                if other is not worker:
+                    held.update(other.held)
+            free = [key for key in self._pending if key is None or key not in held]
+            key = min(free or self._pending, key=oldest)
+        queue = self._pending[key]
+        task = queue.popleft()
+        if not queue:
+            del self._pending[key]
+        return task
+
+    def _hold(self, worker, key):
+        """
+        Track the inputs `worker` keeps open, mirroring :func:`worker_open`.
+        """
+        if key in worker.held:
+            self.stats['affinity_hits'] += 1
+            del worker.held[key]
+        else:
+            self.stats['affinity_misses'] += 1
+            if len(worker.held) >= self._models_per_worker:
+                worker.held.popitem(last=False)
+        worker.held[key] = True
+
+    def _receive(self):
+        """
+        Handle the messages of the workers, waiting up to the poll interval.
+
+        Each worker writes to its own pipe: a worker killed while writing
+        can't leave a lock held for the others, as a shared queue would.
+        """
+        workers = dict((w.results, w) for w in self._workers.values() if w.results)
+        for conn in _wait([self._wakeup_reader] + list(workers), _POLL_INTERVAL):
+            if conn is self._wakeup_reader:
+                while conn.poll():
+                    conn.recv_bytes()
+                continue
+            try:
+                message = conn.recv_bytes()
+            except (EOFError, IOError, OSError):  # it died; _check_workers will tell
+                workers[conn].results = None
+                conn.close()
+                continue
+            self._handle(pickle.loads(message))
+
+    def _handle(self, message):
+        kind, worker_id = message[:2]
+        worker = self._workers.get(worker_id)
+        if worker is None:
+            return
+        if kind == 'ready':
+            worker.ready = True
+        elif kind == 'done':
+            task_id, ok, value, rss = message[2:]
+            worker.task = None
+            self.stats['tasks_completed'] += 1
+            future = self._futures.pop(task_id, None)
+            if future is None:  # failed already, when the pool broke
+                pass
+            elif ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+            if self._max_tasks and worker.assigned >= self._max_tasks:
+                self._retire(worker, 'recycled_tasks')
+            elif self._max_rss and rss and rss > self._max_rss:
+                self._retire(worker, 'recycled_rss')
+        elif kind == 'init_failed':
+            self._break('A worker could not initialize Chimera:\n' + message[2])
+
+    def _retire(self, worker, reason):
+        """
+        Stop sending tasks to `worker`, let it exit and start its replacement.
+        """
+        del self._workers[worker.id]
+        worker.inbox.put(None)
+        self._retiring.append(worker)
+        self.stats[reason] += 1
+        self._replace(worker)
+
+    def _replace(self, worker):
+        """
+        Start a replacement for `worker`, once, if there is work left.
+        """
+        if not worker.replaced and (self._pending or not self._shutdown):
+            worker.replaced = True
+            self._start_worker()
+
+    def _check_workers(self):
+        now = time.time()
+        for worker in self._retiring[:]:
+            if not worker.process.is_alive():
+                worker.process.join()
+                worker.close()
+                self._retiring.remove(worker)
+            elif worker.kill_at is not None and now >= worker.kill_at:
+                _kill(worker.process)
+                worker.kill_at = None
+        for worker in list(self._workers.values()):
+            if worker.process.is_alive():
+                if worker.task is not None and worker.deadline and now >= worker.deadline:
+                    self._time_out(worker)
+                continue
+            del self._workers[worker.id]
+            worker.process.join()
+            worker.close()
+            self.stats['workers_lost'] += 1
+            if not worker.ready:
+                self._break('A worker died while initializing Chimera '
+                            '(exit code {})'.format(worker.process.exitcode))
+                return
+            if worker.task is not None:
+                self._futures.pop(worker.task).set_exception(WorkerLost(
+                    'Worker {} died while running a task (exit code {})'.format(
+                    worker.process.pid, worker.process.exitcode)))
+            self._replace(worker)
+
+    def _time_out(self, worker):
+        """
+        Fail the task of `worker`, dump its stack, kill it and replace it.
+        """
+        del self._workers[worker.id]
+        self.stats['tasks_timed_out'] += 1
+        message = 'Task {} ({}) timed out after {:.1f} s in worker {}'.format(
+            worker.task, worker.task_name, time.time() - worker.started, worker.process.pid)
+        worker.kill_at = time.time()
+        if hasattr(signal, 'SIGUSR1'):
+            log = open(self._stack_log, 'a') if self._stack_log else sys.stderr
+            try:
+                log.write(message + '. Stack:\n')
+                log.flush()
+            finally:
+                if log is not sys.stderr:
+                    log.close()
+            try:
+                os.kill(worker.process.pid, signal.SIGUSR1)
+                worker.kill_at += _DUMP_GRACE
+            except OSError:
+                pass
+        self._retiring.append(worker)
+        self._futures.pop(worker.task).set_exception(TaskTimeout(message))
+        worker.task = None
+        self._replace(worker)
+
+    def _break(self, reason):
+        """
+        Fail all pending and running tasks and stop accepting new ones.
+        """
+        with self._lock:
+            self._broken = reason
+            self._shutdown = True
+            pending, self._pending = self._pending, {}
+        for queue in pending.values():
+            for task in queue:
+                self._futures[task.id].set_running_or_notify_cancel()
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(BrokenPool(reason))
+        self._futures.clear()
+        for worker in self._workers.values():
+            worker.task = None
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+    def _busy_workers(self):
+        return [w for w in self._workers.values() if w.task is not None]
+
+    #---------------------------------------------------------------
+    # Workers
+    #---------------------------------------------------------------
+
+    def _start_worker(self):
+        worker_id = next(self._worker_ids)
+        slot = _free_slot(self._max_workers, [w.slot for w in self._workers.values()],
+                          [w.slot for w in self._retiring])
+        options = dict(self._worker_options)
+        if self._cpus:
+            options['cpus'] = worker_cpus(slot, self._threads, self._cpus)
+        inbox = multiprocessing.Queue()
+        results, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_worker_main,
+                                          name='ChimeraPool-{}'.format(worker_id),
+                                          args=(worker_id, inbox, writer), kwargs=options)
+        process.daemon = True
+        process.start()
+        writer.close()  # so reading fails once the worker is gone
+        self._workers[worker_id] = _Worker(worker_id, process, inbox, results, slot)
+        self.stats['workers_started'] += 1
+
+    def _stop_workers(self):
+        for worker in self._workers.values():
+            if worker.process.is_alive():
+                worker.inbox.put(None)
+        for worker in self._retiring:
+            if worker.kill_at is not None:  # timed out, let it finish dumping its stack
+                time.sleep(max(0, worker.kill_at - time.time()))
+                _kill(worker.process)
+        for worker in list(self._workers.values()) + self._retiring:
+            worker.process.join()
+            worker.close()
+        self._workers.clear()
+        del self._retiring[:]
+
+    def _wakeup(self):
+        with self._wakeup_lock:
+            self._wakeup_writer.send_bytes(b'.')
+
+
+def fork_map(func, items, processes=None, ordered=True, chunksize=1,
+             max_tasks_per_worker=None, max_rss_mb=None, timeout=None, stack_log=None,
+             threads='auto', pin=False):
+    """
+    Apply `func` to each of `items` in forked worker processes that share,
+    copy-on-write, everything loaded in this process so far (Chimera
+    models, maps, any setup done by your code).
+
+    Neither `func` nor `items` are pickled: workers are forked after they
+    are stored, and only item indices and results travel between processes.
+    `func` can be a closure or a lambda, and `items` can be Chimera objects.
+    Chimera must be enabled in this process, on a platform with ``fork``.
+
+    Parameters
+    ----------
+    func : callable
+    items : iterable
+        Consumed before the workers are started.
+    processes : int, optional
+        Number of workers. Defaults to the number of CPUs.
+    ordered : bool, optional, default=True
+        Yield results in the order of `items`. Otherwise, yield them as
+        they are completed.
+    chunksize : int, optional, default=1
+        Items sent to a worker at once. Larger chunks reduce overhead for
+        quick calls.
+    max_tasks_per_worker, max_rss_mb : optional
+        Worker recycling limits, counted in chunks. See :class:`ChimeraPool`.
+    timeout : float, optional
+        Seconds each chunk can run before raising :class:`TaskTimeout`.
+    stack_log : str, optional
+        File where the stacks of timed out workers are appended.
+    threads, pin : optional
+        Thread limits and CPU pinning of the workers. See :class:`ChimeraPool`.
+        The workers inherit the runtimes this process loaded already, so
+        they are only limited if ``threadpoolctl`` is installed.
+
+    Returns
+    -------
+    results : iterator
+        Results of `func`, which must be picklable. Exceptions raised by
+        `func` are raised when their result is reached.
+    """
+    from . import core
+    if not hasattr(os, 'fork'):
+        raise RuntimeError('fork_map needs a platform with fork. Use ChimeraPool instead.')
+    if not core._enabled:
+        raise RuntimeError('fork_map must be called after enable_chimera, so the workers '
+                           'inherit an initialized Chimera.')
+    items = list(items)
+    token = next(_FORK_TOKENS)
+    _FORKED[token] = func, items
+    chunks = [range(i, min(i + chunksize, len(items))) for i in range(0, len(items), chunksize)]
+    try:
+        pool = ChimeraPool(max_workers=min(processes or multiprocessing.cpu_count(),
+                                           max(len(chunks), 1)),
+                           max_tasks_per_worker=max_tasks_per_worker, max_rss_mb=max_rss_mb,
+                           task_timeout=timeout, stack_log=stack_log, threads=threads,
+                           pin=pin)
+        futures = [pool.submit(_forked_call, token, chunk[0], len(chunk)) for chunk in chunks]
+    except BaseException:
+        del _FORKED[token]
+        raise
+
+    def results():
+        try:
+            for future in (futures if ordered else as_completed(futures)):
+                for result in future.result():
+                    yield result
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            _FORKED.pop(token, None)
+
+    return results()
+
+
+def _forked_call(token, start, count):
+    func, items = _FORKED[token]
+    return [func(item) for item in items[start:start + count]]
+
+
+def worker_open(path, **kwargs):
+    """
+    Open `path` with ``chimera.openModels.open``, unless this worker opened
+    it already and its models are still open. Use it in tasks scheduled with
+    ``affinity=path``. Each worker keeps ``models_per_worker`` inputs open
+    (see :class:`ChimeraPool`) and closes the least recently used one to
+    open a new one.
+
+    Parameters
+    ----------
+    path : str
+    kwargs :
+        Passed to ``chimera.openModels.open`` the first time.
+
+    Returns
+    -------
+    models : list of chimera.Model
+    """
+    import chimera
+    models = _MODEL_CACHE.pop(path, None)
+    if models is None or not _still_open(models):
+        while len(_MODEL_CACHE) >= _MODEL_CACHE_SIZE[0]:
+            _, evicted = _MODEL_CACHE.popitem(last=False)
+            still_open = set(chimera.openModels.list())
+            chimera.openModels.close([m for m in evicted if m in still_open])
+        models = chimera.openModels.open(path, **kwargs)
+    _MODEL_CACHE[path] = models
+    return models
+
+
+def _still_open(models):
+    import chimera
+    still_open = set(chimera.openModels.list())
+    return all(m in still_open for m in models)
+
+
+class _Task(object):
+
+    __slots__ = ('id', 'fn', 'args', 'kwargs', 'affinity', 'timeout')
+
+    def __init__(self, id, fn, args, kwargs, affinity=None, timeout=None):
+        self.id = id
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.affinity = affinity
+        self.timeout = timeout
+
+
+class _Worker(object):
+
+    def __init__(self, id, process, inbox, results, slot=0):
+        self.id = id
+        self.process = process
+        self.inbox = inbox
+        self.results = results
+        self.slot = slot  # which block of CPUs it gets, if pinned
+        self.ready = False
+        self.task = None
+        self.task_name = None
+        self.started = None
+        self.deadline = None
+        self.kill_at = None
+        self.assigned = 0
+        self.replaced = False
+        self.held = OrderedDict()  # affinity keys, least recently used first
+
+    def close(self):
+        self.inbox.close()
+        if self.results is not None:
+            self.results.close()
+            self.results = None
+
+
+def _free_slot(slots, live, exiting=()):
+    """
+    Slot (block of CPUs) for a new worker, out of `slots`: one that neither
+    the `live` workers nor the `exiting` ones have, if any. Otherwise, one of
+    an exiting worker, which only shares its CPUs until it is gone.
+    """
+    free = [slot for slot in range(slots) if slot not in live]
+    return min([slot for slot in free if slot not in exiting] or free or [len(live)])
+
+
+def _wait(connections, timeout):
+    """
+    Connections in `connections` with data to read, waiting up to `timeout`.
+    """
+    try:
+        from multiprocessing.connection import wait
+    except ImportError:  # Python 2
+        if sys.platform != 'win32':
+            return select.select(connections, [], [], timeout)[0]
+        deadline = time.time() + timeout
+        while True:
+            ready = [c for c in connections if c.poll()]
+            if ready or time.time() >= deadline:
+                return ready
+            time.sleep(0.005)
+    return wait(connections, timeout)
+
+
+def _worker_main(worker_id, inbox, results, init_profile='default', initializer=None,
+                 initargs=(), models_per_worker=4, stack_log=None, threads=None,
+                 override_threads=False, cpus=None):
+    """
+    Worker process: initialize Chimera, then run tasks until told to stop.
+    """
+    _MODEL_CACHE.clear()  # forked workers don't own the models of their parent
+    _MODEL_CACHE_SIZE[0] = models_per_worker
+    _install_stack_dump(stack_log)
+    if threads:
+        limit_threads(threads, override=override_threads)
+    if cpus:
+        pin_cpus(cpus)
+    try:
+        from .core import enable_chimera
+        enable_chimera(profile=init_profile)
+        if initializer is not None:
+            initializer(*initargs)
+    except BaseException:
+        results.send_bytes(pickle.dumps(('init_failed', worker_id, traceback.format_exc())))
+        return
+    results.send_bytes(pickle.dumps(('ready', worker_id)))
+    while True:
+        payload = inbox.get()
+        if payload is None:
+            break
+        task_id, fn, args, kwargs = pickle.loads(payload)
+        try:
+            outcome = True, fn(*args, **kwargs)
+        except BaseException as e:
+            outcome = False, _remote_exception(e)
+        try:
+            message = pickle.dumps(('done', worker_id, task_id) + outcome + (_rss(),),
+                                   pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            message = pickle.dumps(('done', worker_id, task_id, False, _remote_exception(e),
+                                    _rss()), pickle.HIGHEST_PROTOCOL)
+        results.send_bytes(message)
+
+
+def _install_stack_dump(path=None):
+    """
+    Dump the stack of all threads to `path` (or stderr) on SIGUSR1. With
+    ``faulthandler``, this works even if the worker is stuck in C code.
+    """
+    if not hasattr(signal, 'SIGUSR1'):
+        return
+    stream = open(path, 'a') if path else sys.stderr
+    try:
+        import faulthandler
+        faulthandler.register(signal.SIGUSR1, file=stream, all_threads=True)
+    except (ImportError, AttributeError):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: _dump_stacks(stream, frame))
+
+
+def _dump_stacks(stream, interrupted):
+    current = threading.current_thread().ident
+    for thread_id, frame in sys._current_frames().items():
+        stream.write('Thread 0x{:x}:\n'.format(thread_id))
+        traceback.print_stack(interrupted if thread_id == current else frame, file=stream)
+    stream.flush()
+
+
+def _kill(process):
+    try:
+        os.kill(process.pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+    except OSError:  # already gone
+        pass
+
+
+def _remote_exception(exc):
+    """
+    `exc` with the worker traceback attached as ``remote_traceback``, or a
+    RuntimeError describing it if it can't be pickled.
+    """
+    text = traceback.format_exc()
+    try:
+        exc.remote_traceback = text
+        pickle.dumps(exc, pickle.HIGHEST_PROTOCOL)
+        return exc
+    except Exception:
+        error = RuntimeError('{}: {}'.format(type(exc).__name__, exc))
+        error.remote_traceback = text
+        return error
+
+
+@atexit.register
+def _shutdown_pools():
+    for pool in list(_POOLS):
+        pool.shutdown(wait=True)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Startup profiling
+
+Phases of a PyChimera launch are timestamped with :class:`phase`. When
+profiling is enabled (``pychimera --profile-startup`` or the
+``PYCHIMERA_PROFILE`` env var, which holds the report path), the events
+recorded before the ``os.execve`` restart are carried over to the new
+interpreter through the environment, and the final process writes a
+Chrome trace (open it in ``chrome://tracing`` or Perfetto) with wall time,
+CPU time and RSS for each phase.
+"""
+
+from __future__ import division
+from functools import wraps
+import os
+import sys
+import time
+
+_ENV_OUTPUT = 'PYCHIMERA_PROFILE'
+_ENV_EVENTS = 'PYCHIMERA_PROFILE_EVENTS'
+_ENV_RESTART = 'PYCHIMERA_PROFILE_RESTART'
+# Phases are recorded even when profiling is off; don't let long-running
+# processes (pool workers, servers) pile them up
+_MAX_EVENTS = 1000
+_EVENTS = []
+_REPORT_REGISTERED = []
+
+
+def enabled():
+    return _ENV_OUTPUT in os.environ
+
+
+def enable(path):
+    """
+    Enable profiling for this process and the ones it restarts into,
+    writing the report to `path` on exit.
+    """
+    os.environ[_ENV_OUTPUT] = os.path.abspath(path)
+    _register_report()
+
+
+class phase(object):
+    """
+    Context manager (or decorator) recording a named startup phase.
+
+    Phases are always recorded, since timestamps are cheap, so the ones
+    that finish before profiling is enabled (e.g. CLI parsing) are not
+    lost. RSS is only sampled if profiling is enabled. Only the first
+    ``_MAX_EVENTS`` phases since the last report are kept.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self._start = _sample(rss=enabled())
+        return self
+
+    def __exit__(self, *exc_info):
+        _record(self.name, self._start, _sample(rss=enabled()))
+
+    def __call__(self, func):
+        @wraps(func)
+        def wrapped(*args, **kwargs):
+            with phase(self.name):
+                return func(*args, **kwargs)
+        return wrapped
+
+
+def before_restart():
+    """
+    Pass the recorded events to the interpreter started by ``os.execve``.
+    """
+    if enabled():
+        import json
+        os.environ[_ENV_EVENTS] = json.dumps(_EVENTS)
+        os.environ[_ENV_RESTART] = json.dumps(_sample())
+
+
+def write_report(path=None):
+    """
+    Write the recorded phases as a Chrome trace, and forget them.
+
+    Parameters
+    ----------
+    path : str, optional
+        Defaults to the path in ``PYCHIMERA_PROFILE``.
+    """
+    path = path or os.environ.get(_ENV_OUTPUT)
+    if not path:
+        return
+    import json
+    pid = os.getpid()
+    trace = [{'name': e['name'], 'cat': 'pychimera', 'ph': 'X', 'pid': pid, 'tid': 0,
+              'ts': round(e['ts'] * 1e6), 'dur': round(e['wall'] * 1e6),
+              'args': dict((k, e[k]) for k in ('wall', 'cpu', 'rss', 'rss_delta'))}
+             for e in sorted(_EVENTS, key=lambda e: e['ts'])]
+    report = {'traceEvents': trace, 'displayTimeUnit': 'ms',
+              'otherData': {'argv': sys.argv, 'executable': sys.executable}}
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=1)
+    del _EVENTS[:]
+
+
+def _register_report():
+    if not _REPORT_REGISTERED:
+        import atexit
+        atexit.register(write_report)
+        _REPORT_REGISTERED.append(True)
+
+
+def _sample(rss=True):
+    cpu = os.times()
+    return {'wall': time.time(), 'cpu': cpu[0] + cpu[1], 'rss': _rss() if rss else None}
+
+
+def _record(name, start, end):
+    if len(_EVENTS) >= _MAX_EVENTS:
+        return
+    _EVENTS.append({'name': name,
+                    'ts': start['wall'],
+                    'wall': end['wall'] - start['wall'],
+                    'cpu': end['cpu'] - start['cpu'],
+                    'rss': end['rss'],
+                    'rss_delta': (end['rss'] - start['rss']
+                                  if None not in (start['rss'], end['rss']) else None)})
+
+
+def _rss():
+    """
+    Current resident set size in bytes (peak RSS if /proc is not available).
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+# Events from before the restart, and the restart itself
+if _ENV_EVENTS in os.environ:
+    import json
+    _EVENTS.extend(json.loads(os.environ.pop(_ENV_EVENTS)))
+    _record('os.execve restart', json.loads(os.environ.pop(_ENV_RESTART)), _sample())
+    _register_report()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Persistent registry of UCSF Chimera installations
+
+Locating Chimera means walking every directory in ``PATH`` and globbing
+every entry of ``CHIMERA_LOCATIONS``, which can be slow on network
+filesystems. The results of that search are stored on disk together with
+the modification times of every directory involved, so subsequent launches
+only need a handful of ``stat`` calls to confirm nothing changed.
+"""
+
+from __future__ import print_function
+import os
+import re
+import sys
+from glob import glob
+
+from .cache import cache_dir, load_json, dump_json, stat_mtime
+
+REGISTRY_FORMAT = 1
+_VERSION_RE = re.compile(r'''^release\s*=\s*['"]([^'"]+)['"]''', re.M)
+_VERSION_IN_PATH_RE = re.compile(r'(\d+\.\d+(?:\.\d+)?)')
+
+
+def registry_path():
+    return os.path.join(cache_dir(), 'installations.json')
+
+
+def load_registry(binaries, directories, prefix):
+    """
+    Load the registry from disk, if it is still valid.
+
+    Parameters
+    ----------
+    binaries : list of str
+        Executable names the registry must have been built for.
+    directories : list of str
+        Installation locations the registry must have been built for.
+    prefix : str
+        Root directory glob pattern the registry must have been built for.
+
+    Returns
+    -------
+    registry : dict or None
+        None if there is no registry, or if anything relevant changed
+        since it was built.
+    """
+    registry = load_json(registry_path())
+    if not registry or registry.get('format') != REGISTRY_FORMAT:
+        return None
+    if registry.get('key') != _registry_key(binaries, directories, prefix):
+        return None
+    for path, mtime in registry['stamps'].items():
+        if stat_mtime(path) != mtime:
+            return None
+    return registry
+
+
+def scan_installations(binaries, directories, prefix):
+    """
+    Search the system for Chimera installations and store the results
+    in the on-disk registry.
+
+    Parameters
+    ----------
+    binaries : list of str
+        Executable names to look for in ``PATH``, in order of preference.
+    directories : list of str
+        Usual installation locations in this platform.
+    prefix : str
+        Root directory glob pattern in this platform.
+
+    Returns
+    -------
+    registry : dict
+    """
+    path_dirs = _path_dirs()
+    from_binary = dict((binary, binary_root(binary, path_dirs)) for binary in binaries)
+    located = locate_installations(directories, prefix)
+    roots = [r for r in list(from_binary.values()) + located if r]
+    installations = dict((root, installation_info(root)) for root in roots)
+    stamped = path_dirs + [d for d in directories if d] + roots
+    registry = {'format': REGISTRY_FORMAT,
+                'key': _registry_key(binaries, directories, prefix),
+                'stamps': dict((d, stat_mtime(d)) for d in stamped),
+                'from_binary': from_binary,
+                'located': located,
+                'installations': installations}
+    try:
+        dump_json(registry_path(), registry)
+    except (IOError, OSError) as e:
+        print('WARNING: Could not write Chimera registry: {}'.format(e), file=sys.stderr)
+    return registry
+
+
+def registered_paths(registry, binary, search_all=False):
+    """
+    Reproduce the results of a full search using the registry contents.
+
+    Returns
+    -------
+    paths : list of str
+        If found, the first one is the one the `binary` resolves to. Next
+        items are the ones found in installation locations, in descending order.
+    """
+    paths = []
+    root = registry['from_binary'].get(binary)
+    if root is not None:
+        paths.append(root)
+    else:
+        search_all = True
+    if search_all:
+        paths.extend(registry['located'])
+    seen = set()
+    return [_native(p) for p in paths if p not in seen and not seen.add(p)]
+
+
+def binary_root(binary, path_dirs=None):
+    """
+    Chimera root directory of `binary`, if it can be found in ``PATH``.
+    """
+    if path_dirs is None:
+        path_dirs = _path_dirs()
+    for directory in path_dirs:
+        binary_path = os.path.join(directory, binary)
+        if os.path.isfile(binary_path):
+            real_path = os.path.realpath(binary_path)  # follow symlinks
+            return os.path.sep + os.path.join(*real_path.split(os.path.sep)[1:-2])
+
+
+def locate_installations(directories, prefix):
+    """
+    Glob the usual installation `directories` for Chimera roots, sorted
+    in descending order within each location.
+    """
+    paths = []
+    for basedir in directories:
+        if not basedir:
+            continue
+        found_paths = sorted(filter(os.path.isdir, glob(os.path.join(basedir, prefix))),
+                             reverse=True)
+        paths.extend(found_paths)
+    return paths
+
+
+def installation_info(root):
+    """
+    Metadata of the Chimera installation at `root`.
+
+    Returns
+    -------
+    info : dict
+        Keys are ``root``, ``version`` (None if unknown), ``headless`` and
+        ``libdir``/``pythonlib`` (None if missing).
+    """
+    libdir = os.path.join(root, 'lib')
+    for pythonlib in (os.path.join(libdir, 'python2.7'), os.path.join(root, 'bin', 'lib')):
+        if os.path.isdir(pythonlib):
+            break
+    else:
+        pythonlib = None
+    return {'root': root,
+            'version': _installation_version(root),
+            'headless': 'headless' in root,
+            'libdir': libdir if os.path.isdir(libdir) else None,
+            'pythonlib': pythonlib}
+
+
+def _installation_version(root):
+    try:
+        with open(os.path.join(root, 'share', 'chimera', 'version.py')) as f:
+            match = _VERSION_RE.search(f.read())
+    except (IOError, OSError):
+        match = None
+    if match is None:
+        match = _VERSION_IN_PATH_RE.search(os.path.basename(root.rstrip(os.path.sep)))
+    return match.group(1) if match else None
+
+
+def _native(path):
+    # JSON gives unicode back in Python 2, but os.environ wants bytes
+    if not isinstance(path, str):
+        path = path.encode(sys.getfilesystemencoding() or 'utf-8')
+    return path
+
+
+def _path_dirs():
+    return [d for d in os.environ.get('PATH', os.defpath).split(os.pathsep) if d]
+
+
+def _registry_key(binaries, directories, prefix):
+    return [list(binaries), [d for d in directories if d], prefix,
+            os.environ.get('PATH', os.defpath)]
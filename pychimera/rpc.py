@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+JSON-RPC server
+
+``pychimera serve --socket PATH`` initializes Chimera once, forks a number
+of workers and answers JSON-RPC 2.0 requests on a local Unix socket, one
+JSON document per line. Each connection is served by one worker, which
+keeps its models open until the connection is closed, so a connection is
+a Chimera session. Requests are answered in order and can be pipelined:
+clients may send many before reading the responses. Batches (JSON arrays
+of requests) are supported too.
+
+:mod:`pychimera.client` is a client that also runs on Python 3.
+"""
+
+from __future__ import print_function
+import errno
+import json
+import os
+import signal
+import socket
+import sys
+import traceback
+
+from .zygote import _native
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+
+def serve(path, workers=1, verbose=False, threads='auto'):
+    """
+    Serve JSON-RPC requests on the Unix socket at `path` with `workers`
+    processes until SIGTERM or SIGINT. Chimera must be enabled already;
+    the workers are forked from this process.
+
+    Parameters
+    ----------
+    path : str
+        Socket location. A stale socket left by a previous server is replaced.
+    workers : int, optional, default=1
+        Connections served at once. Workers that die are replaced.
+    verbose : bool, optional, default=False
+        Log connections to stderr.
+    threads : int, 'auto' or None, optional, default='auto'
+        Threads each worker gives to the BLAS and OpenMP runtimes. See
+        :class:`pychimera.pool.ChimeraPool`.
+    """
+    from .threads import thread_count
+    from .zygote import _listen, available
+    if not available() or not hasattr(os, 'fork'):
+        sys.exit('ERROR: pychimera serve is only available on Linux.')
+    path = os.path.abspath(path)
+    listener = _listen(path)
+    children = set()
+    limits = thread_count(threads, workers), threads != 'auto'
+
+    def on_stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, on_stop)
+    print('PyChimera JSON-RPC server listening on', path, 'with', workers, 'workers',
+          file=sys.stderr)
+    try:
+        while True:
+            while len(children) < workers:
+                children.add(_fork_worker(listener, verbose, *limits))
+            try:
+                pid, status = os.wait()
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            children.discard(pid)
+            print('Worker {} exited with status {}; replacing it'.format(pid, status),
+                  file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        if os.path.exists(path):
+            os.remove(path)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+
+
+def _fork_worker(listener, verbose=False, threads=None, override_threads=False):
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid:
+        return pid
+    code = 1
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # the server stops us
+        if threads:
+            from .threads import limit_threads
+            limit_threads(threads, override=override_threads)
+        code = _accept_loop(listener, verbose)
+    finally:
+        os._exit(code)
+
+
+def _accept_loop(listener, verbose=False):
+    from .batch import reset_session
+    while True:
+        try:
+            conn = listener.accept()[0]
+        except socket.error as e:
+            if e.args[0] == errno.EINTR:
+                continue
+            raise
+        if verbose:
+            print('Worker', os.getpid(), 'serving a connection', file=sys.stderr)
+        try:
+            serve_connection(conn)
+        except (IOError, socket.error):  # client went away
+            pass
+        finally:
+            conn.close()
+            reset_session()
+
+
+def serve_connection(conn):
+    """
+    Answer the requests read from the socket `conn` until it is closed.
+    """
+    stream = conn.makefile('rwb')
+    while True:
+        line = stream.readline()
+        if not line:
+            break
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line.decode('utf-8'))
+        except ValueError as e:
+            response = _error(None, PARSE_ERROR, 'Parse error: {}'.format(e))
+        else:
+            if request == []:
+                response = _error(None, INVALID_REQUEST, 'Invalid request: empty batch')
+            elif isinstance(request, list):
+                response = [r for r in map(handle_request, request) if r is not None]
+            else:
+                response = handle_request(request)
+        if response:
+            stream.write(json.dumps(response).encode('utf-8') + b'\n')
+            stream.flush()
+
+
+def handle_request(request):
+    """
+    Run a JSON-RPC `request` (a dict) and build its response. Requests
+    without ``id`` are notifications, and get no response.
+    """
+    if not isinstance(request, dict) or 'method' not in request:
+        return _error(None, INVALID_REQUEST, 'Invalid request')
+    request_id = request.get('id')
+    method = METHODS.get(request['method'])
+    if method is None:
+        response = _error(request_id, METHOD_NOT_FOUND,
+                          'Method not found: {}'.format(request['method']))
+    elif not isinstance(request.get('params', {}), (dict, list)):
+        response = _error(request_id, INVALID_PARAMS,
+                          'Invalid params: expected an array or an object')
+    else:
+        params = request.get('params', {})
+        try:
+            if isinstance(params, dict):
+                result = method(**dict((str(k), v) for (k, v) in params.items()))
+            else:
+                result = method(*params)
+        except Exception as e:
+            response = _error(request_id, SERVER_ERROR, '{}: {}'.format(type(e).__name__, e),
+                              traceback.format_exc())
+        else:
+            response = {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+    return response if 'id' in request else None
+
+
+def _error(request_id, code, message, data=None):
+    error = {'code': code, 'message': message}
+    if data is not None:
+        error['data'] = data
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': error}
+
+
+#---------------------------------------------------------------
+# Methods
+#---------------------------------------------------------------
+
+ATOM_FIELDS = ('name', 'element', 'serial', 'coord', 'residue', 'residue_number', 'chain',
+               'model', 'bfactor', 'occupancy')
+
+
+def run_command(command):
+    """
+    Run a Chimera command, as typed in its command line.
+    """
+    import chimera
+    chimera.runCommand(_native(command))
+
+
+def open_models(path, format=None):
+    """
+    Open `path`, optionally forcing its `format` (``pdb``, ``mol2``...).
+    Returns the opened models, as :func:`list_models` does.
+    """
+    import chimera
+    kwargs = {'type': _native(format)} if format else {}
+    return [_describe(m) for m in chimera.openModels.open(_native(path), **kwargs)]
+
+
+def save_models(path, models=None, format=None):
+    """
+    Save the `models` (model specs like ``'#0'``; all by default) to
+    `path`. PDB files can hold several models; other formats, one.
+    """
+    import chimera
+    path = _native(path)
+    selected = _models(models)
+    if not selected:
+        raise ValueError('No models to save')
+    format = format or os.path.splitext(path)[1].lstrip('.').lower() or 'pdb'
+    if format == 'pdb':
+        molecules = [m for m in selected if isinstance(m, chimera.Molecule)]
+        chimera.pdbWrite(molecules, molecules[0].openState.xform, path)
+    elif len(selected) == 1:
+        chimera.runCommand('write format {} {} {}'.format(_native(format),
+                           _spec(selected[0]), path))
+    else:
+        raise ValueError('Only PDB files can hold several models')
+    return path
+
+
+def close_models(models=None):
+    """
+    Close the `models` (model specs; all by default). Returns how many.
+    """
+    import chimera
+    selected = _models(models)
+    chimera.openModels.close(selected)
+    return len(selected)
+
+
+def list_models():
+    """
+    Open models, as dicts with their ``spec`` (``'#0'``), ``name``,
+    ``type`` and number of ``atoms``.
+    """
+    import chimera
+    return [_describe(m) for m in chimera.openModels.list()]
+
+
+def query_atoms(spec='#', fields=ATOM_FIELDS):
+    """
+    Attributes of the atoms matching the atom `spec`, in columns: a dict
+    with a list of values per field, plus the ``count`` of atoms.
+    """
+    from chimera.specifier import evalSpec
+    unknown = set(fields) - set(ATOM_FIELDS)
+    if unknown:
+        raise ValueError('Unknown fields: {}'.format(', '.join(sorted(unknown))))
+    atoms = evalSpec(_native(spec)).atoms()
+    columns = {'count': len(atoms)}
+    for field in fields:
+        columns[field] = [_ATOM_GETTERS[field](a) for a in atoms]
+    return columns
+
+
+def export_coordinates(model, elements=False, residues=False, shared=None):
+    """
+    Copy the coordinates of the molecule `model` (a spec like ``'#0'``) to
+    shared memory, with :func:`pychimera.sharedmem.export_coordinates`, and
+    return the paths of the buffers. Pass them back as `shared` to
+    overwrite the same buffers.
+    """
+    from .sharedmem import export_coordinates
+    selected = _models([model])
+    if not selected:
+        raise ValueError('No model {}'.format(model))
+    if shared is not None:
+        shared = dict((str(k), _native(v) if k != 'atoms' else v) for (k, v) in shared.items())
+    return export_coordinates(selected[0], shared=shared, elements=elements, residues=residues)
+
+
+def _coord(atom):
+    c = atom.coord()
+    return [c.x, c.y, c.z]
+
+
+_ATOM_GETTERS = {
+    'name': lambda a: a.name,
+    'element': lambda a: a.element.name,
+    'serial': lambda a: a.serialNumber,
+    'coord': _coord,
+    'residue': lambda a: a.residue.type,
+    'residue_number': lambda a: a.residue.id.position,
+    'chain': lambda a: a.residue.id.chainId,
+    'model': lambda a: _spec(a.molecule),
+    'bfactor': lambda a: a.bfactor,
+    'occupancy': lambda a: a.occupancy,
+}
+
+METHODS = {
+    'run_command': run_command,
+    'open': open_models,
+    'save': save_models,
+    'close': close_models,
+    'list_models': list_models,
+    'query_atoms': query_atoms,
+    'export_coordinates': export_coordinates,
+}
+
+
+def _spec(model):
+    spec = '#{}'.format(model.id)
+    if model.subid:
+        spec += '.{}'.format(model.subid)
+    return spec
+
+
+def _describe(model):
+    return {'spec': _spec(model), 'name': model.name, 'type': type(model).__name__,
+            'atoms': getattr(model, 'numAtoms', None)}
+
+
+def _models(specs=None):
+    import chimera
+    models = chimera.openModels.list()
+    if specs is None:
+        return models
+    if not isinstance(specs, list):
+        specs = [specs]
+    wanted = set(_native(s) for s in specs)
+    return [m for m in models if _spec(m) in wanted]
+
+
+#---------------------------------------------------------------
+# CLI
+#---------------------------------------------------------------
+
+def parse_serve_options(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog='pychimera serve',
+                                     description='Serve Chimera over a JSON-RPC Unix socket')
+    parser.add_argument('--socket', required=True, dest='socket',
+                        help='Path of the Unix socket')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Connections served at once, each by its own Chimera process')
+    return parser.parse_args(argv)
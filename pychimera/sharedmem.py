@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Shared-memory coordinates
+
+:func:`export_coordinates` copies the coordinates of a molecule (and,
+optionally, the element number and residue index of each atom) into
+``.npy`` files in shared memory (``/dev/shm`` where available). Any other
+process, including Python 3 hosts that only have NumPy, maps them with
+:func:`attach` without copying or parsing anything::
+
+    # In Chimera (a pool task, a pychimera serve worker, a script...)
+    shared = export_coordinates(molecule, elements=True)
+
+    # In the host, given `shared` (a dict of paths)
+    arrays = attach(shared)
+    arrays['coords']  # (n_atoms, 3) float32 array, backed by shared memory
+
+Exporting again into the same `shared` dict overwrites the buffers in
+place, so a reader attached to a trajectory sees each new frame. Only
+their owner can read the files. Remove them with :func:`release` when done.
+"""
+
+from __future__ import print_function
+import itertools
+import os
+import tempfile
+
+_SHARED_IDS = itertools.count()
+
+
+def shared_memory_dir():
+    """
+    Directory for the buffers: ``PYCHIMERA_SHM_DIR``, ``/dev/shm`` or the
+    temporary directory, whichever comes first.
+    """
+    path = os.environ.get('PYCHIMERA_SHM_DIR')
+    if path:
+        return path
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+def export_coordinates(molecule, shared=None, elements=False, residues=False,
+                       transformed=False):
+    """
+    Copy the atom coordinates of `molecule` into shared memory.
+
+    Parameters
+    ----------
+    molecule : chimera.Molecule
+    shared : dict, optional
+        Returned by a previous export of a molecule with the same atoms:
+        its buffers are overwritten instead of creating new ones.
+    elements : bool, optional, default=False
+        Export the element number of each atom too.
+    residues : bool, optional, default=False
+        Export the index of the residue of each atom in
+        ``molecule.residues`` too.
+    transformed : bool, optional, default=False
+        Export scene coordinates (``xformCoord``) instead of untransformed
+        ones.
+
+    Returns
+    -------
+    shared : dict
+        Paths of the ``coords`` buffer and of the optional ``elements`` and
+        ``residues`` ones, plus the number of ``atoms``. It can be sent to
+        other processes as JSON or pickled.
+    """
+    atoms = molecule.atoms
+    if shared is None:
+        prefix = os.path.join(shared_memory_dir(), 'pychimera-{}-{}-'.format(
+                              os.getpid(), next(_SHARED_IDS)))
+        shared = {'atoms': len(atoms), 'coords': prefix + 'coords.npy'}
+        if elements:
+            shared['elements'] = prefix + 'elements.npy'
+        if residues:
+            shared['residues'] = prefix + 'residues.npy'
+    elif shared['atoms'] != len(atoms):
+        raise ValueError('The molecule has {} atoms, but the buffers hold {}'.format(
+                         len(atoms), shared['atoms']))
+
+    coords = _buffer(shared['coords'], (len(atoms), 3), 'float32')
+    coords[:] = atom_coordinates(atoms, transformed=transformed)
+    coords.flush()
+    if 'elements' in shared:
+        numbers = _buffer(shared['elements'], (len(atoms),), 'uint8')
+        numbers[:] = [a.element.number for a in atoms]
+        numbers.flush()
+    if 'residues' in shared:
+        index = dict((r, i) for (i, r) in enumerate(molecule.residues))
+        indices = _buffer(shared['residues'], (len(atoms),), 'int32')
+        indices[:] = [index[a.residue] for a in atoms]
+        indices.flush()
+    return shared
+
+
+def atom_coordinates(atoms, transformed=False):
+    """
+    Coordinates of `atoms` as a (n, 3) float32 array, read in bulk by
+    Chimera's ``_multiscale`` extension when available.
+    """
+    import numpy as np
+    try:
+        from _multiscale import get_atom_coordinates
+    except ImportError:
+        get_atom_coordinates = None
+    if get_atom_coordinates is not None:
+        return get_atom_coordinates(atoms, transformed=transformed)
+    points = [a.xformCoord() if transformed else a.coord() for a in atoms]
+    return np.array([(p.x, p.y, p.z) for p in points], dtype='float32').reshape(-1, 3)
+
+
+def attach(shared, writable=False):
+    """
+    Map the buffers of an export, without copying them. Only needs NumPy.
+
+    Parameters
+    ----------
+    shared : dict
+        As returned by :func:`export_coordinates`.
+    writable : bool, optional, default=False
+        Map them read-write; writes are seen by every process.
+
+    Returns
+    -------
+    arrays : dict of numpy.memmap
+        ``coords`` and, if exported, ``elements`` and ``residues``.
+    """
+    import numpy as np
+    mode = 'r+' if writable else 'r'
+    return dict((key, np.load(shared[key], mmap_mode=mode))
+                for key in ('coords', 'elements', 'residues') if key in shared)
+
+
+def release(shared):
+    """
+    Remove the buffers of an export. Processes attached to them keep
+    their mapping until they drop it.
+    """
+    for key in ('coords', 'elements', 'residues'):
+        if key in shared:
+            try:
+                os.remove(shared[key])
+            except OSError:
+                pass
+
+
+def _buffer(path, shape, dtype):
+    """
+    A ``.npy`` file at `path` mapped in memory, reused if it matches.
+    """
+    from numpy.lib.format import open_memmap
+    if os.path.exists(path):
+        array = open_memmap(path, mode='r+')
+        if array.shape == shape and array.dtype == dtype:
+            return array
+        del array
+        os.remove(path)
+    # Other users of /dev/shm must not read it
+    os.close(os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o600))
+    return open_memmap(path, mode='w+', shape=shape, dtype=dtype)
@@ -0,0 +1,433 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Resumable job spool
+
+``pychimera queue SPOOL ...`` manages a directory of job files that any
+number of workers, on any number of hosts sharing the filesystem, can
+process without a broker::
+
+    pychimera queue /shared/spool add dock.py ligand1.mol2
+    pychimera queue /shared/spool add --file jobs.txt
+    pychimera queue /shared/spool work     # on each node, as many times as cores
+    pychimera queue /shared/spool status
+
+Each job is a JSON file that moves between the ``pending``, ``claimed``,
+``done`` and ``failed`` subdirectories. Workers claim jobs by renaming them
+into ``claimed``, which is atomic, so a job is claimed by one worker only.
+While a job runs, its worker touches the claimed file periodically; claims
+not touched for longer than the lease (a crashed or preempted worker) are
+moved back to ``pending`` by the other workers. Finished jobs are never run
+again. Jobs run like in ``--batch``: one Chimera session per worker, reset
+between jobs.
+"""
+
+from __future__ import print_function, division
+import errno
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import uuid
+
+STATES = ('pending', 'claimed', 'done', 'failed')
+
+
+class Spool(object):
+
+    """
+    A directory of jobs, created if needed.
+
+    Parameters
+    ----------
+    path : str
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        for state in STATES:
+            try:
+                os.makedirs(os.path.join(self.path, state))
+            except OSError as e:
+                if e.errno != errno.EEXIST:
+                    raise
+        self._listing = []
+
+    def add(self, jobs):
+        """
+        Add jobs to the spool.
+
+        Parameters
+        ----------
+        jobs : list of (str, list of str)
+            Script paths and their arguments. Relative paths are resolved
+            from the current directory.
+
+        Returns
+        -------
+        ids : list of str
+        """
+        ids = []
+        token = uuid.uuid4().hex[:8]
+        millis = int(time.time() * 1000)
+        for i, (script, args) in enumerate(jobs):
+            # Sorted by submission, unique across hosts
+            job_id = '{:013d}-{:08d}-{}'.format(millis, i, token)
+            job = {'id': job_id, 'script': os.path.abspath(script), 'args': list(args),
+                   'attempts': 0, 'submitted': time.time()}
+            self._write('pending', job)
+            ids.append(job_id)
+        return ids
+
+    def claim(self):
+        """
+        Claim the oldest pending job.
+
+        Returns
+        -------
+        job : dict or None
+            None if there are no pending jobs.
+        """
+        for retry in (False, True):
+            if retry or not self._listing:
+                self._listing = sorted(os.listdir(self._dir('pending')), reverse=True)
+            while self._listing:
+                name = self._listing.pop()
+                if not name.endswith('.json'):
+                    continue
+                claimed = os.path.join(self._dir('claimed'), name)
+                try:
+                    os.rename(os.path.join(self._dir('pending'), name), claimed)
+                except OSError as e:
+                    if e.errno == errno.ENOENT:  # claimed by another worker
+                        continue
+                    raise
+                job = self._read(claimed)
+                job.update(host=socket.gethostname(), pid=os.getpid(), claimed=time.time())
+                self._write('claimed', job)
+                return job
+        return None
+
+    def finish(self, job, status, seconds):
+        """
+        Record the outcome of a claimed job in ``done`` or ``failed``.
+        """
+        job.update(status=status, seconds=seconds, finished=time.time())
+        self._write('failed' if status else 'done', job)
+        self._remove('claimed', job['id'])
+        self._remove('pending', job['id'])  # requeued while it ran, if the lease expired
+
+    def release(self, job):
+        """
+        Put a claimed job back in ``pending`` without counting an attempt.
+        """
+        for key in ('host', 'pid', 'claimed'):
+            job.pop(key, None)
+        self._write('pending', job)
+        self._remove('claimed', job['id'])
+
+    def heartbeat(self, job):
+        """
+        Renew the lease of a claimed job.
+        """
+        try:
+            os.utime(self._file('claimed', job['id']), None)
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+    def requeue_expired(self, lease, max_attempts=3):
+        """
+        Move the claims not renewed for `lease` seconds back to ``pending``,
+        or to ``failed`` after `max_attempts` attempts.
+
+        Returns
+        -------
+        requeued : int
+        """
+        requeued = 0
+        now = time.time()
+        for name in os.listdir(self._dir('claimed')):
+            path = os.path.join(self._dir('claimed'), name)
+            try:
+                if not name.endswith('.json') or _age(path, now) < lease:
+                    continue
+                job = self._read(path)
+                job_id = job['id']
+            except (OSError, IOError, ValueError):  # finished or being rewritten
+                continue
+            if any(os.path.exists(self._file(state, job_id)) for state in ('done', 'failed')):
+                self._remove('claimed', job_id)  # its worker died after recording it
+                continue
+            job['attempts'] = job.get('attempts', 0) + 1
+            target = 'pending'
+            if job['attempts'] >= max_attempts:
+                target = 'failed'
+                job.update(status=None, error='lease expired {} times, last on {}'.format(
+                           job['attempts'], job.get('host')))
+            try:  # take it from claimed atomically, so only one worker requeues it
+                os.rename(path, self._file('claimed', job_id, '.requeue'))
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    continue
+                raise
+            self._write(target, job)
+            self._remove('claimed', job_id, '.requeue')
+            requeued += 1
+        return requeued
+
+    def retry_failed(self):
+        """
+        Move all failed jobs back to ``pending``, resetting their attempts.
+
+        Returns
+        -------
+        retried : int
+        """
+        retried = 0
+        for name in os.listdir(self._dir('failed')):
+            if not name.endswith('.json'):
+                continue
+            job = self._read(os.path.join(self._dir('failed'), name))
+            for key in ('host', 'pid', 'claimed', 'status', 'seconds', 'finished', 'error'):
+                job.pop(key, None)
+            job['attempts'] = 0
+            self._write('pending', job)
+            self._remove('failed', job['id'])
+            retried += 1
+        return retried
+
+    def counts(self, lease=None):
+        """
+        Number of jobs in each state, and of claims older than `lease`
+        seconds (``expired``).
+        """
+        counts = {}
+        for state in STATES:
+            counts[state] = sum(1 for n in os.listdir(self._dir(state)) if n.endswith('.json'))
+        if lease:
+            now = time.time()
+            counts['expired'] = 0
+            for name in os.listdir(self._dir('claimed')):
+                if not name.endswith('.json'):
+                    continue
+                try:
+                    if _age(os.path.join(self._dir('claimed'), name), now) > lease:
+                        counts['expired'] += 1
+                except OSError:
+                    pass
+        return counts
+
+    #---------------------------------------------------------------
+    # Files
+    #---------------------------------------------------------------
+
+    def _dir(self, state):
+        return os.path.join(self.path, state)
+
+    def _file(self, state, job_id, suffix='.json'):
+        return os.path.join(self.path, state, job_id + suffix)
+
+    def _read(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def _write(self, state, job):
+        """
+        Write `job` atomically: readers see the old file or the new one.
+        """
+        path = self._file(state, job['id'])
+        tmp = '{}.{}.{}.tmp'.format(path, socket.gethostname(), os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(job, f)
+        os.rename(tmp, path)
+
+    def _remove(self, state, job_id, suffix='.json'):
+        try:
+            os.remove(self._file(state, job_id, suffix))
+        except OSError as e:
+            if e.errno != errno.ENOENT:
+                raise
+
+
+def _age(path, now):
+    """
+    Seconds since `path` was renewed or claimed. The rename that claims a
+    job keeps its modification time, but updates its change time.
+    """
+    stat = os.stat(path)
+    return now - max(stat.st_mtime, stat.st_ctime)
+
+
+def work(spool, lease=300, max_attempts=3, max_jobs=None, wait=False, verbose=False):
+    """
+    Run jobs from `spool` until there are none left. Chimera must be enabled,
+    and thread limits set before that (``pychimera queue`` gives each worker
+    one thread, unless ``--threads`` or ``OMP_NUM_THREADS``... say otherwise).
+
+    SIGTERM and SIGINT (preemption) interrupt the running job and put it
+    back in ``pending``.
+
+    Parameters
+    ----------
+    spool : Spool
+    lease : float, optional, default=300
+        Seconds after which the jobs claimed by a worker that stopped
+        renewing them are requeued. Must be longer than any clock skew
+        between hosts.
+    max_attempts : int, optional, default=3
+        Jobs whose lease expired this many times (they crash their worker)
+        are moved to ``failed``.
+    max_jobs : int, optional
+        Stop after running this many jobs.
+    wait : bool, optional, default=False
+        When there are no pending jobs, keep waiting for new ones, or for
+        claims of other workers to expire, instead of stopping.
+    verbose : bool, optional, default=False
+
+    Returns
+    -------
+    ran, failed : int
+        Jobs run by this worker, and how many of them failed.
+    """
+    from .batch import run_script, _report
+    from .zygote import _native
+    ran = failed = 0
+    checked = 0
+    interrupted = []
+
+    def on_stop(signum, frame):
+        interrupted.append(signum)
+        raise KeyboardInterrupt
+
+    handlers = dict((signum, signal.signal(signum, on_stop))
+                    for signum in (signal.SIGTERM, signal.SIGINT))
+    try:
+        while max_jobs is None or ran < max_jobs:
+            job = spool.claim()
+            if job is None or time.time() - checked > lease / 4:
+                checked = time.time()
+                requeued = spool.requeue_expired(lease, max_attempts)
+                if requeued and verbose:
+                    print('Requeued', requeued, 'expired jobs', file=sys.stderr)
+                if job is None and requeued:
+                    continue
+            if job is None:
+                if not wait:
+                    break
+                time.sleep(min(lease / 4, 5))
+                continue
+            script, args = _native(job['script']), [_native(a) for a in job['args']]
+            if verbose:
+                print('Running', job['id'], script, *args, file=sys.stderr)
+            with _heartbeat(spool, job, lease / 4):
+                t0 = time.time()
+                try:
+                    status = run_script(script, args)
+                except KeyboardInterrupt:
+                    if not interrupted:
+                        raise
+                    status = None
+                elapsed = time.time() - t0
+            if interrupted:
+                spool.release(job)
+                print('Interrupted; {} is pending again'.format(job['id']), file=sys.stderr)
+                break
+            spool.finish(job, status, elapsed)
+            _report(script, args, status, elapsed)
+            ran += 1
+            failed += bool(status)
+    except KeyboardInterrupt:  # between jobs; a claim in progress will expire
+        if not interrupted:
+            raise
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    return ran, failed
+
+
+class _heartbeat(object):
+
+    """
+    Renew the lease of `job` every `interval` seconds while active.
+    """
+
+    def __init__(self, spool, job, interval):
+        self.spool, self.job, self.interval = spool, job, interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='pychimera heartbeat')
+        self._thread.daemon = True
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.spool.heartbeat(self.job)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stopped.set()
+        self._thread.join()
+
+
+#---------------------------------------------------------------
+# CLI
+#---------------------------------------------------------------
+
+def parse_queue_options(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog='pychimera queue',
+                                     description='Manage a resumable job spool')
+    parser.add_argument('spool', help='Spool directory, created if needed')
+    actions = parser.add_subparsers(dest='action')
+    add = actions.add_parser('add', help='Add a script (and its arguments) or a batch '
+                                         'file of them as jobs')
+    add.add_argument('--file', metavar='FILE', dest='batch_file',
+                     help='Add the scripts listed in FILE, like --batch-file')
+    add.add_argument('script', nargs='?')
+    add.add_argument('script_args', nargs=argparse.REMAINDER)
+    work = actions.add_parser('work', help='Run jobs with Chimera initialized once')
+    work.add_argument('--lease', type=float, default=300,
+                      help='Seconds without heartbeat after which a claim is requeued')
+    work.add_argument('--max-attempts', type=int, default=3,
+                      help='Fail jobs whose lease expired this many times')
+    work.add_argument('--max-jobs', type=int, help='Stop after this many jobs')
+    work.add_argument('--wait', action='store_true', default=False,
+                      help='Keep waiting for new jobs when the spool is drained')
+    status = actions.add_parser('status', help='Count jobs in each state')
+    status.add_argument('--lease', type=float, default=300)
+    actions.add_parser('retry', help='Move failed jobs back to pending')
+    return parser.parse_args(argv)
+
+
+def run_queue(args, verbose=False):
+    """
+    Run a ``pychimera queue`` action. Only ``work`` needs Chimera enabled.
+
+    Returns
+    -------
+    exit_code : int
+    """
+    spool = Spool(args.spool)
+    if args.action == 'add':
+        from .batch import read_batch_file
+        jobs = read_batch_file(args.batch_file) if args.batch_file else []
+        if args.script:
+            jobs.append((args.script, args.script_args))
+        print('Added', len(spool.add(jobs)), 'jobs to', spool.path)
+    elif args.action == 'work':
+        ran, failed = work(spool, lease=args.lease, max_attempts=args.max_attempts,
+                           max_jobs=args.max_jobs, wait=args.wait, verbose=verbose)
+        print('{} jobs run, {} failed'.format(ran, failed), file=sys.stderr)
+        return 1 if failed else 0
+    elif args.action == 'status':
+        counts = spool.counts(lease=args.lease)
+        print(' '.join('{}={}'.format(k, counts[k]) for k in STATES + ('expired',)))
+    elif args.action == 'retry':
+        print('Moved', spool.retry_failed(), 'failed jobs back to pending')
+    return 0
@@ -0,0 +1,306 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Binary structure cache
+
+:func:`open_structure` opens structure files like ``chimera.openModels.open``,
+and stores the parsed molecules (topology and coordinates) as a NumPy
+``.npz`` file named after the hash of the file contents. Opening the same
+contents again, from any path and any process, rebuilds the molecules from
+those arrays instead of parsing the text. The cache lives in the
+``structures`` directory of the PyChimera cache and old entries are evicted,
+least recently used first, beyond a size limit.
+
+Only PDB files are cached; mmCIF and the other formats Chimera reads are
+always opened normally. PDB files are only cached if the arrays describe
+their molecules completely: molecules with several coordinate sets,
+pseudobonds (missing segments, metal coordination...) or anisotropic
+B-factors are opened normally every time, so a cached molecule is the same
+as a parsed one.
+
+Chimera parses PDB files in C++, while the cached molecules are rebuilt
+through its Python API, one atom at a time. Whether that is faster depends on
+the file and on the Chimera build, so each entry records how long parsing
+took. If rebuilding the molecules takes longer, the entry is replaced by a
+marker and that file is parsed from then on.
+"""
+
+from __future__ import print_function
+import hashlib
+import os
+import tempfile
+import time
+
+from .cache import cache_dir
+
+# Bump when the layout of the cached arrays changes
+CACHE_VERSION = 3
+MAX_CACHE_SIZE = 2 * 2 ** 30
+PDB_EXTENSIONS = ('.pdb', '.ent')
+
+
+def open_structure(path, format=None, max_size=MAX_CACHE_SIZE, cache=None):
+    """
+    Open the molecules in `path`, from the cache if its contents were
+    opened before.
+
+    Parameters
+    ----------
+    path : str
+    format : str, optional
+        Chimera file type, guessed from the extension by default. Only
+        ``'PDB'`` is cached.
+    max_size : int, optional, default=MAX_CACHE_SIZE
+        Bytes the cache may take. Least recently used entries are removed
+        beyond it when a new one is stored. None disables the limit.
+    cache : str, optional
+        Cache directory. Defaults to the ``structures`` directory of the
+        PyChimera cache.
+
+    Returns
+    -------
+    molecules : list of chimera.Molecule
+        Added to ``chimera.openModels``. Files other than PDB, those whose
+        models can't be cached exactly and those that parse faster than they
+        are rebuilt (see the module docs) are opened normally.
+    """
+    import chimera
+    kwargs = {'type': format} if format else {}
+    if (format or _guess_format(path)) != 'PDB':
+        return chimera.openModels.open(path, **kwargs)
+    cache = cache or cache_dir('structures')
+    entry = os.path.join(cache, _digest(path, format) + '.npz')
+    if os.path.exists(entry):
+        t0 = time.time()
+        try:
+            molecules, parse_time = _load(entry, path)
+        except (IOError, OSError, KeyError, ValueError):
+            _remove(entry)  # truncated or from an incompatible numpy
+        else:
+            _touch(entry)
+            if molecules is None:  # parsing won
+                return chimera.openModels.open(path, **kwargs)
+            chimera.openModels.add(molecules)
+            if time.time() - t0 > parse_time:
+                _store_parse_marker(entry)
+            return molecules
+
+    t0 = time.time()
+    models = chimera.openModels.open(path, **kwargs)
+    parse_time = time.time() - t0
+    if models and all(_round_trips(m) for m in models):
+        _store(entry, models, path, parse_time)
+        if max_size is not None:
+            evict(cache, max_size)
+    return models
+
+
+def evict(cache, max_size):
+    """
+    Remove the least recently used entries of `cache` until it takes
+    `max_size` bytes or less.
+
+    Returns
+    -------
+    removed : int
+        Entries removed.
+    """
+    entries = []
+    for name in os.listdir(cache):
+        if not name.endswith('.npz'):
+            continue
+        try:
+            st = os.stat(os.path.join(cache, name))
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, name))
+    entries.sort()
+    total = sum(size for (_, size, _) in entries)
+    removed = 0
+    for _, size, name in entries:
+        if total <= max_size:
+            break
+        _remove(os.path.join(cache, name))
+        total -= size
+        removed += 1
+    return removed
+
+
+def _guess_format(path):
+    if os.path.splitext(path)[1].lower() in PDB_EXTENSIONS:
+        return 'PDB'
+
+
+def _round_trips(model):
+    """
+    Whether the cached arrays describe `model` completely.
+    """
+    import chimera
+    if not isinstance(model, chimera.Molecule) or len(model.coordSets) != 1:
+        return False
+    if any(g.pseudoBonds for g in model.pseudoBondMgr().pseudoBondGroups):
+        return False
+    return all(a.anisoU is None for a in model.atoms)
+
+
+def _digest(path, format=None):
+    import chimera
+    sha = hashlib.sha1()
+    version = getattr(getattr(chimera, 'version', None), 'release', '')
+    sha.update('{}|{}|{}|'.format(CACHE_VERSION, version, format or '').encode('utf-8'))
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(2 ** 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+#---------------------------------------------------------------
+# Serialization
+#---------------------------------------------------------------
+
+def _store(entry, molecules, path, parse_time):
+    """
+    Save the topology and coordinates of `molecules`, opened from `path`
+    in `parse_time` seconds, to `entry`, atomically.
+    """
+    import numpy as np
+    from .tables import atom_table
+    arrays = {'models': np.array(len(molecules)), 'parse_time': np.array(parse_time)}
+    for i, molecule in enumerate(molecules):
+        table = atom_table(molecule)
+        residues = molecule.residues
+        headers = sorted((getattr(molecule, 'pdbHeaders', None) or {}).items())
+        prefix = 'm{}_'.format(i)
+        arrays.update({
+            prefix + 'name': np.array(molecule.name),
+            prefix + 'named_after_file': np.array(molecule.name == os.path.basename(path)),
+            prefix + 'opened_as': np.array(repr(tuple(molecule.openedAs[1:]))),
+            prefix + 'header_records': np.array([k for (k, lines) in headers for _ in lines]),
+            prefix + 'header_lines': np.array([line for (_, lines) in headers
+                                               for line in lines]),
+            prefix + 'coords': table.coords,
+            prefix + 'elements': table.elements,
+            prefix + 'names': table.names,
+            prefix + 'residues': table.residues,
+            prefix + 'bonds': table.bonds,
+            prefix + 'serials': np.array([a.serialNumber for a in table.atoms], dtype='int32'),
+            prefix + 'bfactors': np.array([a.bfactor for a in table.atoms], dtype='float32'),
+            prefix + 'occupancies': np.array([a.occupancy for a in table.atoms],
+                                             dtype='float32'),
+            prefix + 'altlocs': np.array([a.altLoc for a in table.atoms]),
+            prefix + 'residue_names': table.residue_names,
+            prefix + 'residue_numbers': table.residue_numbers,
+            prefix + 'residue_chains': np.array([r.id.chainId for r in residues]),
+            prefix + 'residue_inserts': np.array([r.id.insertionCode for r in residues]),
+            prefix + 'residue_het': np.array([r.isHet for r in residues], dtype='bool'),
+            prefix + 'residue_ss': np.array([(r.isHelix, r.isSheet, r.ssId) for r in residues],
+                                            dtype='int32').reshape(-1, 3),
+        })
+    _save(entry, arrays)
+
+
+def _store_parse_marker(entry):
+    """
+    Replace `entry` with one that sends its file to the parser.
+    """
+    import numpy as np
+    try:
+        _save(entry, {'models': np.array(-1), 'parse_time': np.array(0.0)})
+    except (IOError, OSError):
+        pass
+
+
+def _save(entry, arrays):
+    import numpy as np
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(entry), prefix='.tmp-', suffix='.npz')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.rename(tmp, entry)
+    except Exception:
+        _remove(tmp)
+        raise
+
+
+def _load(entry, path):
+    """
+    Rebuild the molecules saved in `entry`, for `path`, without adding them
+    to ``chimera.openModels``.
+
+    Returns
+    -------
+    molecules : list of chimera.Molecule or None
+        None if the entry is a parse marker.
+    parse_time : float
+        Seconds it took to parse the file.
+    """
+    import numpy as np
+    with np.load(entry) as data:
+        arrays = dict((key, data[key]) for key in data.files)
+    models = int(arrays['models'])
+    if models < 0:
+        return None, 0.0
+    return ([_build(arrays, 'm{}_'.format(i), path) for i in range(models)],
+            float(arrays['parse_time']))
+
+
+def _build(arrays, prefix, path):
+    import ast
+    import chimera
+    from .tables import set_atom_coordinates
+    get = lambda key: arrays[prefix + key].tolist()
+    molecule = chimera.Molecule()
+    # Same contents, maybe under another name
+    molecule.name = os.path.basename(path) if get('named_after_file') else get('name')
+    molecule.openedAs = (path,) + ast.literal_eval(get('opened_as'))
+    headers = {}
+    for record, line in zip(get('header_records'), get('header_lines')):
+        headers.setdefault(record, []).append(line)
+    molecule.pdbHeaders = headers
+    molecule.activeCoordSet = molecule.newCoordSet(0)
+
+    residues = []
+    for name, chain, number, insert, het, (helix, sheet, ss) in zip(
+            get('residue_names'), get('residue_chains'), get('residue_numbers'),
+            get('residue_inserts'), get('residue_het'), get('residue_ss')):
+        residue = molecule.newResidue(name, chain, number, insert)
+        residue.isHet = het
+        residue.isHelix, residue.isSheet, residue.ssId = bool(helix), bool(sheet), ss
+        residues.append(residue)
+    molecule.structureAssigned = True
+
+    atoms = []
+    new_atom = molecule.newAtom
+    elements = dict((n, chimera.Element(n)) for n in set(get('elements')))
+    for name, element, residue, serial, bfactor, occupancy, altloc in zip(
+            get('names'), get('elements'), get('residues'), get('serials'), get('bfactors'),
+            get('occupancies'), get('altlocs')):
+        atom = new_atom(name, elements[element])
+        residues[residue].addAtom(atom)
+        atom.serialNumber = serial
+        atom.bfactor = bfactor
+        atom.occupancy = occupancy
+        if altloc.strip():
+            atom.altLoc = altloc
+        atoms.append(atom)
+    set_atom_coordinates(atoms, arrays[prefix + 'coords'])
+
+    new_bond = molecule.newBond
+    for i, j in get('bonds'):
+        new_bond(atoms[i], atoms[j])
+    return molecule
+
+
+def _touch(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
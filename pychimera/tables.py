@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Columnar atom tables
+
+Each attribute read from a ``chimera.Atom`` crosses the C++ wrapper, so
+analysis loops that call ``atom.coord()``, ``atom.name`` or
+``atom.residue.id`` for every atom spend most of their time there.
+:func:`atom_table` reads everything once, in a single pass, and returns
+NumPy arrays that can be sliced, masked and vectorized::
+
+    table = atom_table(molecule)
+    backbone = np.in1d(table.names, ['N', 'CA', 'C', 'O'])
+    table.coords[backbone] += shift
+    table.write_coordinates()  # back to the molecule, in one call
+"""
+
+from __future__ import print_function
+
+
+class AtomTable(object):
+
+    """
+    Snapshot of the atoms of a molecule, in columns. Build it with
+    :func:`atom_table`.
+
+    Attributes
+    ----------
+    coords : numpy.ndarray
+        (n_atoms, 3) float32 untransformed coordinates.
+    elements : numpy.ndarray
+        Atomic number of each atom, uint8.
+    names : numpy.ndarray
+        Atom names, as strings.
+    residues : numpy.ndarray
+        Index of the residue of each atom in ``residue_names``, int32.
+    chains : numpy.ndarray
+        Index of the chain of each atom in ``chain_ids``, int32.
+    bonds : numpy.ndarray
+        (n_bonds, 2) int32 atom indices of each bond.
+    residue_names, residue_numbers : numpy.ndarray
+        Type and sequence number of each residue, in ``molecule.residues`` order.
+    chain_ids : list of str
+        In order of appearance.
+    atoms : list of chimera.Atom
+        The atoms of the rows, for :meth:`write_coordinates`.
+    """
+
+    def __init__(self, molecule, atoms, coords, elements, names, residues, chains, bonds,
+                 residue_names, residue_numbers, chain_ids):
+        self.molecule = molecule
+        self.atoms = atoms
+        self.coords = coords
+        self.elements = elements
+        self.names = names
+        self.residues = residues
+        self.chains = chains
+        self.bonds = bonds
+        self.residue_names = residue_names
+        self.residue_numbers = residue_numbers
+        self.chain_ids = chain_ids
+
+    def __len__(self):
+        return len(self.atoms)
+
+    def __repr__(self):
+        return '<AtomTable of {} atoms, {} residues, {} bonds>'.format(
+            len(self.atoms), len(self.residue_names), len(self.bonds))
+
+    def write_coordinates(self, coords=None):
+        """
+        Set the untransformed coordinates of the atoms to `coords`
+        (``self.coords`` by default), in one call.
+
+        Raises
+        ------
+        ValueError
+            If `coords` is not a (n_atoms, 3) array of numbers, or the atoms
+            of the molecule changed since the snapshot was taken.
+        """
+        import numpy as np
+        coords = np.asarray(self.coords if coords is None else coords)
+        if coords.ndim != 2 or coords.shape[1] != 3 or coords.dtype.kind not in 'fiu':
+            raise ValueError('Expected a (n, 3) array of numbers, got {} {}'.format(
+                             coords.shape, coords.dtype))
+        if len(coords) != len(self.atoms) or self.molecule.numAtoms != len(self.atoms):
+            raise ValueError('The atoms of the molecule changed since the table was built')
+        set_atom_coordinates(self.atoms, coords)
+
+
+def atom_table(molecule):
+    """
+    Read the atoms of `molecule` into an :class:`AtomTable`.
+
+    Parameters
+    ----------
+    molecule : chimera.Molecule
+
+    Returns
+    -------
+    table : AtomTable
+    """
+    import numpy as np
+    from .sharedmem import atom_coordinates
+
+    atoms = molecule.atoms
+    residue_list = molecule.residues
+    residue_index = dict((r, i) for (i, r) in enumerate(residue_list))
+    chain_ids, chain_index, residue_chains = [], {}, []
+    residue_names, residue_numbers = [], []
+    for residue in residue_list:
+        rid = residue.id
+        if rid.chainId not in chain_index:
+            chain_index[rid.chainId] = len(chain_ids)
+            chain_ids.append(rid.chainId)
+        residue_chains.append(chain_index[rid.chainId])
+        residue_names.append(residue.type)
+        residue_numbers.append(rid.position)
+
+    n = len(atoms)
+    names, elements, residues = [None] * n, [0] * n, [0] * n
+    atom_index = {}
+    for i, atom in enumerate(atoms):
+        atom_index[atom] = i
+        names[i] = atom.name
+        elements[i] = atom.element.number
+        residues[i] = residue_index[atom.residue]
+
+    bonds = []
+    for bond in molecule.bonds:
+        a1, a2 = bond.atoms
+        bonds.append((atom_index[a1], atom_index[a2]))
+
+    residues = np.array(residues, dtype='int32')
+    return AtomTable(molecule, atoms,
+                     coords=np.asarray(atom_coordinates(atoms), dtype='float32'),
+                     elements=np.array(elements, dtype='uint8'),
+                     names=np.array(names),
+                     residues=residues,
+                     chains=np.array(residue_chains, dtype='int32')[residues],
+                     bonds=np.array(bonds, dtype='int32').reshape(-1, 2),
+                     residue_names=np.array(residue_names),
+                     residue_numbers=np.array(residue_numbers, dtype='int32'),
+                     chain_ids=chain_ids)
+
+
+def set_atom_coordinates(atoms, coords):
+    """
+    Set the untransformed coordinates of `atoms` from a (n, 3) array, in
+    bulk with Chimera's ``_multiscale`` extension when available.
+    """
+    import numpy as np
+    try:
+        from _multiscale import set_atom_coordinates as set_coordinates
+    except ImportError:
+        set_coordinates = None
+    if set_coordinates is not None:
+        set_coordinates(atoms, np.asarray(coords, dtype='float32'))
+        return
+    from chimera import Point
+    for atom, (x, y, z) in zip(atoms, np.asarray(coords).tolist()):
+        atom.setCoord(Point(x, y, z))
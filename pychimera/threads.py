@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Thread limits for parallel runs
+
+NumPy's BLAS and OpenMP runtimes start one thread per core by default. With
+several Chimera processes per node, that means many more busy threads than
+cores. These helpers compute a per-process thread count from a policy and
+set it in the env vars those runtimes read when they load, and can pin each
+process to its own block of CPUs.
+"""
+
+from __future__ import print_function, division
+import os
+import sys
+
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                    'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+
+def available_cpus():
+    """
+    CPUs this process can run on, honoring its affinity mask (as set by
+    ``taskset`` or a batch scheduler) where possible.
+
+    Returns
+    -------
+    cpus : list of int
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    try:
+        import psutil
+        return sorted(psutil.Process().cpu_affinity())
+    except (ImportError, AttributeError):
+        import multiprocessing
+        return list(range(multiprocessing.cpu_count()))
+
+
+def thread_count(policy, workers=1):
+    """
+    Threads each of `workers` processes should use.
+
+    Parameters
+    ----------
+    policy : int, str or None
+        A number of threads, or ``'auto'`` to divide the available CPUs
+        among the workers. None leaves the runtimes alone.
+    workers : int, optional, default=1
+        Processes running at once on this node.
+
+    Returns
+    -------
+    threads : int or None
+    """
+    if policy is None:
+        return None
+    if policy == 'auto':
+        return max(1, len(available_cpus()) // max(1, workers))
+    threads = int(policy)
+    if threads <= 0:
+        raise ValueError('The number of threads must be greater than 0')
+    return threads
+
+
+def limit_threads(threads, override=True):
+    """
+    Set the BLAS and OpenMP thread env vars to `threads`. They are read
+    when the libraries load, so call it before importing numpy. If numpy
+    is loaded already (e.g., in a process forked after importing it), its
+    runtimes are limited with ``threadpoolctl``, if installed.
+
+    Parameters
+    ----------
+    threads : int
+    override : bool, optional, default=True
+        Replace the values already set in the environment. Otherwise,
+        only unset variables are changed, and if any was set, the loaded
+        runtimes are left alone (they read it when they loaded).
+    """
+    preset = any(name in os.environ for name in THREAD_VARIABLES)
+    for name in THREAD_VARIABLES:
+        if override or name not in os.environ:
+            os.environ[name] = str(threads)
+    if (override or not preset) and 'numpy' in sys.modules:
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            return
+        threadpool_limits(limits=threads)
+
+
+def worker_cpus(slot, threads, cpus=None):
+    """
+    Block of `threads` CPUs for the worker in `slot` (0, 1, ...), wrapping
+    around if there are more threads than CPUs.
+    """
+    cpus = cpus or available_cpus()
+    start = slot * threads
+    return [cpus[(start + i) % len(cpus)] for i in range(threads)]
+
+
+def pin_cpus(cpus):
+    """
+    Restrict this process (and the threads it starts from now on) to
+    `cpus`. Uses ``os.sched_setaffinity`` or, on Python 2, ``psutil`` if
+    installed.
+
+    Returns
+    -------
+    pinned : bool
+        False if pinning is not supported here.
+    """
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+        return True
+    try:
+        import psutil
+        psutil.Process().cpu_affinity(list(cpus))
+        return True
+    except (ImportError, AttributeError):
+        return False
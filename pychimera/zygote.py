@@ -0,0 +1,329 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Zygote server
+
+``pychimera --zygote SOCKET`` patches the environment and initializes
+Chimera once, then listens on a local Unix socket. When the
+``PYCHIMERA_ZYGOTE`` env var points to that socket, ``pychimera script.py``
+becomes a thin client: instead of patching, restarting and initializing
+Chimera, it asks the zygote to fork a pre-initialized child that runs the
+script with the client's arguments, working directory, environment and
+standard streams, and exits with the child's exit code.
+
+The child reopens the client's stdin, stdout and stderr through
+``/proc/<pid>/fd``, so only Linux is supported. Whenever the zygote can't
+run a job (it is not running, or the streams can't be reopened), the client
+falls back to a regular launch.
+"""
+
+from __future__ import print_function
+import errno
+import json
+import os
+import select
+import signal
+import socket
+import sys
+
+# Variables set by patch_environ that the jobs must keep from the zygote
+_CHIMERA_VARIABLES = ('PYTHONPATH', 'PYTHONNOUSERSITE', 'LD_LIBRARY_PATH',
+                      'DYLD_FALLBACK_LIBRARY_PATH', 'DYLD_FRAMEWORK_PATH',
+                      'TCL_LIBRARY', 'TCLLIBPATH', 'FONTCONFIG_FILE')
+# Seconds a job waits for its client to send the request
+_REQUEST_TIMEOUT = 30
+
+
+def available():
+    return hasattr(socket, 'AF_UNIX') and os.path.isdir('/proc/self/fd')
+
+
+def serve(path, verbose=False):
+    """
+    Serve jobs on the Unix socket at `path` until SIGTERM or SIGINT.
+    Chimera must be enabled already.
+
+    Parameters
+    ----------
+    path : str
+        Socket location. A stale socket left by a previous zygote is replaced.
+    verbose : bool, optional, default=False
+        Log each job to stderr.
+    """
+    if not available():
+        sys.exit('ERROR: The zygote server is only available on Linux.')
+    path = os.path.abspath(path)
+    listener = _listen(path)
+    os.environ.pop('PYCHIMERA_ZYGOTE', None)
+    wakeup_r, wakeup_w = os.pipe()
+    jobs = {}
+
+    def on_child(signum, frame):
+        os.write(wakeup_w, b'.')
+
+    def on_stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGCHLD, on_child)
+    signal.signal(signal.SIGTERM, on_stop)
+    print('PyChimera zygote listening on', path, file=sys.stderr)
+    try:
+        while True:
+            try:
+                ready = select.select([listener, wakeup_r], [], [])[0]
+            except (select.error, OSError) as e:
+                if e.args[0] == errno.EINTR:
+                    continue
+                raise
+            if wakeup_r in ready:
+                os.read(wakeup_r, 512)
+                _reap(jobs, verbose)
+            if listener in ready:
+                try:
+                    conn = listener.accept()[0]
+                except socket.error as e:
+                    if e.args[0] == errno.EINTR:
+                        continue
+                    raise
+                pid = _fork_job(conn, listener, (wakeup_r, wakeup_w))
+                if pid is None:
+                    conn.close()
+                else:
+                    jobs[pid] = conn
+                    if verbose:
+                        print('Started job', pid, file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+        if os.path.exists(path):
+            os.remove(path)
+        for conn in jobs.values():
+            conn.close()
+
+
+def run_in_zygote(path, argv, verbose=False):
+    """
+    Ask the zygote listening at `path` to run the command line `argv`
+    (``sys.argv`` of a ``pychimera`` launch).
+
+    Returns
+    -------
+    exit_code : int or None
+        None if the zygote could not run the job.
+    """
+    if not available():
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except socket.error as e:
+        if verbose:
+            print('Could not connect to zygote at {}: {}'.format(path, e), file=sys.stderr)
+        return None
+    stream = client.makefile('rwb')
+    request = {'argv': argv, 'cwd': os.getcwd(), 'env': dict(os.environ), 'pid': os.getpid()}
+    stream.write(json.dumps(request).encode('utf-8') + b'\n')
+    stream.flush()
+    started = _read_message(stream)
+    if not started or 'pid' not in started:
+        if verbose:
+            print('Zygote could not run the job: {}'.format(
+                  (started or {}).get('error', 'connection closed')), file=sys.stderr)
+        return None
+
+    def forward(signum, frame):
+        try:
+            os.kill(started['pid'], signum)
+        except OSError:
+            pass
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, forward)
+    while True:
+        try:
+            finished = _read_message(stream)
+        except (IOError, socket.error) as e:
+            if e.args[0] == errno.EINTR:
+                continue
+            raise
+        break
+    client.close()
+    return finished['exit'] if finished else 1
+
+
+#---------------------------------------------------------------
+# Server helpers
+#---------------------------------------------------------------
+
+def _listen(path):
+    if os.path.exists(path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except socket.error:
+            os.remove(path)  # stale
+        else:
+            sys.exit('ERROR: A zygote is already listening on {}'.format(path))
+        finally:
+            probe.close()
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o077)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(umask)
+    listener.listen(64)
+    return listener
+
+
+def _fork_job(conn, listener, wakeup):
+    """
+    Fork the child that reads a job request from `conn` and runs it, so a
+    slow client doesn't hold up the rest. Returns the pid of the child, or
+    None if it could not be forked.
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    try:
+        pid = os.fork()
+    except OSError:
+        return None
+    if pid:
+        return pid
+    # Child
+    code = 1
+    try:
+        listener.close()
+        for fd in wakeup:
+            os.close(fd)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        conn.settimeout(_REQUEST_TIMEOUT)
+        stream = conn.makefile('rwb')
+        try:
+            request = _read_message(stream)
+        except (IOError, ValueError, socket.error):
+            request = None
+        if not request:
+            os._exit(1)
+        conn.settimeout(None)
+        try:
+            _setup_job(request)
+        except (IOError, OSError) as e:
+            _send_message(stream, {'error': str(e)})
+            os._exit(1)
+        _send_message(stream, {'pid': os.getpid()})
+        stream.close()
+        conn.close()
+        code = _run_job(request['argv'])
+    finally:
+        os._exit(code)
+
+
+def _setup_job(request):
+    """
+    Give this process the stdio, working directory and environment of the client.
+    """
+    streams = [_reopen(request['pid'], fd) for fd in (0, 1, 2)]
+    os.chdir(request['cwd'])
+    patched = dict((k, v) for (k, v) in os.environ.items()
+                   if k in _CHIMERA_VARIABLES or k.startswith('CHIMERA'))
+    os.environ.clear()
+    for key, value in request['env'].items():
+        os.environ[_native(key)] = _native(value)
+    os.environ.update(patched)
+    for fd, reopened in enumerate(streams):
+        os.dup2(reopened, fd)
+        os.close(reopened)
+    if 'random' in sys.modules:
+        sys.modules['random'].seed()
+
+
+def _reopen(pid, fd):
+    path = '/proc/{}/fd/{}'.format(pid, fd)
+    if fd == 0:
+        return os.open(path, os.O_RDONLY)
+    flags = os.O_WRONLY
+    if os.path.isfile(os.path.realpath(path)):  # redirected to a file: don't clobber it
+        flags |= os.O_APPEND
+    return os.open(path, flags)
+
+
+def _run_job(argv):
+    """
+    Run a ``pychimera`` command line with the same semantics as
+    :func:`pychimera.core.run_cli_options`. Returns the exit code.
+    """
+    import atexit
+    import traceback
+    from .batch import _exit_status
+    from .core import parse_cli_options, run_cli_options
+    if hasattr(atexit, '_exithandlers'):  # drop the zygote's own handlers
+        del atexit._exithandlers[:]
+    sys.argv = [_native(a) for a in argv]
+    try:
+        args, _ = parse_cli_options(sys.argv[1:])
+        run_cli_options(args)
+        code = 0
+    except SystemExit as e:
+        code = _exit_status(e.code)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    try:
+        atexit._run_exitfuncs()
+    except BaseException:
+        pass
+    sys.stdout.flush()
+    sys.stderr.flush()
+    return code
+
+
+def _reap(jobs, verbose=False):
+    while jobs:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except OSError as e:
+            if e.errno == errno.ECHILD:
+                return
+            raise
+        if not pid:
+            return
+        conn = jobs.pop(pid, None)
+        if os.WIFSIGNALED(status):
+            code = 128 + os.WTERMSIG(status)
+        else:
+            code = os.WEXITSTATUS(status)
+        if verbose:
+            print('Job', pid, 'exited with', code, file=sys.stderr)
+        if conn is not None:
+            try:
+                _send_message(conn.makefile('wb'), {'exit': code})
+            except (IOError, socket.error):
+                pass
+            conn.close()
+
+
+#---------------------------------------------------------------
+# Protocol
+#---------------------------------------------------------------
+
+def _send_message(stream, message):
+    stream.write(json.dumps(message).encode('utf-8') + b'\n')
+    stream.flush()
+
+
+def _read_message(stream):
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+def _native(value):
+    if not isinstance(value, str):  # unicode from JSON in Python 2
+        return value.encode('utf-8')
+    return value
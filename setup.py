@@ -26,6 +26,7 @@ setup(
     description='Use UCSF Chimera Python API in a standard Python 2.7 interpreter.',
     long_description=read('README.rst'),
     packages=find_packages(),
+    extras_require={'pool': ['futures; python_version < "3"']},
     include_package_data=True,
     platforms='any',
     classifiers=[
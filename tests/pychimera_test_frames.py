@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import struct
+import pytest
+
+np = pytest.importorskip('numpy')
+from pychimera.frames import iter_frames
+
+ATOMS = 12
+FRAMES = 20
+
+
+def write_models(path):
+    lines = []
+    for frame in range(FRAMES):
+        lines.append('MODEL     {:4d}\n'.format(frame + 1))
+        lines.extend('ATOM  {:5d}  CA  ALA A{:4d}    {:8.3f}{:8.3f}{:8.3f}'
+                     '  1.00  0.00           C\n'.format(i + 1, i + 1, frame, i, 0)
+                     for i in range(ATOMS))
+        lines.append('ENDMDL\n')
+    path.write(''.join(lines) + 'CONECT    1{:5d}\nEND\n'.format(ATOMS))
+
+
+def write_mol2(path):
+    lines = []
+    for frame in range(FRAMES):
+        lines.append('@<TRIPOS>MOLECULE\npose{}\n{} 0 1\nSMALL\nNO_CHARGES\n\n'
+                     '@<TRIPOS>ATOM\n'.format(frame, ATOMS))
+        # Not in serial order
+        lines.extend('{} C{} {:.3f} {:.3f} 0.000 C.3 1 LIG 0.0000\n'.format(i + 1, i + 1, frame, i)
+                     for i in reversed(range(ATOMS)))
+    path.write(''.join(lines))
+
+
+def write_dcd(path, frames):
+    def record(data):
+        return struct.pack('<i', len(data)) + data + struct.pack('<i', len(data))
+    header = b'CORD' + struct.pack('<9if10i', *([len(frames)] + [0] * 8 + [0.1] + [0] * 9 + [24]))
+    chunks = [record(header), record(struct.pack('<i', 1) + b' ' * 80),
+              record(struct.pack('<i', ATOMS))]
+    for coords in frames:
+        chunks.extend(record(np.ascontiguousarray(coords[:, axis], '<f4').tobytes())
+                      for axis in range(3))
+    path.write_binary(b''.join(chunks))
+
+
+def coords_by_serial(molecule):
+    return [(a.coord().x, a.coord().y) for a in sorted(molecule.atoms,
+                                                      key=lambda a: a.serialNumber)]
+
+
+def test_pdb_frames(tmpdir):
+    import chimera
+    path = tmpdir.join('models.pdb')
+    write_models(path)
+    opened = len(chimera.openModels.list())
+    molecules = set()
+    for frame, molecule in enumerate(iter_frames(str(path))):
+        molecules.add(molecule)
+        assert coords_by_serial(molecule) == [(frame, i) for i in range(ATOMS)]
+    assert frame == FRAMES - 1
+    assert len(molecules) == 1
+    assert len(chimera.openModels.list()) == opened + 1
+    assert (1, ATOMS) in [tuple(sorted(a.serialNumber for a in b.atoms)) for b in molecule.bonds]
+
+
+def test_mol2_frames(tmpdir):
+    path = tmpdir.join('poses.mol2')
+    write_mol2(path)
+    for frame, molecule in enumerate(iter_frames(str(path))):
+        assert coords_by_serial(molecule) == [(frame, i) for i in range(ATOMS)]
+    assert frame == FRAMES - 1
+
+
+def test_dcd_frames(tmpdir):
+    pdb = tmpdir.join('models.pdb')
+    write_models(pdb)
+    molecule = next(iter_frames(str(pdb)))
+    frames = [np.arange(ATOMS * 3, dtype='f4').reshape(ATOMS, 3) + k for k in range(3)]
+    dcd = tmpdir.join('traj.dcd')
+    write_dcd(dcd, frames)
+    for k, _ in enumerate(iter_frames(str(dcd), molecule=molecule)):
+        assert coords_by_serial(molecule) == [(x, y) for (x, y, _) in frames[k].tolist()]
+    assert k == 2
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+import pytest
+
+pytest.importorskip('concurrent.futures')
+from pychimera.pool import ChimeraPool, TaskTimeout, WorkerLost, worker_open, _free_slot
+
+
+def chimera_pid(x):
+    import chimera
+    chimera.openModels.list()
+    return x, os.getpid()
+
+
+def opened_by(path):
+    return path, os.getpid(), id(worker_open(path)[0])
+
+
+def fail(x):
+    raise ValueError(x)
+
+
+def die():
+    os._exit(1)
+
+
+def hang(x):
+    while x:
+        time.sleep(0.1)
+    return x
+
+
+def test_pool_map():
+    with ChimeraPool(max_workers=2) as pool:
+        results = list(pool.map(chimera_pid, range(10)))
+    assert [x for (x, _) in results] == list(range(10))
+    assert os.getpid() not in set(pid for (_, pid) in results)
+
+
+def test_pool_errors():
+    with ChimeraPool(max_workers=1) as pool:
+        with pytest.raises(ValueError):
+            pool.submit(fail, 'remote').result()
+        with pytest.raises(WorkerLost):
+            pool.submit(die).result()
+        assert pool.submit(chimera_pid, 1).result()[0] == 1
+
+
+def test_fork_map():
+    from pychimera import fork_map
+    shared = dict((i, i * i) for i in range(100))
+    assert list(fork_map(lambda i: shared[i], range(100), processes=2, chunksize=7)) == \
+        [i * i for i in range(100)]
+    assert sorted(fork_map(lambda i: -i, range(10), ordered=False)) == sorted(-i for i in range(10))
+
+
+def test_pool_recycling():
+    with ChimeraPool(max_workers=2, max_tasks_per_worker=3) as pool:
+        pids = set(pid for (_, pid) in pool.map(chimera_pid, range(12)))
+    assert len(pids) >= 4
+    assert pool.stats['recycled_tasks'] >= 3
+    assert pool.stats['tasks_completed'] == 12
+
+
+def test_pool_affinity(tmpdir):
+    paths = []
+    for i in range(3):
+        path = tmpdir.join('{}.pdb'.format(i))
+        path.write('ATOM      1  CA  ALA A   1       0.000   0.000   0.000'
+                   '  1.00  0.00           C\n')
+        paths.append(str(path))
+    with ChimeraPool(max_workers=3) as pool:
+        futures = [pool.schedule(opened_by, (paths[i % 3],), affinity=paths[i % 3])
+                   for i in range(30)]
+        opened = set(f.result()[1:] for f in futures)
+    assert pool.stats['affinity_hits'] + pool.stats['affinity_misses'] == 30
+    # Each open happened once per worker, at most
+    assert len(opened) == pool.stats['affinity_misses'] <= 9
+
+
+def test_free_slot():
+    assert _free_slot(3, live=[0, 2]) == 1
+    # A replacement started before the worker it replaces is gone
+    assert _free_slot(3, live=[1, 2], exiting=[0]) == 0
+    assert _free_slot(4, live=[1, 2], exiting=[0]) == 3
+
+
+def test_pool_timeout(tmpdir):
+    log = str(tmpdir.join('stacks.log'))
+    with ChimeraPool(max_workers=2, task_timeout=2, stack_log=log) as pool:
+        stuck = pool.submit(hang, 1)
+        others = [pool.submit(hang, 0) for _ in range(10)]
+        with pytest.raises(TaskTimeout):
+            stuck.result()
+        assert [f.result() for f in others] == [0] * 10
+        assert pool.submit(hang, 0).result() == 0
+    assert pool.stats['tasks_timed_out'] == 1
+    with open(log) as f:
+        assert 'in hang' in f.read()
+
+
+def test_pool_cancel_pending():
+    with ChimeraPool(max_workers=1) as pool:
+        running = pool.schedule(hang, (1,), timeout=2)
+        while not running.running():
+            time.sleep(0.1)
+        queued = [pool.submit(hang, 0) for _ in range(5)]
+        assert pool.cancel_pending() == 5
+        assert all(f.cancelled() for f in queued)
+        with pytest.raises(TaskTimeout):
+            running.result()
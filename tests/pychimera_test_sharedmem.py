@@ -0,0 +1,40 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import pytest
+
+np = pytest.importorskip('numpy')
+from pychimera.sharedmem import attach, export_coordinates, release
+
+
+def build_molecule(n):
+    import chimera
+    molecule = chimera.Molecule()
+    residue = molecule.newResidue('UNK', 'A', 1, ' ')
+    for i in range(n):
+        atom = molecule.newAtom('C{}'.format(i), chimera.Element('C'))
+        atom.setCoord(chimera.Coord(i, 2 * i, 3 * i))
+        residue.addAtom(atom)
+    return molecule
+
+
+def test_export_attach(tmpdir, monkeypatch):
+    monkeypatch.setenv('PYCHIMERA_SHM_DIR', str(tmpdir))
+    molecule = build_molecule(5)
+    shared = export_coordinates(molecule, elements=True, residues=True)
+    assert os.stat(shared['coords']).st_mode & 0o777 == 0o600
+    arrays = attach(shared)
+    assert arrays['coords'].shape == (5, 3)
+    expected = [[a.coord().x, a.coord().y, a.coord().z] for a in molecule.atoms]
+    assert arrays['coords'].tolist() == expected
+    assert arrays['elements'].tolist() == [6] * 5
+    assert arrays['residues'].tolist() == [0] * 5
+
+    import chimera
+    molecule.atoms[0].setCoord(chimera.Coord(-1, -1, -1))
+    assert export_coordinates(molecule, shared=shared) is shared
+    assert arrays['coords'][0].tolist() == [-1, -1, -1]
+
+    release(shared)
+    assert not os.listdir(str(tmpdir))
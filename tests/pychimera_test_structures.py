@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import pytest
+
+pytest.importorskip('numpy')
+import chimera
+from pychimera.structures import evict, open_structure
+
+PDB = ''.join('ATOM  {:5d}  {:<3} GLY A{:4d}    {:8.3f}{:8.3f}{:8.3f}  1.00{:6.2f}           {}\n'
+              .format(4 * r + i + 1, name, r + 1, r * 3.8 + i, i * 1.2, 0.5 * i, 10.0 + i, name[0])
+              for r in range(10) for (i, name) in enumerate(('N', 'CA', 'C', 'O')))
+HETATM = 'HETATM   41 ZN    ZN A 101      20.000  20.000  20.000  0.50 30.00          ZN\n'
+HEADER = 'HEADER    TEST                                    01-JAN-00   1ABC              \n'
+
+
+def describe(molecule):
+    atoms = sorted(molecule.atoms, key=lambda a: a.serialNumber)
+    return ([(a.name, a.element.number, a.serialNumber, round(a.bfactor, 2),
+              round(a.occupancy, 2), a.altLoc, a.anisoU is None,
+              a.residue.type, a.residue.id.position, a.residue.id.chainId,
+              a.residue.id.insertionCode, a.residue.isHet, a.residue.isHelix,
+              a.residue.isSheet, a.residue.ssId,
+              tuple(round(x, 3) for x in (a.coord().x, a.coord().y, a.coord().z)))
+             for a in atoms],
+            sorted(tuple(sorted(a.serialNumber for a in b.atoms)) for b in molecule.bonds),
+            molecule.name, molecule.openedAs[1:], len(molecule.coordSets),
+            getattr(molecule, 'pdbHeaders', None),
+            [g.pseudoBonds for g in molecule.pseudoBondMgr().pseudoBondGroups])
+
+
+def test_structure_cache(tmpdir):
+    path = tmpdir.join('gly.pdb')
+    path.write(HEADER + PDB + HETATM)
+    cache = str(tmpdir.mkdir('cache'))
+    parsed = open_structure(str(path), cache=cache)
+    assert len(os.listdir(cache)) == 1
+    cached = open_structure(str(path), cache=cache)
+    assert cached[0] is not parsed[0]
+    assert describe(cached[0]) == describe(parsed[0])
+    # Same contents, another file
+    copy = tmpdir.join('copy.pdb')
+    copy.write(HEADER + PDB + HETATM)
+    cached = open_structure(str(copy), cache=cache)
+    assert describe(cached[0]) == describe(chimera.openModels.open(str(copy))[0])
+    assert cached[0].openedAs[0] == str(copy)
+
+
+def test_structure_cache_only_pdb(tmpdir):
+    path = tmpdir.join('ch4.mol2')
+    path.write('@<TRIPOS>MOLECULE\nch4\n 1 0 1\nSMALL\nUSER_CHARGES\n\n'
+               '@<TRIPOS>ATOM\n      1 C1  0.0000 0.0000 0.0000 C.3 1 CH4 -0.1000\n')
+    cache = str(tmpdir.mkdir('cache'))
+    molecules = open_structure(str(path), cache=cache)
+    assert round(molecules[0].atoms[0].charge, 4) == -0.1
+    assert not os.listdir(cache)
+
+
+def test_structure_cache_eviction(tmpdir):
+    cache = str(tmpdir.mkdir('cache'))
+    for name in 'abcd':
+        for entry in os.listdir(cache):
+            os.utime(os.path.join(cache, entry), (0, 0))
+        path = tmpdir.join(name + '.pdb')
+        path.write('REMARK {}\n'.format(name) + PDB)
+        open_structure(str(path), cache=cache, max_size=None)
+    entries = os.listdir(cache)
+    newest = max(entries, key=lambda e: os.path.getmtime(os.path.join(cache, e)))
+    assert len(entries) == 4
+    assert evict(cache, 2 * os.path.getsize(os.path.join(cache, newest))) == 2
+    remaining = os.listdir(cache)
+    assert len(remaining) == 2 and newest in remaining
+
+
+def test_structure_cache_parse_marker(tmpdir):
+    import numpy as np
+    from pychimera.structures import _store_parse_marker
+    path = tmpdir.join('gly.pdb')
+    path.write(PDB)
+    cache = str(tmpdir.mkdir('cache'))
+    parsed = open_structure(str(path), cache=cache)
+    entry = os.path.join(cache, os.listdir(cache)[0])
+    _store_parse_marker(entry)
+    reopened = open_structure(str(path), cache=cache)
+    assert describe(reopened[0]) == describe(parsed[0])
+    with np.load(entry) as data:
+        assert int(data['models']) == -1
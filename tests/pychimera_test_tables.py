@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import pytest
+
+np = pytest.importorskip('numpy')
+from pychimera.tables import atom_table
+
+
+def build_peptide():
+    import chimera
+    molecule = chimera.Molecule()
+    previous = None
+    for position, chain in ((1, 'A'), (2, 'A'), (1, 'B')):
+        residue = molecule.newResidue('GLY', chain, position, ' ')
+        for name, element in (('N', 'N'), ('CA', 'C')):
+            atom = molecule.newAtom(name, chimera.Element(element))
+            atom.setCoord(chimera.Coord(position, len(molecule.atoms), 0))
+            residue.addAtom(atom)
+            if previous is not None:
+                molecule.newBond(previous, atom)
+            previous = atom
+    return molecule
+
+
+def test_atom_table():
+    molecule = build_peptide()
+    table = atom_table(molecule)
+    atoms = molecule.atoms
+    assert len(table) == len(atoms) == 6
+    assert table.names.tolist() == [a.name for a in atoms]
+    assert table.elements.tolist() == [a.element.number for a in atoms]
+    assert table.coords.tolist() == [[a.coord().x, a.coord().y, a.coord().z] for a in atoms]
+    residues = molecule.residues
+    assert [residues[i] for i in table.residues] == [a.residue for a in atoms]
+    assert [table.chain_ids[i] for i in table.chains] == [a.residue.id.chainId for a in atoms]
+    assert table.residue_numbers.tolist() == [r.id.position for r in residues]
+    assert table.bonds.shape == (5, 2)
+    bonded = set(frozenset((atoms[i], atoms[j])) for (i, j) in table.bonds)
+    assert bonded == set(frozenset(b.atoms) for b in molecule.bonds)
+
+
+def test_write_coordinates():
+    molecule = build_peptide()
+    table = atom_table(molecule)
+    table.coords += 10
+    table.write_coordinates()
+    assert atom_table(molecule).coords.tolist() == table.coords.tolist()
+    with pytest.raises(ValueError):
+        table.write_coordinates(table.coords.ravel())
+    with pytest.raises(ValueError):
+        table.write_coordinates(table.coords.astype(str))
+    molecule.deleteAtom(molecule.atoms[0])
+    with pytest.raises(ValueError):
+        table.write_coordinates()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import zipfile
+from pychimera import bytecode
+from pychimera.importcache import CachedPathFinder
+
+
+def test_precompile(tmpdir, monkeypatch):
+    monkeypatch.setenv('PYCHIMERA_BYTECODE_DIR', str(tmpdir.join('bytecode')))
+    root = tmpdir.mkdir('chimera')
+    share = root.mkdir('share')
+    share.join('pychimera_bc_module.py').write('X = 42\n')
+    share.join('pychimera_bc_broken.py').write('def\n')
+    assert not bytecode.is_precompiled(str(root))
+    assert bytecode.precompile(str(root)) == (1, 0, 1)
+    assert bytecode.is_precompiled(str(root))
+    assert bytecode.precompile(str(root)) == (0, 1, 1)
+
+    monkeypatch.syspath_prepend(str(share))
+    finder = CachedPathFinder(str(tmpdir.join('imports.json')), bytecode=True)
+    monkeypatch.setattr(sys, 'meta_path', [finder] + sys.meta_path)
+    import pychimera_bc_module
+    assert pychimera_bc_module.X == 42
+    del sys.modules['pychimera_bc_module']
+
+
+def test_bytecode_finder(tmpdir, monkeypatch):
+    monkeypatch.setenv('PYCHIMERA_BYTECODE_DIR', str(tmpdir.join('bytecode')))
+    share = tmpdir.mkdir('chimera').mkdir('share')
+    share.join('pychimera_bc_other.py').write('Y = 7\n')
+    package = share.mkdir('pychimera_bc_package')
+    package.join('__init__.py').write('Z = 1\n')
+    bytecode.precompile(str(tmpdir.join('chimera')))
+
+    finder = bytecode.BytecodeFinder()
+    assert finder.find_module('pychimera_bc_missing', [str(share)]) is None
+    for name, attr, value in (('pychimera_bc_other', 'Y', 7),
+                              ('pychimera_bc_package', 'Z', 1)):
+        assert finder.find_module(name, [str(share)]) is finder
+        try:
+            assert getattr(finder.load_module(name), attr) == value
+        finally:
+            sys.modules.pop(name, None)
+    # Left to the standard machinery from the first zip on, so it isn't shadowed
+    archive = tmpdir.join('modules.zip')
+    zipfile.ZipFile(str(archive), 'w').close()
+    assert finder.find_module('pychimera_bc_other', [str(archive), str(share)]) is None
+    assert finder.find_module('pychimera_bc_other', [str(tmpdir.join('missing')),
+                                                     str(share)]) is finder
+    # Compiled into the cache, not next to the sources
+    assert not share.join('pychimera_bc_other.pyc').check()
+    assert tmpdir.join('bytecode').check()
@@ -2,9 +2,12 @@
 # -*- coding: utf-8 -*-
 
 import pytest
-from subprocess import check_output
+from subprocess import check_output, Popen, PIPE
 from conftest import datapath
+import os
 import sys
+import time
+from socket import socket as Socket, AF_UNIX
 
 def test_script():
     out = check_output(['pychimera', datapath('helloworld.py')],
@@ -30,3 +33,113 @@ def test_m_flag():
     out = check_output(['pychimera', '-m', 'helloworld'],
                        universal_newlines=True)
     assert out == 'Hello world! \n'
+
+
+def test_env_file(tmpdir):
+    lockfile = str(tmpdir.join('env.json'))
+    check_output(['pychimera', '--freeze-env', lockfile])
+    out = check_output(['pychimera', '--env-file', lockfile, datapath('helloworld.py')],
+                       universal_newlines=True)
+    assert out == 'Hello world! \n'
+
+
+@pytest.mark.skipif(sys.platform.startswith('win'), reason="Shell launchers only")
+def test_launcher(tmpdir):
+    launcher = str(tmpdir.join('pychimera-launcher'))
+    check_output(['pychimera', '--write-launcher', launcher])
+    out = check_output([launcher, datapath('helloworld.py'), 'a'], universal_newlines=True)
+    assert out == 'Hello world! a\n'
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="Linux only")
+def test_zygote(tmpdir):
+    socket = str(tmpdir.join('zygote.sock'))
+    server = Popen(['pychimera', '--zygote', socket])
+    try:
+        for _ in range(600):
+            if os.path.exists(socket):
+                break
+            time.sleep(0.1)
+        env = dict(os.environ, PYCHIMERA_ZYGOTE=socket)
+        stalled = Socket(AF_UNIX)  # a client that never sends its request
+        stalled.connect(socket)
+        out = check_output(['pychimera', datapath('helloworld.py'), 'a'], env=env,
+                           universal_newlines=True)
+        assert out == 'Hello world! a\n'
+        out = check_output(['pychimera', '--threads', '2', '-c',
+                            'import os; print(os.environ["OMP_NUM_THREADS"])'],
+                           env=env, universal_newlines=True)
+        assert out.strip() == '2'
+        stalled.close()
+    finally:
+        server.terminate()
+        server.wait()
+    assert not os.path.exists(socket)
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="Linux only")
+def test_serve(tmpdir):
+    from pychimera.client import ChimeraClient, RemoteError
+    socket = str(tmpdir.join('rpc.sock'))
+    server = Popen(['pychimera', 'serve', '--socket', socket, '--workers', '2'])
+    try:
+        for _ in range(600):
+            if os.path.exists(socket):
+                break
+            time.sleep(0.1)
+        with ChimeraClient(socket, timeout=60) as client:
+            assert client.list_models() == []
+            assert client.call_many([('list_models', {})] * 100) == [[]] * 100
+            with pytest.raises(RemoteError):
+                client.call('no_such_method')
+            with pytest.raises(RemoteError) as error:
+                client.call_many([('list_models', 'abc')])
+            assert error.value.code == -32602
+            client._send([])  # empty batch
+            client._stream.flush()
+            with pytest.raises(RemoteError) as error:
+                client._receive()
+            assert error.value.code == -32600
+    finally:
+        server.terminate()
+        server.wait()
+    assert not os.path.exists(socket)
+
+
+def test_batch(tmpdir):
+    batch = tmpdir.join('batch.txt')
+    batch.write('{0} a\n# comment\n{0} b c\n'.format(datapath('helloworld.py')))
+    out = check_output(['pychimera', '--batch-file', str(batch)], universal_newlines=True)
+    assert out == 'Hello world! a\nHello world! b,c\n'
+    out = check_output(['pychimera', '--batch', datapath('helloworld.py'),
+                        datapath('helloworld.py')], universal_newlines=True)
+    assert out == 'Hello world! \nHello world! \n'
+
+    interrupt = tmpdir.join('interrupt.py')
+    interrupt.write('import os, signal, time\nos.kill(os.getpid(), signal.SIGINT)\n'
+                    'time.sleep(5)\n')
+    process = Popen(['pychimera', '--batch', str(interrupt), datapath('helloworld.py')],
+                    stdout=PIPE, stderr=PIPE, universal_newlines=True)
+    out, _ = process.communicate()
+    assert process.returncode != 0
+    assert 'Hello world!' not in out
+
+
+def test_queue(tmpdir):
+    spool = str(tmpdir.join('spool'))
+    check_output(['pychimera', 'queue', spool, 'add', datapath('helloworld.py'), 'a'])
+    check_output(['pychimera', 'queue', spool, 'add', datapath('helloworld.py'), 'b'])
+    out = check_output(['pychimera', 'queue', spool, 'work', '--max-jobs', '1'],
+                       universal_newlines=True)
+    assert out == 'Hello world! a\n'
+    out = check_output(['pychimera', 'queue', spool, 'work'], universal_newlines=True)
+    assert out == 'Hello world! b\n'
+    out = check_output(['pychimera', 'queue', spool, 'status'], universal_newlines=True)
+    assert out == 'pending=0 claimed=0 done=2 failed=0 expired=0\n'
+    # One thread per worker, set before Chimera starts
+    threads = tmpdir.join('threads.py')
+    threads.write('import os\nprint(os.environ.get("OMP_NUM_THREADS"))\n')
+    check_output(['pychimera', 'queue', spool, 'add', str(threads)])
+    env = dict((k, v) for (k, v) in os.environ.items() if not k.endswith('_THREADS'))
+    out = check_output(['pychimera', 'queue', spool, 'work'], universal_newlines=True, env=env)
+    assert out == '1\n'
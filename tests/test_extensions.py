@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import types
+import pytest
+
+imp = pytest.importorskip('imp')
+from pychimera import extensions
+
+PURE = '''
+"""Declares an extension"""
+import chimera.extension
+
+VALUE = 42
+
+
+class DemoEMO(chimera.extension.EMO):
+    def name(self):
+        return 'Demo'
+    def description(self):
+        return 'A demo extension'
+
+
+chimera.extension.manager.registerExtension(DemoEMO(__file__))
+'''
+
+IMPURE = '''
+import pychimera_test_emo_class
+pychimera_test_emo_class.register()
+'''
+
+EMO_CLASS = '''
+import chimera.extension
+
+
+class ForeignEMO(chimera.extension.EMO):
+    def name(self):
+        return 'Foreign'
+
+
+def register():
+    chimera.extension.manager.registerExtension(ForeignEMO(__file__))
+'''
+
+
+class EMO(object):
+
+    def __init__(self, path):
+        self.path = path
+
+
+class Manager(object):
+
+    def __init__(self):
+        self.registered = []
+
+    def registerExtension(self, emo):
+        self.registered.append(emo)
+
+
+@pytest.fixture
+def chimera_root(tmpdir, monkeypatch):
+    monkeypatch.setenv('PYCHIMERA_CACHE_DIR', str(tmpdir.join('cache')))
+    chimera = types.ModuleType('chimera')
+    chimera.extension = types.ModuleType('chimera.extension')
+    chimera.extension.EMO = EMO
+    monkeypatch.setitem(sys.modules, 'chimera', chimera)
+    monkeypatch.setitem(sys.modules, 'chimera.extension', chimera.extension)
+    monkeypatch.syspath_prepend(str(tmpdir))
+    tmpdir.join('pychimera_test_emo_class.py').write(EMO_CLASS)
+    root = tmpdir.mkdir('chimera')
+    root.mkdir('share').mkdir('Demo').join('ChimeraExtension.py').write(PURE)
+    root.join('share').mkdir('Other').join('ChimeraExtension.py').write(IMPURE)
+    return root
+
+
+def start(root):
+    """
+    Load every ChimeraExtension.py like chimeraInit does, with a new manager.
+    """
+    manager = sys.modules['chimera.extension'].manager = Manager()
+    modules = {}
+    with extensions.extension_manifest(str(root)):
+        for name in ('Demo', 'Other'):
+            path = str(root.join('share', name, 'ChimeraExtension.py'))
+            modules[name] = imp.load_source('CE_' + name, path)
+    return manager, modules
+
+
+def test_is_pure(chimera_root):
+    assert extensions.is_pure(str(chimera_root.join('share', 'Demo', 'ChimeraExtension.py')))
+    assert not extensions.is_pure(str(chimera_root.join('share', 'Other',
+                                                        'ChimeraExtension.py')))
+
+
+def test_record_and_replay(chimera_root):
+    demo = str(chimera_root.join('share', 'Demo', 'ChimeraExtension.py'))
+    other = str(chimera_root.join('share', 'Other', 'ChimeraExtension.py'))
+    manager, _ = start(chimera_root)
+    assert [emo.name() for emo in manager.registered] == ['Demo', 'Foreign']
+    manifest = extensions.load_manifest(str(chimera_root))
+    # Keyed by the file that registers them, not the one defining the class
+    assert sorted(manifest['extensions']) == sorted([demo, other])
+    assert manifest['extensions'][demo]['pure']
+    assert not manifest['extensions'][other]['pure']
+
+    manager, modules = start(chimera_root)
+    lazy, foreign = manager.registered
+    assert repr(lazy).startswith('<lazy DemoEMO')
+    assert lazy.name() == 'Demo'
+    assert lazy.__dict__['_real'] is None  # answered from the manifest
+    assert foreign.name() == 'Foreign'
+    assert modules['Demo'].VALUE == 42
+    assert lazy.path == demo
+    assert len(manager.registered) == 2
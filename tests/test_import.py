@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+from subprocess import check_output
+import pychimera
+
+LAZY_MODULES = ('argparse', 'runpy', 'pychimera.jupyter_utils', 'IPython', 'chimera',
+                'pychimera.extensions', 'pychimera.importcache', 'pychimera.bytecode',
+                'pychimera.threads', 'pychimera.registry', 'pychimera.cache',
+                'imp', 'ast', 'inspect', 'hashlib', 'tokenize', 'json',
+                'subprocess', 'tempfile')
+
+
+def _loaded_modules(module):
+    # Development checkouts run git to compute the version, loading modules
+    # of its own; built installs don't. Run it first, so those don't count.
+    version = os.path.join(os.path.dirname(pychimera.__file__), '_version.py')
+    code = ("import sys\n"
+            "path = {!r}\n"
+            "namespace = {{'__file__': path, '__name__': '_version'}}\n"
+            "exec(compile(open(path).read(), path, 'exec'), namespace)\n"
+            "namespace['get_versions']()\n"
+            "before = set(m for m in sys.modules if sys.modules[m])\n"
+            "import {}\n"
+            "print('\\n'.join(m for m in sys.modules if sys.modules[m] and m not in before))"
+            ).format(version, module)
+    return check_output([sys.executable, '-c', code], universal_newlines=True).split()
+
+
+def test_import_is_lightweight():
+    loaded = _loaded_modules('pychimera.core')
+    assert not set(LAZY_MODULES).intersection(loaded)
+
+
+def test_client_import():
+    # The client runs on any Python 3, where core and its modules may not import
+    loaded = _loaded_modules('pychimera.client')
+    assert 'pychimera.client' in loaded
+    assert 'pychimera.core' not in loaded
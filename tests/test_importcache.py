@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import pytest
+
+pytest.importorskip('imp')
+from pychimera.importcache import CachedPathFinder
+
+
+def write_modules(tmpdir, *names):
+    for name in names:
+        tmpdir.mkdir(name).join('pychimera_ic_module.py').write('X = {!r}\n'.format(name))
+    return [str(tmpdir.join(name)) for name in names]
+
+
+def load(finder, path=None):
+    sys.modules.pop('pychimera_ic_module', None)
+    try:
+        assert finder.find_module('pychimera_ic_module', path) is finder
+        return finder.load_module('pychimera_ic_module').X
+    finally:
+        sys.modules.pop('pychimera_ic_module', None)
+
+
+def test_shadowing_order(tmpdir):
+    first, second = write_modules(tmpdir, 'first', 'second')
+    cache = str(tmpdir.join('imports.json'))
+    finder = CachedPathFinder(cache)
+    assert load(finder, [first, second]) == 'first'
+    assert load(finder, [second, first]) == 'second'
+    finder.save()
+    # Warm start, from the stored listings
+    finder = CachedPathFinder(cache)
+    assert load(finder, [first, second]) == 'first'
+    assert finder.find_module('pychimera_ic_missing', [first, second]) is None
+
+
+def test_relative_entries_follow_cwd(tmpdir, monkeypatch):
+    first, second = write_modules(tmpdir, 'first', 'second')
+    finder = CachedPathFinder(str(tmpdir.join('imports.json')))
+    monkeypatch.chdir(first)
+    assert load(finder, ['', second]) == 'first'
+    monkeypatch.chdir(second)
+    assert load(finder, ['', first]) == 'second'
+    monkeypatch.chdir(str(tmpdir))
+    assert load(finder, ['', first]) == 'first'
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+from pychimera import importprofile
+
+
+def test_import_profile(tmpdir, monkeypatch):
+    package = tmpdir.mkdir('pychimera_profiled')
+    package.join('__init__.py').write('from . import child\n')
+    package.join('child.py').write('X = 1\n')
+    monkeypatch.syspath_prepend(str(tmpdir))
+    monkeypatch.setattr(importprofile, '_STATE', {})
+    report = str(tmpdir.join('imports.txt'))
+    importprofile.start(report)
+    try:
+        import pychimera_profiled
+    finally:
+        importprofile.stop()
+        del sys.modules['pychimera_profiled'], sys.modules['pychimera_profiled.child']
+    importprofile.write_report()
+    with open(report) as f:
+        lines = f.read()
+    assert 'pychimera_profiled.child' in lines
+    assert 'user:pychimera_profiled' in lines
+    with open(report + '.folded') as f:
+        stacks = [line.rsplit(' ', 1)[0] for line in f]
+    assert 'pychimera_profiled;pychimera_profiled.child' in stacks
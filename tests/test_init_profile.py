@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pychimera.core import INIT_PROFILES, _init_profile_kwargs
+
+
+def init(argv, nogui=False, nokeyboard=False, nostatus=False, notools=False,
+         preferences=True, fileHistory=True, eventloop=True, exitonquit=True,
+         title=None, debug=False, silent=False):
+    pass
+
+
+def old_init(argv, nogui=False, eventloop=True):
+    pass
+
+
+def any_init(argv, **kwargs):
+    pass
+
+
+def test_minimal_profile(capsys):
+    assert _init_profile_kwargs(init, 'minimal') == INIT_PROFILES['minimal']
+    assert _init_profile_kwargs(any_init, 'minimal') == INIT_PROFILES['minimal']
+    assert _init_profile_kwargs(init, 'default') == {}
+    assert 'WARNING' not in capsys.readouterr().err
+
+
+def test_unsupported_profile_warns(capsys):
+    assert _init_profile_kwargs(old_init, 'minimal') == {}
+    assert 'supports none of the options' in capsys.readouterr().err
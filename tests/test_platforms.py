@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pychimera.platforms.common import build_search_path
+
+
+def test_build_search_path(tmpdir):
+    a, b = str(tmpdir.mkdir('a')), str(tmpdir.mkdir('b'))
+    missing = str(tmpdir.join('missing.zip'))
+    path, removed = build_search_path([b, '', a, missing, b + '/', a], separator=':')
+    assert path == ':'.join([b, '', a])
+    assert removed == 3
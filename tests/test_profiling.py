@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+from pychimera import profiling
+
+
+def test_profiling_is_off_by_default(tmpdir, monkeypatch):
+    monkeypatch.delenv('PYCHIMERA_PROFILE', raising=False)
+    monkeypatch.setattr(profiling, '_EVENTS', [])
+    monkeypatch.chdir(str(tmpdir))
+    assert not profiling.enabled()
+    with profiling.phase('cheap'):
+        pass
+    assert [e['name'] for e in profiling._EVENTS] == ['cheap']
+    assert profiling._EVENTS[0]['rss'] is None
+    profiling.write_report()
+    assert not os.listdir(str(tmpdir))
+
+
+def test_chrome_trace(tmpdir, monkeypatch):
+    monkeypatch.setattr(profiling, '_EVENTS', [])
+    monkeypatch.setenv('PYCHIMERA_PROFILE', str(tmpdir.join('trace.json')))
+    with profiling.phase('outer'):
+        with profiling.phase('inner'):
+            pass
+    profiling.write_report()
+    with open(str(tmpdir.join('trace.json'))) as f:
+        report = json.load(f)
+    events = dict((e['name'], e) for e in report['traceEvents'])
+    assert sorted(events) == ['inner', 'outer']
+    assert all(e['ph'] == 'X' and e['dur'] >= 0 for e in events.values())
+    assert events['outer']['ts'] <= events['inner']['ts']
+    assert events['outer']['dur'] >= events['inner']['dur']
+    assert not profiling._EVENTS  # reported once
+
+
+def test_events_are_capped(monkeypatch):
+    monkeypatch.setattr(profiling, '_EVENTS', [])
+    monkeypatch.setattr(profiling, '_MAX_EVENTS', 3)
+    for _ in range(5):
+        with profiling.phase('repeated'):
+            pass
+    assert len(profiling._EVENTS) == 3
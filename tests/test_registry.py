@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import pytest
+from pychimera import registry
+
+
+@pytest.fixture
+def installs(tmpdir, monkeypatch):
+    monkeypatch.setenv('PYCHIMERA_CACHE_DIR', str(tmpdir.join('cache')))
+    monkeypatch.setenv('PATH', str(tmpdir.mkdir('bin')))
+    opt = tmpdir.mkdir('opt')
+    opt.mkdir('UCSF-Chimera64-1.12').mkdir('lib')
+    opt.mkdir('UCSF-Chimera64-1.13.1').mkdir('lib').mkdir('python2.7')
+    return opt
+
+
+def test_scan_and_reload(installs):
+    args = ('chimera',), (str(installs),), 'UCSF-Chimera*'
+    scanned = registry.scan_installations(*args)
+    paths = registry.registered_paths(scanned, 'chimera')
+    assert [os.path.basename(p) for p in paths] == ['UCSF-Chimera64-1.13.1',
+                                                    'UCSF-Chimera64-1.12']
+    info = scanned['installations'][paths[0]]
+    assert info['version'] == '1.13.1' and not info['headless']
+    assert info['pythonlib'].endswith('python2.7')
+    assert registry.load_registry(*args) is not None
+
+
+def test_registry_invalidated_by_new_install(installs):
+    args = ('chimera',), (str(installs),), 'UCSF-Chimera*'
+    registry.scan_installations(*args)
+    installs.mkdir('UCSF-Chimera64-1.14')
+    os.utime(str(installs), (0, 0))
+    assert registry.load_registry(*args) is None
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+from pychimera.spool import Spool
+
+
+def test_spool_claims(tmpdir):
+    spool = Spool(str(tmpdir))
+    first, second = spool.add([('a.py', ['1']), ('b.py', [])])
+    job = spool.claim()
+    assert job['id'] == first and job['args'] == ['1']
+    assert Spool(str(tmpdir)).claim()['id'] == second
+    assert spool.claim() is None
+    spool.finish(job, 0, 1.0)
+    assert spool.counts() == {'pending': 0, 'claimed': 1, 'done': 1, 'failed': 0}
+
+
+def test_spool_expired_leases(tmpdir):
+    spool = Spool(str(tmpdir))
+    spool.add([('crash.py', [])])
+    for attempt in range(3):
+        job = spool.claim()
+        assert job['attempts'] == attempt
+        assert spool.requeue_expired(lease=0, max_attempts=3) == 1
+    assert spool.claim() is None
+    assert spool.counts()['failed'] == 1
+    assert spool.retry_failed() == 1
+    assert spool.claim()['attempts'] == 0
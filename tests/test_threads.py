@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import pytest
+from pychimera.threads import (THREAD_VARIABLES, available_cpus, limit_threads,
+                               thread_count, worker_cpus)
+
+
+def test_thread_count():
+    cpus = len(available_cpus())
+    assert thread_count(None) is None
+    assert thread_count(3) == 3
+    assert thread_count('auto') == cpus
+    assert thread_count('auto', workers=cpus * 2) == 1
+    with pytest.raises(ValueError):
+        thread_count(0)
+
+
+def test_limit_threads(monkeypatch):
+    for name in THREAD_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('OMP_NUM_THREADS', '4')
+    limit_threads(2, override=False)
+    assert os.environ['OMP_NUM_THREADS'] == '4'
+    assert os.environ['OPENBLAS_NUM_THREADS'] == '2'
+    limit_threads(1)
+    assert all(os.environ[name] == '1' for name in THREAD_VARIABLES)
+
+
+def test_worker_cpus():
+    cpus = [0, 1, 2, 3]
+    assert worker_cpus(0, 2, cpus) == [0, 1]
+    assert worker_cpus(1, 2, cpus) == [2, 3]
+    assert worker_cpus(2, 3, cpus) == [2, 3, 0]
+
+
+def test_limit_loaded_runtimes(monkeypatch):
+    calls = []
+    threadpoolctl = type(os)('threadpoolctl')
+    threadpoolctl.threadpool_limits = lambda limits: calls.append(limits)
+    monkeypatch.setitem(sys.modules, 'threadpoolctl', threadpoolctl)
+    monkeypatch.setitem(sys.modules, 'numpy', sys.modules.get('numpy', type(os)('numpy')))
+    for name in THREAD_VARIABLES:
+        monkeypatch.delenv(name, raising=False)
+    limit_threads(2, override=False)
+    assert calls == [2]
+    limit_threads(3, override=False)  # the environment was set already
+    assert calls == [2]
+    limit_threads(3)
+    assert calls == [2, 3]